@@ -0,0 +1,33 @@
+"""bench_sentiment.py
+
+Headlines/sec of the shared SentimentEngine at a given batch size and thread count.
+Run from the repo root:
+    python -m benchmarks.bench_sentiment [--n 512] [--batch-size 32] [--threads 4] [--stub]
+--stub swaps the model for a trivial callable to measure the batching overhead without downloading FinBERT.
+"""
+import argparse, time
+from scripts.sentiment_engine import SentimentEngine
+
+def _stub_factory(model_name):
+    return lambda texts, **kw: [{'label': 'Positive' if 'up' in t else 'Neutral', 'score': 0.9} for t in texts]
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--n', type=int, default=512)
+    ap.add_argument('--batch-size', type=int, nargs='+', default=[1, 8, 32])
+    ap.add_argument('--threads', type=int, default=None)
+    ap.add_argument('--stub', action='store_true')
+    args = ap.parse_args()
+    eng = SentimentEngine(num_threads=args.threads, pipeline_factory=_stub_factory if args.stub else None)
+    eng.score_texts(['warm up'])
+    print(f"model load {eng.load_seconds:.2f}s")
+    headlines = {f'SYM{i}': [f'SYM{i} shares up on strong results', f'SYM{i} misses estimates'] for i in range(args.n // 2)}
+    for bs in args.batch_size:
+        eng.batch_size = bs
+        t0 = time.perf_counter()
+        eng.score_symbols(headlines)
+        dt = time.perf_counter() - t0
+        print(f"batch {bs:>4}: {args.n} headlines in {dt:.3f}s -> {args.n / dt:.0f} headlines/s")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,34 @@
+"""bench_signal_panel.py
+
+Throughput of the per-symbol generate_signals loop vs. the panel engine (generate_signals_panel).
+Run from the repo root:
+    python -m benchmarks.bench_signal_panel [--bars 250] [--symbols 50 500 2000]
+"""
+import argparse, time
+from benchmarks.fixtures import synthetic_universe
+from scripts.signal_generator import generate_signals, generate_signals_panel
+
+def _time(fn, data, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn(data)
+        best = min(best, time.perf_counter() - t0)
+    return best, out
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--bars', type=int, default=250)
+    ap.add_argument('--symbols', type=int, nargs='+', default=[50, 500, 2000])
+    ap.add_argument('--repeat', type=int, default=3)
+    args = ap.parse_args()
+    print(f"{'symbols':>8} {'loop s':>10} {'panel s':>10} {'loop sym/s':>12} {'panel sym/s':>12} {'speedup':>8}")
+    for n in args.symbols:
+        data = synthetic_universe(n, args.bars)
+        t_loop, a = _time(generate_signals, data, args.repeat)
+        t_panel, b = _time(generate_signals_panel, data, args.repeat)
+        assert a == b, 'panel engine diverged from generate_signals'
+        print(f"{n:>8} {t_loop:>10.4f} {t_panel:>10.4f} {n / t_loop:>12.0f} {n / t_panel:>12.0f} {t_loop / t_panel:>7.1f}x")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,204 @@
+"""fixtures.py
+
+Synthetic data and local fakes shared by the benchmarks.
+Functions:
+- synthetic_universe(n_symbols, n_bars, seed=0, interval=86400) -> {symbol: Candles} (geometric random walks)
+- chart_payload(candles) -> Yahoo chart API JSON for one series
+- synthetic_candidates(data, seed=0) -> signal candidate dicts at each symbol's last close
+- synthetic_executions(n, seed=0) -> execution result dicts as order_router returns them
+- synthetic_trade_history(n, n_symbols=50, strategies=('momentum', 'mean_reversion'), days=250, seed=0)
+  -> closed-trade columns in the trade_history.csv schema, time-ordered over `days` sessions
+- headlines(n, seed=0) -> synthetic news headlines
+- instrument_records(symbols, n_derivatives=0, seed=0) -> Kite instrument-dump rows (NSE equities for `symbols`,
+  plus NFO futures/options); write_instrument_csv(path, records) writes them as the broker's CSV dump
+Classes:
+- FakeMarketServer(n_bars=250, latency=0.0, articles=20) -> local HTTP server speaking the Yahoo chart and
+  NewsAPI `everything` formats; use as a context manager, `.patched()` points the fetcher and the news agent at it
+
+Everything is seeded, so two runs over the same sizes see identical inputs.
+"""
+from typing import Dict, Any, List
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+import csv, json, os, random, threading, time, zlib
+import numpy as np
+from scripts.candles import Candles
+
+_POS = ['surge', 'beat estimates', 'strong growth', 'upgrade', 'record high', 'outperform']
+_NEG = ['fall', 'missed estimates', 'weak demand', 'downgrade', 'profit warning', 'loss']
+
+def synthetic_universe(n_symbols: int, n_bars: int, seed: int = 0, interval: int = 86400) -> Dict[str, Candles]:
+    rng = np.random.default_rng(seed)
+    ts = (1_600_000_000 // interval + np.arange(n_bars, dtype=np.int64)) * interval
+    data = {}
+    for i in range(n_symbols):
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, n_bars)))
+        spread = np.abs(rng.normal(0, 0.01, n_bars)) * close
+        open_ = np.r_[close[0], close[:-1]]
+        data[f'SYM{i}.NS'] = Candles(ts, open_, np.maximum(open_, close) + spread, np.minimum(open_, close) - spread,
+                                     close, rng.integers(1_000, 1_000_000, n_bars))
+    return data
+
+def chart_payload(c: Candles) -> Dict[str, Any]:
+    quote = {'open': c.open.tolist(), 'high': c.high.tolist(), 'low': c.low.tolist(), 'close': c.close.tolist(),
+             'volume': c.volume.tolist()}
+    return {'chart': {'result': [{'timestamp': c.timestamp.tolist(), 'indicators': {'quote': [quote]}}], 'error': None}}
+
+def synthetic_candidates(data: Dict[str, Candles], seed: int = 0) -> List[Dict[str, Any]]:
+    rng = random.Random(seed)
+    return [{'symbol': s, 'signal': rng.choice(['BUY', 'SELL']), 'price': round(float(c.close[-1]), 2),
+             'confidence': round(rng.random(), 3), 'reason': 'synthetic'} for s, c in data.items()]
+
+def synthetic_executions(n: int, seed: int = 0) -> List[Dict[str, Any]]:
+    rng = random.Random(seed)
+    out = []
+    for i in range(n):
+        price = round(rng.uniform(50, 3000), 2)
+        qty = rng.randint(1, 100)
+        out.append({'client_order_id': f'SYM{i}.NS-{i:08x}', 'order_id': f'MOCK-{i}', 'symbol': f'SYM{i}.NS',
+                    'side': rng.choice(['BUY', 'SELL']), 'filled_qty': qty, 'avg_price': price,
+                    'notional': round(qty * price, 2), 'status': 'FILLED'})
+    return out
+
+def synthetic_trade_history(n: int, n_symbols: int = 50, strategies=('momentum', 'mean_reversion'), days: int = 250,
+                            seed: int = 0) -> Dict[str, Any]:
+    rng = np.random.default_rng(seed)
+    ts = np.sort(1_600_000_000 + rng.integers(0, days * 86400, n))
+    price = np.round(rng.uniform(50, 3000, n), 2)
+    exit_price = np.round(price * np.exp(rng.normal(0, 0.02, n)), 2)
+    qty = rng.integers(1, 100, n)
+    return {'timestamp': ts, 'symbol': np.array([f'SYM{i}.NS' for i in range(n_symbols)], dtype=object)[rng.integers(0, n_symbols, n)],
+            'strategy': np.array(strategies, dtype=object)[rng.integers(0, len(strategies), n)], 'side': ['BUY'] * n,
+            'qty': qty, 'price': price, 'exit_price': exit_price, 'pnl': np.round((exit_price - price) * qty, 2)}
+
+def headlines(n: int, seed: int = 0) -> List[str]:
+    rng = random.Random(seed)
+    return [f"SYM{rng.randrange(500)} shares {rng.choice(_POS + _NEG)} as {rng.choice(['analysts', 'investors', 'traders'])}"
+            f" {rng.choice(['react', 'weigh results', 'do not expect a rebound'])}" for _ in range(n)]
+
+INSTRUMENT_COLUMNS = ['instrument_token', 'exchange_token', 'tradingsymbol', 'name', 'last_price', 'expiry', 'strike',
+                      'tick_size', 'lot_size', 'instrument_type', 'segment', 'exchange']
+
+def instrument_records(symbols: List[str], n_derivatives: int = 0, seed: int = 0) -> List[Dict[str, Any]]:
+    rng = random.Random(seed)
+    rows = []
+    for i, s in enumerate(symbols):
+        ts = s.rsplit('.', 1)[0]
+        rows.append({'instrument_token': 256265 + 256 * i, 'exchange_token': 1000 + i, 'tradingsymbol': ts, 'name': ts,
+                     'last_price': 0.0, 'expiry': '', 'strike': 0.0, 'tick_size': rng.choice([0.05, 0.05, 0.1, 0.01]),
+                     'lot_size': 1, 'instrument_type': 'EQ', 'segment': 'NSE', 'exchange': 'NSE'})
+    for j in range(n_derivatives):
+        ts = symbols[j % len(symbols)].rsplit('.', 1)[0] if symbols else 'SYM'
+        block = j // max(1, len(symbols))  # one contract per underlying per block keeps tradingsymbols unique
+        itype = ('FUT', 'CE', 'PE')[block % 3]
+        strike = 0.0 if itype == 'FUT' else 50.0 * (block + 1)
+        rows.append({'instrument_token': 10_000_000 + j, 'exchange_token': 50_000 + j,
+                     'tradingsymbol': f'{ts}26JAN{int(strike) if strike else block}{itype}', 'name': ts, 'last_price': 0.0,
+                     'expiry': '2026-01-29', 'strike': strike, 'tick_size': 0.05, 'lot_size': rng.choice([25, 50, 75, 250, 500]),
+                     'instrument_type': itype, 'segment': 'NFO-' + ('FUT' if itype == 'FUT' else 'OPT'), 'exchange': 'NFO'})
+    return rows
+
+def write_instrument_csv(path: str, records: List[Dict[str, Any]]) -> str:
+    with open(path, 'w', newline='') as f:
+        w = csv.DictWriter(f, fieldnames=INSTRUMENT_COLUMNS)
+        w.writeheader()
+        w.writerows(records)
+    return path
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True  # headers and body go out as separate writes; avoid the delayed-ACK stall
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, body: bytes, status: int = 200):
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        srv = self.server.owner
+        url = urlparse(self.path)
+        if srv.latency:
+            time.sleep(srv.latency)
+        srv.requests += 1
+        if url.path.startswith('/chart/'):
+            self._send(srv.chart(url.path.rsplit('/', 1)[-1]))
+        elif url.path == '/news/everything':
+            self._send(srv.news(parse_qs(url.query).get('q', [''])[0]))
+        else:
+            self._send(b'{}', 404)
+
+class FakeMarketServer:
+    def __init__(self, n_bars: int = 250, latency: float = 0.0, articles: int = 20):
+        self.n_bars = n_bars
+        self.latency = latency
+        self.articles = articles
+        self.requests = 0
+        self._charts: Dict[str, bytes] = {}
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+        self._httpd.daemon_threads = True
+        self._httpd.owner = self
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        return f'http://127.0.0.1:{self._httpd.server_address[1]}'
+
+    def chart(self, symbol: str) -> bytes:
+        with self._lock:
+            body = self._charts.get(symbol)
+        if body is None:
+            c = synthetic_universe(1, self.n_bars, seed=zlib.crc32(symbol.encode()))['SYM0.NS']
+            body = json.dumps(chart_payload(c)).encode()
+            with self._lock:
+                self._charts[symbol] = body
+        return body
+
+    def news(self, query: str) -> bytes:
+        hs = headlines(self.articles, seed=zlib.crc32(query.encode()))
+        arts = [{'source': {'name': 'Synthetic Wire'}, 'title': h, 'url': f'https://example.invalid/{query}/{i}',
+                 'description': h} for i, h in enumerate(hs)]
+        return json.dumps({'status': 'ok', 'totalResults': len(arts), 'articles': arts}).encode()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+        return False
+
+    @contextmanager
+    def patched(self):
+        """Point market_data_fetcher and ai_strategy_agent at this server for the duration of the block.
+        The per-host rate limiter is disabled and the sentiment caches are cleared."""
+        from scripts import market_data_fetcher as mdf, ai_strategy_agent as asa
+        saved = (mdf.YAHOO_CHART_URL, mdf._rate_limiter, asa.NEWSAPI_URL, os.environ.get('NEWSAPI_KEY'))
+        mdf.YAHOO_CHART_URL = self.url + '/chart'
+        mdf._rate_limiter = mdf._HostRateLimiter(0)
+        asa.NEWSAPI_URL = self.url + '/news/everything'
+        os.environ['NEWSAPI_KEY'] = 'bench'
+        asa.ARTICLE_CACHE.clear()
+        asa.AGGREGATE_CACHE.clear()
+        try:
+            yield self
+        finally:
+            mdf.YAHOO_CHART_URL, mdf._rate_limiter, asa.NEWSAPI_URL = saved[:3]
+            if saved[3] is None:
+                os.environ.pop('NEWSAPI_KEY', None)
+            else:
+                os.environ['NEWSAPI_KEY'] = saved[3]
@@ -0,0 +1,356 @@
+"""run_benchmarks.py
+
+Micro and end-to-end benchmarks for the fetch, signal, risk, execute, log and sentiment hot paths, run
+against synthetic OHLC and a local fake Yahoo/NewsAPI server (see fixtures.py) with the mock broker.
+Run from the repo root:
+    python -m benchmarks.run_benchmarks [--quick] [--group micro|e2e] [--filter signal]
+                                        [--out results.json] [--baseline base.json] [--tolerance 0.15]
+                                        [--fail-on-regression] [--list]
+
+Every benchmark times one call over a batch of `ops` items (symbols, candidates, orders, headlines...),
+`--repeat` times after one warm-up call, and reports median/min/max/stdev seconds and median ops/s.
+--out writes {meta, results} as JSON. --baseline compares against such a file by median seconds: a ratio
+above 1 + tolerance is a regression (exit status 1 with --fail-on-regression). Benchmarks whose target
+cannot run here (e.g. missing optional deps) are reported as skipped with the reason.
+"""
+from typing import Dict, Any, Callable, List, Tuple
+import argparse, csv, json, os, platform, statistics, subprocess, sys, tempfile, time
+from benchmarks.fixtures import (FakeMarketServer, synthetic_universe, chart_payload, synthetic_candidates,
+                                 synthetic_executions, headlines, instrument_records,
+                                 synthetic_trade_history)
+
+SIZES = {
+    'quick': {'symbols': 50, 'bars': 250, 'candidates': 100, 'orders': 100, 'headlines': 2000, 'fetch': 10, 'repeat': 3},
+    'default': {'symbols': 500, 'bars': 250, 'candidates': 500, 'orders': 500, 'headlines': 20000, 'fetch': 50, 'repeat': 5},
+}
+
+class Skip(Exception):
+    pass
+
+REGISTRY: List[Tuple[str, str, Callable]] = []
+
+def benchmark(name: str, group: str = 'micro'):
+    """Register `f(ctx) -> (fn, ops)`; `fn()` is the timed call and processes `ops` items."""
+    def _dec(f):
+        REGISTRY.append((name, group, f))
+        return f
+    return _dec
+
+class Context:
+    def __init__(self, sizes: Dict[str, int], server: FakeMarketServer, tmpdir: str, broker_latency: float):
+        self.sizes = sizes
+        self.server = server
+        self.tmpdir = tmpdir
+        self.broker_latency = broker_latency
+        self._data = None
+
+    @property
+    def data(self):
+        if self._data is None:
+            self._data = synthetic_universe(self.sizes['symbols'], self.sizes['bars'])
+        return self._data
+
+    def fetch_symbols(self) -> List[str]:
+        return [f'FAKE{i}.NS' for i in range(self.sizes['fetch'])]
+
+# --- fetch ---
+@benchmark('fetch.parse_chart')
+def _parse_chart(ctx):
+    from scripts.market_data_fetcher import _parse_chart
+    payloads = [chart_payload(c) for c in ctx.data.values()]
+    return (lambda: [_parse_chart(p) for p in payloads]), len(payloads)
+
+@benchmark('fetch.ohlc_http')
+def _fetch_serial(ctx):
+    from scripts.market_data_fetcher import fetch_ohlc
+    syms = ctx.fetch_symbols()
+    return (lambda: [fetch_ohlc(s, columnar=True) for s in syms]), len(syms)
+
+@benchmark('fetch.ohlc_many')
+def _fetch_many(ctx):
+    from scripts.market_data_fetcher import fetch_ohlc_many
+    syms = ctx.fetch_symbols()
+    return (lambda: fetch_ohlc_many(syms, columnar=True)), len(syms)
+
+@benchmark('fetch.ohlc_cached_warm')
+def _fetch_cached(ctx):
+    from scripts.candle_store import CandleStore
+    from scripts.market_data_fetcher import fetch_ohlc_cached
+    store = CandleStore(os.path.join(ctx.tmpdir, 'ohlc.sqlite'))
+    syms = ctx.fetch_symbols()
+    for s in syms:
+        fetch_ohlc_cached(s, store=store, columnar=True)
+    return (lambda: [fetch_ohlc_cached(s, store=store, columnar=True) for s in syms]), len(syms)
+
+# --- signals ---
+@benchmark('signal.loop')
+def _signal_loop(ctx):
+    from scripts.signal_generator import generate_signals
+    return (lambda: generate_signals(ctx.data)), len(ctx.data)
+
+@benchmark('signal.panel')
+def _signal_panel(ctx):
+    from scripts.signal_generator import generate_signals_panel
+    return (lambda: generate_signals_panel(ctx.data)), len(ctx.data)
+
+@benchmark('timeframes.load')
+def _timeframes_load(ctx):
+    from scripts.timeframes import TimeframeBook
+    data = synthetic_universe(ctx.sizes['symbols'], 8 * ctx.sizes['bars'], interval=60)
+    return (lambda: TimeframeBook('1m', ('5m', '15m', '1h', '1d')).load(data)), len(data)
+
+@benchmark('signal.timeframes')
+def _signal_timeframes(ctx):
+    from scripts.signal_generator import generate_signals_timeframes
+    from scripts.timeframes import TimeframeBook
+    book = TimeframeBook('1m', ('5m', '15m', '1h')).load(synthetic_universe(ctx.sizes['symbols'], 8 * ctx.sizes['bars'], interval=60))
+    return (lambda: generate_signals_timeframes(book)), len(book)
+
+# --- risk ---
+@benchmark('risk.validate_trades')
+def _risk(ctx):
+    from scripts.risk_manager import validate_trades
+    cands = synthetic_candidates(ctx.data)[:ctx.sizes['candidates']]
+    return (lambda: validate_trades(cands, account_equity=1e7)), len(cands)
+
+@benchmark('risk.portfolio')
+def _portfolio_risk(ctx):
+    from scripts.portfolio_risk import PortfolioRiskEngine
+    cands = synthetic_candidates(ctx.data)[:ctx.sizes['candidates']]
+    engine = PortfolioRiskEngine(account_equity=1e7).update_returns(ctx.data)
+
+    def run():
+        engine.release(engine.validate_trades(cands))
+    return run, len(cands)
+
+@benchmark('symbols.load')
+def _symbols_load(ctx):
+    from scripts.symbol_master import SymbolMaster
+    recs = instrument_records(list(ctx.data), n_derivatives=20 * len(ctx.data))
+    return (lambda: SymbolMaster(lambda: recs)), len(recs)
+
+@benchmark('risk.validate_trades_lots')
+def _risk_lots(ctx):
+    from scripts.risk_manager import validate_trades
+    from scripts.symbol_master import SymbolMaster
+    master = SymbolMaster(lambda: instrument_records(list(ctx.data)))
+    cands = synthetic_candidates(ctx.data)[:ctx.sizes['candidates']]
+    return (lambda: validate_trades(cands, account_equity=1e7, instruments=master)), len(cands)
+
+# --- execution / logging ---
+@benchmark('execute.router')
+def _execute(ctx):
+    from scripts.order_router import OrderRouter, MockBroker
+    from scripts.risk_manager import validate_trades
+    orders = validate_trades(synthetic_candidates(ctx.data)[:ctx.sizes['orders']], account_equity=1e7)
+    # a fresh router per call: routers remember client_order_ids and would short-circuit a resubmission
+    return (lambda: OrderRouter(MockBroker(latency=ctx.broker_latency), rate_limit=0).submit_batch(orders)), len(orders)
+
+@benchmark('history.csv_metrics')
+def _history_csv(ctx):
+    from scripts.backtester import TRADE_HISTORY_COLUMNS
+    from scripts.metrics_calculator import compute_strategy_metrics
+    cols = synthetic_trade_history(100 * ctx.sizes['orders'])
+    path = os.path.join(ctx.tmpdir, 'bench_history.csv')
+    with open(path, 'w', newline='') as f:
+        w = csv.writer(f)
+        w.writerow(TRADE_HISTORY_COLUMNS[:8])
+        w.writerows(zip(*(cols[c] for c in TRADE_HISTORY_COLUMNS[:8])))
+    return (lambda: compute_strategy_metrics(path)), len(cols['timestamp'])
+
+@benchmark('history.store_metrics')
+def _history_store(ctx):
+    from scripts.trade_store import TradeStore
+    cols = synthetic_trade_history(100 * ctx.sizes['orders'])
+    store = TradeStore(os.path.join(ctx.tmpdir, 'bench_store'))
+    store.append(cols)
+    return (lambda: store.strategy_metrics()), len(cols['timestamp'])
+
+@benchmark('history.store_pushdown')
+def _history_pushdown(ctx):
+    from scripts.trade_store import TradeStore
+    store = TradeStore(os.path.join(ctx.tmpdir, 'bench_store'))
+    if not os.listdir(store.root):
+        store.append(synthetic_trade_history(100 * ctx.sizes['orders']))
+    # one symbol over one month: most partitions and parts are never opened
+    return (lambda: store.aggregate('symbol', symbols=['SYM3.NS'], start=1_600_000_000, end=1_600_000_000 + 30 * 86400)), 1
+
+@benchmark('log.csv')
+def _log(ctx):
+    from scripts.trade_logger import log_trades
+    rows = synthetic_executions(ctx.sizes['orders'])
+    path = os.path.join(ctx.tmpdir, 'trades.csv')
+    return (lambda: log_trades(rows, path, flush=True)), len(rows)
+
+# --- sentiment ---
+@benchmark('sentiment.keyword')
+def _keyword(ctx):
+    from scripts.ai_strategy_agent import KEYWORD_SCORER
+    hs = headlines(ctx.sizes['headlines'])
+    return (lambda: KEYWORD_SCORER.score_many(hs)), len(hs)
+
+@benchmark('sentiment.news')
+def _news(ctx):
+    from scripts.ai_strategy_agent import analyze_sentiment
+    syms = ctx.fetch_symbols()
+    return (lambda: [analyze_sentiment(s, use_cache=False) for s in syms]), len(syms)
+
+# --- simulation ---
+@benchmark('replay.market')
+def _replay(ctx):
+    from scripts.market_replay import MarketReplay, LogNormalLatency, ImpactSlippage
+    data = dict(list(ctx.data.items())[:max(1, ctx.sizes['symbols'] // 10)])
+    sim = MarketReplay(data, params={'sma_short': 5, 'sma_long': 20}, order_latency=LogNormalLatency(60.0, 0.5),
+                       slippage=ImpactSlippage(), seed=0)
+    return sim.run, sum(len(c) for c in data.values())
+
+# --- end to end ---
+@benchmark('e2e.scheduler_cycle', group='e2e')
+def _scheduler(ctx):
+    from scripts.order_router import OrderRouter, MockBroker
+    from scripts.trading_scheduler import TradingScheduler
+    syms = ctx.fetch_symbols()
+    sched = TradingScheduler(batch_size=max(1, len(syms) // 4), log_path=os.path.join(ctx.tmpdir, 'cycle_trades.csv'),
+                             metrics_path=os.path.join(ctx.tmpdir, 'trade_history.csv'),
+                             execute_fn=lambda orders: OrderRouter(MockBroker(latency=ctx.broker_latency), rate_limit=0).submit_batch(orders))
+    return (lambda: sched.run_cycle(syms)), len(syms)
+
+def _workflow_executor(ctx):
+    import json
+    from scripts.order_router import OrderRouter, MockBroker
+    from scripts.workflow_executor import WorkflowExecutor
+    with open(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'workflows', 'stock_trader_workflow.json')) as f:
+        wf = json.load(f)
+    router = OrderRouter(MockBroker(latency=ctx.broker_latency), rate_limit=0)
+    ex = WorkflowExecutor(wf, tools={'execute_trades': lambda validated_orders, mock=True: router.submit_batch(validated_orders)})
+    inputs = {'symbols': ctx.fetch_symbols(), 'trade_history': os.path.join(ctx.tmpdir, 'trade_history.csv'),
+              'trade_log': os.path.join(ctx.tmpdir, 'workflow_trades.csv')}
+    return ex, inputs
+
+@benchmark('e2e.workflow', group='e2e')
+def _workflow(ctx):
+    ex, inputs = _workflow_executor(ctx)
+    return (lambda: ex.run(inputs)), len(inputs['symbols'])
+
+@benchmark('e2e.workflow_rerun', group='e2e')
+def _workflow_rerun(ctx):
+    """Partial re-execution: only the capital changes, so risk/execute/log rerun on memoized inputs."""
+    ex, inputs = _workflow_executor(ctx)
+    ex.run(inputs)
+    capital = [100000.0]
+
+    def step():
+        capital[0] += 1.0
+        return ex.rerun({'capital': capital[0]})
+    return step, len(inputs['symbols'])
+
+@benchmark('e2e.trader_manager', group='e2e')
+def _trader_manager(ctx):
+    """The serial per-symbol manager agent over the same fakes, as the baseline for e2e.scheduler_cycle."""
+    from scripts.order_router import OrderRouter, MockBroker
+    from scripts.trader_manager_agent import trader_manager
+    syms = ctx.fetch_symbols()
+    router = OrderRouter(MockBroker(latency=ctx.broker_latency), rate_limit=0)
+    kwargs = {'metrics_path': os.path.join(ctx.tmpdir, 'trade_history.csv'),
+              'log_path': os.path.join(ctx.tmpdir, 'manager_trades.csv'), 'use_transformer': False,
+              'router': router, 'verbose': False}
+    return (lambda: [trader_manager(s, **kwargs) for s in syms]), len(syms)
+
+# --- harness ---
+def measure(fn: Callable, ops: int, repeat: int) -> Dict[str, Any]:
+    fn()  # warm-up: imports, caches, connection pools
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    med = statistics.median(times)
+    return {'ops': ops, 'repeat': repeat, 'median_s': med, 'min_s': min(times), 'max_s': max(times),
+            'stdev_s': statistics.stdev(times) if len(times) > 1 else 0.0, 'ops_per_s': ops / med if med else None}
+
+def _meta(sizes: Dict[str, int], args) -> Dict[str, Any]:
+    import numpy as np, pandas as pd
+    try:
+        rev = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, timeout=5).stdout.strip()
+    except Exception:
+        rev = None
+    return {'ts': time.time(), 'git_rev': rev or None, 'python': platform.python_version(), 'platform': platform.platform(),
+            'cpu_count': os.cpu_count(), 'numpy': np.__version__, 'pandas': pd.__version__, 'sizes': sizes,
+            'broker_latency': args.broker_latency, 'server_latency': args.server_latency}
+
+def compare(results: Dict[str, Dict[str, Any]], baseline: Dict[str, Dict[str, Any]], tolerance: float) -> Dict[str, Dict[str, Any]]:
+    """Median-time ratio per benchmark present (and not skipped) in both runs."""
+    out = {}
+    for name, r in results.items():
+        b = baseline.get(name)
+        if not b or 'median_s' not in r or 'median_s' not in b:
+            continue
+        if b.get('ops') != r.get('ops'):
+            out[name] = {'status': 'incomparable', 'reason': f"ops {b.get('ops')} -> {r.get('ops')}"}
+            continue
+        ratio = r['median_s'] / b['median_s'] if b['median_s'] else float('inf')
+        status = 'regression' if ratio > 1 + tolerance else ('improvement' if ratio < 1 - tolerance else 'same')
+        out[name] = {'status': status, 'ratio': ratio, 'baseline_median_s': b['median_s'], 'median_s': r['median_s']}
+    return out
+
+def main(argv=None):
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--quick', action='store_true')
+    ap.add_argument('--group', choices=['micro', 'e2e'])
+    ap.add_argument('--filter', default=None, help='substring of benchmark names to run')
+    ap.add_argument('--repeat', type=int, default=None)
+    ap.add_argument('--broker-latency', type=float, default=0.0, help='seconds per mock broker submit')
+    ap.add_argument('--server-latency', type=float, default=0.0, help='seconds per fake HTTP response')
+    ap.add_argument('--out', default=None)
+    ap.add_argument('--baseline', default=None)
+    ap.add_argument('--tolerance', type=float, default=0.15)
+    ap.add_argument('--fail-on-regression', action='store_true')
+    ap.add_argument('--list', action='store_true')
+    args = ap.parse_args(argv)
+    selected = [(n, g, f) for n, g, f in REGISTRY
+                if (not args.group or g == args.group) and (not args.filter or args.filter in n)]
+    if args.list:
+        for n, g, _ in selected:
+            print(f'{g:>6}  {n}')
+        return 0
+    sizes = dict(SIZES['quick' if args.quick else 'default'])
+    if args.repeat:
+        sizes['repeat'] = args.repeat
+    results: Dict[str, Dict[str, Any]] = {}
+    print(f"{'benchmark':<26} {'ops':>6} {'median ms':>10} {'min ms':>10} {'ops/s':>12}")
+    with tempfile.TemporaryDirectory() as tmp, FakeMarketServer(n_bars=sizes['bars'], latency=args.server_latency) as server, server.patched():
+        ctx = Context(sizes, server, tmp, args.broker_latency)
+        for name, group, factory in selected:
+            try:
+                fn, ops = factory(ctx)
+                r = measure(fn, ops, sizes['repeat'])
+            except Skip as e:
+                results[name] = {'group': group, 'skipped': str(e)}
+                print(f'{name:<26} skipped: {e}')
+                continue
+            results[name] = {'group': group, **r}
+            print(f"{name:<26} {ops:>6} {1000 * r['median_s']:>10.3f} {1000 * r['min_s']:>10.3f} {r['ops_per_s']:>12.0f}")
+    report = {'meta': _meta(sizes, args), 'results': results}
+    status = 0
+    if args.baseline:
+        with open(args.baseline) as f:
+            base = json.load(f)
+        cmp = compare(results, base.get('results', {}), args.tolerance)
+        report['comparison'] = {'baseline': args.baseline, 'baseline_rev': base.get('meta', {}).get('git_rev'),
+                                'tolerance': args.tolerance, 'results': cmp}
+        print(f"\nvs {args.baseline} (rev {report['comparison']['baseline_rev']}, tolerance {args.tolerance:.0%})")
+        for name, c in cmp.items():
+            detail = f"{c['ratio']:.2f}x time" if 'ratio' in c else c['reason']
+            print(f'{name:<26} {c["status"]:<12} {detail}')
+        if args.fail_on_regression and any(c['status'] == 'regression' for c in cmp.values()):
+            status = 1
+    if args.out:
+        if os.path.dirname(args.out):
+            os.makedirs(os.path.dirname(args.out), exist_ok=True)
+        with open(args.out, 'w') as f:
+            json.dump(report, f, indent=1)
+        print(f'\nwrote {args.out}')
+    return status
+
+if __name__ == '__main__':
+    sys.exit(main())
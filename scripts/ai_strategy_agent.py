@@ -6,19 +6,21 @@ AI enhancement layer that combines:
 2) Adaptive strategy selection — chooses the best strategy based on recent performance metrics and sentiment
 
 Functions:
-- analyze_sentiment(symbol, lookback_days=3) -> dict {score: float, summary: str, sources: [...]}
+- analyze_sentiment(symbol, lookback_days=3, use_cache=True) -> dict {score: float, summary: str, sources: [...]}
+- score_headlines(texts) -> dict {scores: [per-article], score: aggregate}
 - select_strategy(strategy_metrics: dict, sentiment_score: float) -> dict {strategy: str, params: dict, reason: str}
+- select_strategies(strategy_metrics, sentiments) -> {symbol: select_strategy result}
 
 This module is AgentX-ready; the `tool` decorator is a noop fallback to maintain compatibility.
 """
 from typing import List, Dict, Any
-import os, requests, datetime, math, statistics
+import os, datetime, math, hashlib
+from scripts.ttl_cache import TTLCache
+from scripts.keyword_sentiment import KeywordScorer
+from scripts.instrumentation import tool
+from scripts.runtime import lazy_import
 
-# noop decorator for AgentX tool compatibility if decorator not available in environment
-def tool(name=None, description=None):
-    def _dec(f):
-        return f
-    return _dec
+requests = lazy_import('requests')
 
 # --- Simple keyword-based sentiment fallback ---
 _POS_WORDS = set(["good","positive","upgrade","beat","beats","growth","buy","bull","bullish","surge","up","rise","strong","outperform",
@@ -27,57 +29,91 @@ _NEG_WORDS = set(["bad","negative","downgrade","miss","missed","fall","weak","se
                   "warning","concern","fraud"])
 _STOPWORDS = set(["the","is","in","at","of","and","a","to","for","on","with","by","from"])
 
-NEWSAPI_URL = "https://newsapi.org/v2/everything"  # requires key
+NEWSAPI_URL = os.getenv('NEWSAPI_URL', "https://newsapi.org/v2/everything")  # requires key; override to point at a local stub
+
+# Per-article scores are cached by URL (or a hash of title+description) so articles that recur across
+# scans and related tickers are scored once; whole (symbol, lookback) results are cached for a short TTL
+# so hot symbols make no network call at all.
+ARTICLE_CACHE = TTLCache(max_entries=int(os.getenv('SENTIMENT_ARTICLE_CACHE', '20000')), ttl=float(os.getenv('SENTIMENT_ARTICLE_TTL', '86400')))
+AGGREGATE_CACHE = TTLCache(max_entries=int(os.getenv('SENTIMENT_AGG_CACHE', '2000')), ttl=float(os.getenv('SENTIMENT_AGG_TTL', '900')))
+
+def article_key(art: Dict[str, Any]) -> str:
+    if art.get('url'):
+        return art['url']
+    text = (art.get('title') or '') + '\n' + (art.get('description') or '')
+    return 'sha1:' + hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+# compiled once; scores every uncached article of a call in one vectorized pass (see keyword_sentiment.py)
+KEYWORD_SCORER = KeywordScorer.from_sets(_POS_WORDS, _NEG_WORDS, _STOPWORDS)
+
+def _article_text(art: Dict[str, Any]) -> str:
+    return ' '.join(filter(None, [art.get('title',''), art.get('description','')]))
+
+def _fetch_articles(query: str, from_dt: str, api_key: str) -> List[Dict[str, Any]]:
+    results = []
+    params = {'q': query, 'from': from_dt, 'language': 'en', 'sortBy': 'relevancy', 'apiKey': api_key, 'pageSize': 20}
+    try:
+        r = requests.get(NEWSAPI_URL, params=params, timeout=8)
+        if r.status_code == 200:
+            payload = r.json()
+            for art in payload.get('articles', []):
+                results.append({'source': art.get('source', {}).get('name'), 'title': art.get('title'), 'url': art.get('url'), 'description': art.get('description')})
+    except Exception as e:
+        # fall back to empty results and keyword method
+        results = []
+    return results
+
+def _copy_result(res: Dict[str, Any]) -> Dict[str, Any]:
+    # cached results are shared: callers get their own dict and source list
+    return {**res, 'sources': [dict(src) for src in res['sources']]}
 
 @tool(name='AI Strategy Agent', description='Combine news sentiment and strategy performance to pick a strategy')
-def analyze_sentiment(symbol: str, lookback_days: int = 3) -> Dict[str, Any]:
+def analyze_sentiment(symbol: str, lookback_days: int = 3, use_cache: bool = True) -> Dict[str, Any]:
     """Fetch news (if API key) and compute a sentiment score between -1 and +1.
     Returns: {score: float, summary: str, sources: [ {source, title, url}]}
+    With use_cache, a recent result for (symbol, lookback_days) is returned without a network call and
+    only articles not seen before are scored.
     """
     api_key = os.getenv('NEWSAPI_KEY')
+    query = symbol.replace('.NS','') if '.NS' in symbol else symbol
+    agg_key = (query, lookback_days)
+    if use_cache and api_key:
+        cached = AGGREGATE_CACHE.get(agg_key)
+        if cached is not None:
+            return _copy_result(cached)
     now = datetime.datetime.utcnow()
     from_dt = (now - datetime.timedelta(days=lookback_days)).strftime('%Y-%m-%d')
-    query = symbol.replace('.NS','') if '.NS' in symbol else symbol
-    results = []
-    if api_key:
-        params = {'q': query, 'from': from_dt, 'language': 'en', 'sortBy': 'relevancy', 'apiKey': api_key, 'pageSize': 20}
-        try:
-            r = requests.get(NEWSAPI_URL, params=params, timeout=8)
-            if r.status_code == 200:
-                payload = r.json()
-                for art in payload.get('articles', []):
-                    results.append({'source': art.get('source', {}).get('name'), 'title': art.get('title'), 'url': art.get('url'), 'description': art.get('description')})
-        except Exception as e:
-            # fall back to empty results and keyword method
-            results = []
+    results = _fetch_articles(query, from_dt, api_key) if api_key else []
     # fallback mock / keyword scraping if no results
     if not results:
         # basic heuristic: try scraping Google News RSS (best-effort); many sites block scraping.
         # We instead return an empty sources list and compute a neutral score
         return {'score': 0.0, 'summary': 'No live news fetched (no NEWSAPI_KEY); fallback neutral', 'sources': []}
-    # compute sentiment via simple keyword scoring on titles+description
-    scores = []
+    # compute sentiment via keyword scoring on titles+description, de-duplicated by article
+    unique = {}
     for art in results:
-        text = ' '.join(filter(None, [art.get('title',''), art.get('description','')]))
-        tokens = [t.strip('.,()[]').lower() for t in text.split() if t.lower() not in _STOPWORDS]
-        s = 0
-        for t in tokens:
-            if t in _POS_WORDS:
-                s += 1
-            if t in _NEG_WORDS:
-                s -= 1
-        # normalize by length
-        norm = s / max(1, math.sqrt(len(tokens)))
-        scores.append(norm)
-    # aggregate
-    if scores:
-        avg = statistics.mean(scores)
-        # clamp to -1..1 roughly via tanh
-        score = math.tanh(avg)
-    else:
-        score = 0.0
-    summary = f"Analyzed {len(results)} articles; sentiment {score:.3f}"
-    return {'score': score, 'summary': summary, 'sources': results[:8]}
+        unique.setdefault(article_key(art), art)
+    cached = {k: ARTICLE_CACHE.get(k) for k in unique} if use_cache else {}
+    todo = [k for k in unique if cached.get(k) is None]
+    if todo:
+        for k, norm in zip(todo, KEYWORD_SCORER.score_many([_article_text(unique[k]) for k in todo]).tolist()):
+            if use_cache:
+                ARTICLE_CACHE.set(k, norm)
+            cached[k] = norm
+    scores = [cached[k] for k in unique]
+    # aggregate (tanh of the mean, roughly -1..1)
+    score = KEYWORD_SCORER.aggregate(scores)
+    summary = f"Analyzed {len(scores)} articles; sentiment {score:.3f}"
+    out = {'score': score, 'summary': summary, 'sources': results[:8]}
+    if use_cache:
+        AGGREGATE_CACHE.set(agg_key, _copy_result(out))
+    return out
+
+@tool(name='Headline Sentiment Scorer', description='Bulk keyword sentiment for many headlines in one pass')
+def score_headlines(texts: List[str]) -> Dict[str, Any]:
+    """Score any number of headlines at once. Returns {scores: [per-article], score: aggregate in -1..1}."""
+    scores = KEYWORD_SCORER.score_many(texts)
+    return {'scores': scores.tolist(), 'score': KEYWORD_SCORER.aggregate(scores)}
 
 @tool(name='AI Strategy Selector', description='Select strategy based on performance metrics and sentiment')
 def select_strategy(strategy_metrics: Dict[str, Dict[str, Any]], sentiment_score: float = 0.0) -> Dict[str, Any]:
@@ -138,3 +174,8 @@ def select_strategy(strategy_metrics: Dict[str, Dict[str, Any]], sentiment_score
         params['risk_per_trade_pct'] = chosen_metrics.get('risk_per_trade_pct', 0.01)
     reason = f"Chosen {chosen_name} (perf_score={chosen_score:.3f}) with sentiment tilt {sentiment_score:.2f}"
     return {'strategy': chosen_name, 'params': params, 'reason': reason}
+
+def select_strategies(strategy_metrics: Dict[str, Dict[str, Any]], sentiments: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """select_strategy for every symbol; `sentiments` maps symbol -> analyze_sentiment result (or a bare score)."""
+    return {sym: select_strategy(strategy_metrics, sentiment_score=s['score'] if isinstance(s, dict) else float(s or 0.0))
+            for sym, s in sentiments.items()}
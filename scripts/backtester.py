@@ -0,0 +1,136 @@
+
+"""backtester.py
+
+Vectorized backtest that replays OHLC history through the live pipeline stages:
+signal rules (signal_generator) -> sizing (risk_manager.validate_trades) -> mock fills (trade_executor.simulate_fill).
+Functions:
+- load_history(store, symbols, interval='1d', start_ts=None, end_ts=None) -> {symbol: Candles} from a CandleStore
+- signal_arrays(close, params=None) -> (buy, sell) boolean arrays, one entry per bar
+- backtest(data, params=None, strategy='momentum', account_equity=None, seed=0) -> list of closed trades
+- write_trade_history(trades, csv_path='logs/trade_history.csv', append=False) -> csv_path
+
+Indicators and entry/exit signals are computed for the whole series at once; Python only runs per trade,
+never per bar. The book is long-only: BUY opens a position when flat, SELL or a hit stop-loss closes it.
+Positions still open at the end are closed at the last close (exit_reason='end').
+Trades are written in the trade_history.csv schema that metrics_calculator reads.
+"""
+from typing import Dict, Any, List, Union, Iterable
+import csv, os, random, datetime
+import numpy as np
+from scripts.candles import Candles, as_candles
+from scripts.signal_generator import _read_params, panel_indicators
+from scripts.risk_manager import validate_trades
+from scripts.trade_executor import simulate_fill
+from scripts.metrics_calculator import trades_logged
+
+TRADE_HISTORY_COLUMNS = ['timestamp', 'symbol', 'strategy', 'side', 'qty', 'price', 'exit_price', 'pnl',
+                         'entry_timestamp', 'exit_reason']
+
+def load_history(store, symbols: Iterable[str], interval: str = '1d', start_ts: int = None, end_ts: int = None) -> Dict[str, Candles]:
+    return {s: store.load(s, interval, start_ts=start_ts, end_ts=end_ts, columnar=True) for s in symbols}
+
+def signal_arrays(close: np.ndarray, params: Dict[str, Any] = None):
+    """BUY/SELL flags for every bar, i.e. what generate_signals would return if called at that bar."""
+    sma_short, sma_long, rsi_period, rsi_upper, rsi_lower = _read_params(params)
+    short, long_, rsi = (a[:, 0] for a in panel_indicators(np.asarray(close, dtype=np.float64)[:, None],
+                                                            sma_short, sma_long, rsi_period))
+    n = len(close)
+    bullish = np.zeros(n, dtype=bool)
+    bearish = np.zeros(n, dtype=bool)
+    bullish[1:] = (short[:-1] <= long_[:-1]) & (short[1:] > long_[1:])
+    bearish[1:] = (short[:-1] >= long_[:-1]) & (short[1:] < long_[1:])
+    buy = bullish & (rsi_lower <= rsi) & (rsi <= rsi_upper)
+    sell = bearish & ~buy
+    warmup = max(sma_long, sma_short)  # generate_signals needs max(...) + 1 bars
+    buy[:warmup] = False
+    sell[:warmup] = False
+    return buy, sell
+
+def _iso(ts) -> str:
+    return datetime.datetime.utcfromtimestamp(int(ts)).isoformat()
+
+def _backtest_symbol(symbol: str, candles: Candles, params: Dict[str, Any], strategy: str,
+                     account_equity: float, rng: random.Random) -> List[Dict[str, Any]]:
+    candles = candles.sorted()
+    close, low, opn, ts = candles.close, candles.low, candles.open, candles.timestamp
+    buy, sell = signal_arrays(close, params)
+    buy_idx, sell_idx = np.flatnonzero(buy), np.flatnonzero(sell)
+    sma_short, sma_long = _read_params(params)[:2]
+    n = len(close)
+    trades = []
+    t = -1
+    while True:
+        k = np.searchsorted(buy_idx, t, side='right')
+        if k >= len(buy_idx):
+            break
+        entry = int(buy_idx[k])
+        cand = {'symbol': symbol, 'signal': 'BUY', 'price': float(close[entry]), 'confidence': 0.7,
+                'reason': f'sma{(sma_short)}/{(sma_long)} crossover + rsi'}
+        orders = validate_trades([cand], account_equity=account_equity, params=params)
+        if not orders:
+            t = entry
+            continue
+        order = orders[0]
+        qty, entry_px = simulate_fill(order, rng)
+        stop = order['stop_loss']
+        k = np.searchsorted(sell_idx, entry, side='right')
+        exit_i, reason = (int(sell_idx[k]), 'signal') if k < len(sell_idx) else (n - 1, 'end')
+        hits = np.flatnonzero(low[entry + 1:exit_i + 1] <= stop)
+        if len(hits):
+            exit_i, reason = entry + 1 + int(hits[0]), 'stop'
+            exit_ref = min(stop, float(opn[exit_i]))  # gap through the stop fills at the open
+        else:
+            exit_ref = float(close[exit_i])
+        _, exit_px = simulate_fill({'qty': qty, 'price': exit_ref}, rng)
+        trades.append({'timestamp': _iso(ts[exit_i]), 'symbol': symbol, 'strategy': strategy, 'side': 'BUY',
+                       'qty': qty, 'price': entry_px, 'exit_price': exit_px, 'pnl': round((exit_px - entry_px) * qty, 2),
+                       'entry_timestamp': _iso(ts[entry]), 'exit_reason': reason})
+        if reason == 'end' or exit_i >= n - 1:
+            break
+        t = exit_i
+    return trades
+
+def backtest(data: Dict[str, Union[List[Dict[str, Any]], Candles]], params: Dict[str, Any] = None, strategy: str = 'momentum',
+             account_equity: float = None, seed: int = 0) -> List[Dict[str, Any]]:
+    """Replay every symbol's history; `params` carries both signal (sma_*/rsi_*) and risk keys.
+    Returns closed trades sorted by exit time. The same seed gives the same fills."""
+    params = params or {}
+    rng = random.Random(seed)
+    trades = []
+    for symbol, candles in data.items():
+        if candles is None or len(candles) < 2:
+            continue
+        trades.extend(_backtest_symbol(symbol, as_candles(candles), params, strategy, account_equity, rng))
+    trades.sort(key=lambda tr: tr['timestamp'])
+    return trades
+
+def write_trade_history(trades: List[Dict[str, Any]], csv_path: str = 'logs/trade_history.csv', append: bool = False) -> str:
+    if os.path.dirname(csv_path):
+        os.makedirs(os.path.dirname(csv_path), exist_ok=True)
+    write_header = not append or not os.path.exists(csv_path)
+    with open(csv_path, 'a' if append else 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=TRADE_HISTORY_COLUMNS, extrasaction='ignore')
+        if write_header:
+            writer.writeheader()
+        f.flush()
+        start = f.tell()
+        writer.writerows(trades)
+        f.flush()
+        end = f.tell()
+    trades_logged(csv_path, trades, start, end)  # open metrics stores fold the new rows in without re-reading
+    return csv_path
+
+if __name__ == '__main__':
+    import time
+    rng = np.random.default_rng(0)
+    n_symbols, n_bars = 200, 10000
+    ts = np.arange(n_bars, dtype=np.int64) * 60 + 1_700_000_000
+    data = {}
+    for i in range(n_symbols):
+        close = 1000 * np.exp(np.cumsum(rng.normal(0, 0.002, n_bars)))
+        data[f'SYM{i}.NS'] = Candles(ts, close, close * 1.001, close * 0.999, close)
+    t0 = time.perf_counter()
+    trades = backtest(data, {'sma_short': 10, 'sma_long': 30})
+    dt = time.perf_counter() - t0
+    print(f"{n_symbols * n_bars} bars, {len(trades)} trades in {dt:.2f}s -> {n_symbols * n_bars / dt * 60 / 1e6:.1f}M bars/min")
+    print(write_trade_history(trades, 'logs/backtest_trade_history.csv'))
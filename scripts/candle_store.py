@@ -0,0 +1,139 @@
+
+"""candle_store.py
+
+Persistent on-disk OHLC candle store backed by SQLite.
+Classes:
+- CandleStore(path='cache/ohlc.sqlite') -> local candle store keyed by (symbol, interval)
+
+Candles are stored one row per (symbol, interval, timestamp) so re-fetched bars overwrite the old
+ones (the last bar of a running session keeps changing). A small meta table remembers how far back
+each series is covered and when it was last refreshed, which lets the fetcher request only the
+missing tail. Intraday bars older than the TTL are evicted.
+"""
+from typing import List, Dict, Any, Optional, Tuple, Union
+import os, sqlite3, threading, time
+from scripts.candles import Candles, MISSING_VOLUME
+
+DEFAULT_CACHE_PATH = os.getenv('OHLC_CACHE_PATH', 'cache/ohlc.sqlite')
+INTRADAY_TTL = float(os.getenv('OHLC_INTRADAY_TTL_DAYS', '60')) * 86400  # seconds
+INTRADAY_INTERVALS = {'1m', '2m', '5m', '15m', '30m', '60m', '90m', '1h'}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS candles (
+    symbol TEXT NOT NULL,
+    interval TEXT NOT NULL,
+    timestamp INTEGER NOT NULL,
+    open REAL, high REAL, low REAL, close REAL, volume INTEGER,
+    PRIMARY KEY (symbol, interval, timestamp)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS series_meta (
+    symbol TEXT NOT NULL,
+    interval TEXT NOT NULL,
+    covered_from INTEGER,
+    fetched_at REAL,
+    PRIMARY KEY (symbol, interval)
+);
+"""
+
+class CandleStore:
+    """Thread-safe SQLite candle store; one connection guarded by a lock."""
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, intraday_ttl: float = INTRADAY_TTL):
+        self.path = path
+        self.intraday_ttl = intraday_ttl
+        if path != ':memory:' and os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+        self.evict()
+
+    def load(self, symbol: str, interval: str, start_ts: int = None, end_ts: int = None,
+             columnar: bool = False) -> Union[List[Dict[str, Any]], Candles]:
+        """Return cached candles for (symbol, interval) in timestamp order, optionally within [start_ts, end_ts].
+        With `columnar=True` the rows are returned as a Candles object."""
+        sql = 'SELECT timestamp, open, high, low, close, volume FROM candles WHERE symbol=? AND interval=?'
+        args = [symbol, interval]
+        if start_ts is not None:
+            sql += ' AND timestamp>=?'
+            args.append(int(start_ts))
+        if end_ts is not None:
+            sql += ' AND timestamp<=?'
+            args.append(int(end_ts))
+        sql += ' ORDER BY timestamp'
+        with self._lock:
+            rows = self._conn.execute(sql, args).fetchall()
+        if columnar:
+            if not rows:
+                return Candles.empty()
+            ts, o, h, l, c, v = zip(*rows)
+            return Candles(ts, o, h, l, c, [MISSING_VOLUME if x is None else x for x in v])
+        return [{'timestamp': r[0], 'open': r[1], 'high': r[2], 'low': r[3], 'close': r[4], 'volume': r[5]} for r in rows]
+
+    def bounds(self, symbol: str, interval: str) -> Tuple[Optional[int], Optional[int]]:
+        """(first, last) cached timestamp for the series, or (None, None) if empty."""
+        with self._lock:
+            row = self._conn.execute('SELECT MIN(timestamp), MAX(timestamp) FROM candles WHERE symbol=? AND interval=?',
+                                     (symbol, interval)).fetchone()
+        return row[0], row[1]
+
+    def upsert(self, symbol: str, interval: str, candles: Union[List[Dict[str, Any]], Candles]) -> int:
+        """Insert or overwrite candles (de-duplicated on timestamp). Returns number of rows written."""
+        if isinstance(candles, Candles):
+            candles = candles.to_records()
+        rows = [(symbol, interval, int(c['timestamp']), c['open'], c['high'], c['low'], c['close'], c.get('volume'))
+                for c in candles]
+        if not rows:
+            return 0
+        with self._lock, self._conn:
+            self._conn.executemany('INSERT OR REPLACE INTO candles VALUES (?,?,?,?,?,?,?,?)', rows)
+        return len(rows)
+
+    def meta(self, symbol: str, interval: str) -> Tuple[Optional[int], Optional[float]]:
+        """(covered_from, fetched_at) for the series, or (None, None) if never fetched."""
+        with self._lock:
+            row = self._conn.execute('SELECT covered_from, fetched_at FROM series_meta WHERE symbol=? AND interval=?',
+                                     (symbol, interval)).fetchone()
+        return (row[0], row[1]) if row else (None, None)
+
+    def mark_fetched(self, symbol: str, interval: str, covered_from: int = None, fetched_at: float = None):
+        """Record a refresh; `covered_from` only ever moves back in time."""
+        fetched_at = time.time() if fetched_at is None else fetched_at
+        with self._lock, self._conn:
+            self._conn.execute(
+                'INSERT INTO series_meta VALUES (?,?,?,?) ON CONFLICT(symbol, interval) DO UPDATE SET '
+                'covered_from=MIN(COALESCE(series_meta.covered_from, excluded.covered_from), COALESCE(excluded.covered_from, series_meta.covered_from)), '
+                'fetched_at=excluded.fetched_at',
+                (symbol, interval, covered_from, fetched_at))
+
+    def evict(self, now: float = None) -> int:
+        """Drop intraday bars older than the TTL and reset their coverage marker. Returns rows deleted."""
+        if not self.intraday_ttl:
+            return 0
+        cutoff = int((time.time() if now is None else now) - self.intraday_ttl)
+        intervals = sorted(INTRADAY_INTERVALS)
+        marks = ','.join('?' * len(intervals))
+        with self._lock, self._conn:
+            cur = self._conn.execute(f'DELETE FROM candles WHERE interval IN ({marks}) AND timestamp<?', intervals + [cutoff])
+            self._conn.execute(f'UPDATE series_meta SET covered_from=? WHERE interval IN ({marks}) AND covered_from<?',
+                               [cutoff] + intervals + [cutoff])
+        return cur.rowcount
+
+    def clear(self, symbol: str = None, interval: str = None):
+        """Remove cached series (all, one symbol, or one (symbol, interval))."""
+        where, args = [], []
+        if symbol is not None:
+            where.append('symbol=?')
+            args.append(symbol)
+        if interval is not None:
+            where.append('interval=?')
+            args.append(interval)
+        clause = (' WHERE ' + ' AND '.join(where)) if where else ''
+        with self._lock, self._conn:
+            self._conn.execute('DELETE FROM candles' + clause, args)
+            self._conn.execute('DELETE FROM series_meta' + clause, args)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,115 @@
+
+"""candles.py
+
+Compact columnar candle container used between the fetcher and the signal stage.
+Classes:
+- Candles(timestamp, open, high, low, close, volume) -> contiguous NumPy arrays, one per field
+
+Functions:
+- as_candles(candles) -> Candles from a Candles object or the legacy list of candle dicts
+
+Slicing (`candles[10:]`, `candles.tail(50)`) returns views over the same buffers, no copy.
+`to_records()` gives back the legacy [{timestamp, open, high, low, close, volume}, ...] format;
+missing volumes are stored as -1 and come back as None.
+"""
+from typing import List, Dict, Any, Union
+import numpy as np
+
+MISSING_VOLUME = -1
+FIELDS = ('timestamp', 'open', 'high', 'low', 'close', 'volume')
+
+class Candles:
+    __slots__ = FIELDS
+
+    def __init__(self, timestamp, open, high, low, close, volume=None):
+        self.timestamp = np.ascontiguousarray(timestamp, dtype=np.int64)
+        self.open = np.ascontiguousarray(open, dtype=np.float64)
+        self.high = np.ascontiguousarray(high, dtype=np.float64)
+        self.low = np.ascontiguousarray(low, dtype=np.float64)
+        self.close = np.ascontiguousarray(close, dtype=np.float64)
+        if volume is None:
+            volume = np.full(len(self.timestamp), MISSING_VOLUME, dtype=np.int64)
+        self.volume = np.ascontiguousarray(volume, dtype=np.int64)
+
+    @classmethod
+    def empty(cls) -> 'Candles':
+        return cls(np.empty(0, np.int64), *(np.empty(0, np.float64) for _ in range(4)), np.empty(0, np.int64))
+
+    @classmethod
+    def from_quote(cls, timestamps: List[int], quote: Dict[str, List[Any]]) -> 'Candles':
+        """Build straight from Yahoo `timestamp` + `indicators.quote[0]` arrays.
+        Bars with a missing open or close are dropped (same rule as the dict parser)."""
+        n = len(timestamps)
+        if not n:
+            return cls.empty()
+        def col(name):
+            vals = quote.get(name)
+            if vals is None:
+                return np.full(n, np.nan)
+            return np.array(vals, dtype=np.float64)  # None -> nan
+        o, h, l, c, v = col('open'), col('high'), col('low'), col('close'), col('volume')
+        keep = ~(np.isnan(o) | np.isnan(c))
+        v = np.where(np.isnan(v), MISSING_VOLUME, v)
+        ts = np.asarray(timestamps, dtype=np.int64)
+        if keep.all():
+            return cls(ts, o, h, l, c, v)
+        return cls(ts[keep], o[keep], h[keep], l[keep], c[keep], v[keep])
+
+    @classmethod
+    def from_records(cls, records: List[Dict[str, Any]]) -> 'Candles':
+        """Build from the legacy list of candle dicts; only timestamp and close are required."""
+        if not records:
+            return cls.empty()
+        def col(name):
+            return [np.nan if r.get(name) is None else r[name] for r in records]
+        vol = [r.get('volume') for r in records]
+        return cls([r['timestamp'] for r in records], col('open'), col('high'), col('low'), [r['close'] for r in records],
+                   [MISSING_VOLUME if x is None else x for x in vol])
+
+    def to_records(self) -> List[Dict[str, Any]]:
+        """Legacy list-of-dicts view."""
+        return [{'timestamp': t, 'open': o, 'high': h, 'low': l, 'close': c, 'volume': None if v == MISSING_VOLUME else v}
+                for t, o, h, l, c, v in zip(self.timestamp.tolist(), self.open.tolist(), self.high.tolist(),
+                                            self.low.tolist(), self.close.tolist(), self.volume.tolist())]
+
+    def __len__(self) -> int:
+        return len(self.timestamp)
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            # basic slicing on NumPy arrays returns views -> zero-copy
+            return Candles._wrap(*(getattr(self, f)[key] for f in FIELDS))
+        if isinstance(key, (int, np.integer)):
+            t, o, h, l, c, v = (getattr(self, f)[key].item() for f in FIELDS)
+            return {'timestamp': t, 'open': o, 'high': h, 'low': l, 'close': c, 'volume': None if v == MISSING_VOLUME else v}
+        # fancy indexing (masks / index arrays) copies, as in NumPy
+        return Candles._wrap(*(getattr(self, f)[key] for f in FIELDS))
+
+    def __repr__(self) -> str:
+        span = f"{self.timestamp[0]}..{self.timestamp[-1]}" if len(self) else 'empty'
+        return f"Candles(n={len(self)}, {span})"
+
+    @classmethod
+    def _wrap(cls, *arrays) -> 'Candles':
+        # skip __init__ so views are kept as-is (no dtype coercion / copy)
+        obj = cls.__new__(cls)
+        for f, a in zip(FIELDS, arrays):
+            setattr(obj, f, a)
+        return obj
+
+    def tail(self, n: int) -> 'Candles':
+        return self[max(0, len(self) - n):]
+
+    def is_sorted(self) -> bool:
+        return len(self) < 2 or bool(np.all(self.timestamp[1:] >= self.timestamp[:-1]))
+
+    def sorted(self) -> 'Candles':
+        """Timestamp-ordered candles; returns self (no copy) when already ordered."""
+        if self.is_sorted():
+            return self
+        return self[np.argsort(self.timestamp, kind='stable')]
+
+def as_candles(candles: Union[Candles, List[Dict[str, Any]], None]) -> Candles:
+    if isinstance(candles, Candles):
+        return candles
+    return Candles.from_records(candles or [])
@@ -0,0 +1,274 @@
+
+"""instrumentation.py
+
+Shared `tool` decorator for every pipeline stage, doubling as the latency/profiling surface.
+Functions:
+- tool(name=None, description=None) -> decorator; also usable bare as @tool
+- snapshot() -> {tool: {calls, errors, error_types, wall/cpu histograms + p50/p95/max, payload items in/out, ...}}
+- to_json(indent=None) / to_prometheus() -> exported metrics text
+- write_snapshot(path) -> JSON snapshot on disk
+- enable_profiling(sample_rate=0.01, memory=False) / disable_profiling()
+- profile_report(name, limit=20) -> pstats text of the sampled cProfile runs of one tool
+- reset()
+
+Per call the wrapper records wall time (perf_counter), CPU time of the calling thread (thread_time), the
+number of items in the main argument and in the result (len() of lists/dicts/arrays/Candles; 1 for scalars
+and strings) and the exception type on failure. Durations go into fixed log-spaced histogram buckets, so
+recording is O(1) and the Prometheus export uses the usual cumulative `_bucket{le=...}` lines.
+When profiling is enabled, a `sample_rate` fraction of calls run under cProfile (one sampled call at a time
+across threads; nested tools inside it run unprofiled) and, with memory=True, tracemalloc reports the peak
+allocation of the sampled call.
+TOOL_METRICS=0 turns the decorator back into a no-op.
+"""
+from typing import Any, Callable, Dict, List
+from bisect import bisect_left
+import cProfile, functools, io, json, os, pstats, random, threading, time, tracemalloc
+
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+ENABLED = os.getenv('TOOL_METRICS', '1') != '0'
+
+class Histogram:
+    __slots__ = ('counts', 'total', 'max')
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, x: float):
+        self.counts[bisect_left(BUCKETS, x)] += 1
+        self.total += x
+        if x > self.max:
+            self.max = x
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-th sample (max for the overflow bucket)."""
+        n = sum(self.counts)
+        if not n:
+            return 0.0
+        seen = 0
+        for i, c in enumerate(self.counts):
+            seen += c
+            if seen >= q * n:
+                return min(BUCKETS[i], self.max) if i < len(BUCKETS) else self.max
+        return self.max
+
+    def to_dict(self) -> Dict[str, Any]:
+        n = sum(self.counts)
+        return {'count': n, 'sum': self.total, 'mean': self.total / n if n else 0.0, 'p50': self.quantile(0.5),
+                'p95': self.quantile(0.95), 'max': self.max, 'buckets': list(self.counts)}
+
+class ToolStats:
+    def __init__(self, name: str, description: str = None):
+        self.name = name
+        self.description = description
+        self.calls = 0
+        self.errors = 0
+        self.error_types: Dict[str, int] = {}
+        self.in_flight = 0
+        self.wall = Histogram()
+        self.cpu = Histogram()
+        self.items_in = 0
+        self.items_out = 0
+        self.profiled_calls = 0
+        self.mem_peak = 0
+        self.profile = None  # pstats.Stats merged over sampled calls
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'description': self.description, 'calls': self.calls, 'errors': self.errors,
+                'error_types': dict(self.error_types), 'in_flight': self.in_flight,
+                'wall_seconds': self.wall.to_dict(), 'cpu_seconds': self.cpu.to_dict(),
+                'items_in': self.items_in, 'items_out': self.items_out,
+                'profiled_calls': self.profiled_calls, 'mem_peak_bytes': self.mem_peak}
+
+_stats: Dict[str, ToolStats] = {}
+_lock = threading.Lock()
+_profile_lock = threading.Lock()  # one sampled profile at a time, process-wide
+_profiling = {'rate': 0.0, 'memory': False}
+
+def _items(x: Any) -> int:
+    if x is None:
+        return 0
+    if isinstance(x, (str, bytes)):
+        return 1
+    try:
+        return len(x)
+    except TypeError:
+        return 1
+
+def _stats_for(name: str, description: str = None) -> ToolStats:
+    with _lock:
+        st = _stats.get(name)
+        if st is None:
+            st = _stats[name] = ToolStats(name, description)
+        return st
+
+def _profiled(st: ToolStats, f: Callable, args, kwargs):
+    prof = cProfile.Profile()
+    mem = _profiling['memory']
+    if mem:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+    try:
+        return prof.runcall(f, *args, **kwargs)
+    finally:
+        with _lock:
+            st.profiled_calls += 1
+            if mem:
+                st.mem_peak = max(st.mem_peak, tracemalloc.get_traced_memory()[1] - base)
+            if st.profile is None:
+                st.profile = pstats.Stats(prof, stream=io.StringIO())
+            else:
+                st.profile.add(prof)
+
+def tool(name=None, description=None):
+    """Instrumenting replacement for the AgentX @tool decorator; the wrapped function keeps its signature."""
+    if callable(name):
+        return tool()(name)
+
+    def _dec(f):
+        if not ENABLED:
+            return f
+        st = _stats_for(name or f.__name__, description)
+
+        @functools.wraps(f)
+        def wrapper(*args, **kwargs):
+            payload = args[0] if args else (next(iter(kwargs.values())) if kwargs else None)
+            with _lock:
+                st.in_flight += 1
+            w0, c0 = time.perf_counter(), time.thread_time()
+            err = None
+            try:
+                if _profiling['rate'] and random.random() < _profiling['rate'] and _profile_lock.acquire(blocking=False):
+                    try:
+                        result = _profiled(st, f, args, kwargs)
+                    finally:
+                        _profile_lock.release()
+                else:
+                    result = f(*args, **kwargs)
+                return result
+            except BaseException as e:
+                err = type(e).__name__
+                result = None
+                raise
+            finally:
+                wall, cpu = time.perf_counter() - w0, time.thread_time() - c0
+                with _lock:
+                    st.in_flight -= 1
+                    st.calls += 1
+                    st.wall.add(wall)
+                    st.cpu.add(cpu)
+                    st.items_in += _items(payload)
+                    if err is None:
+                        st.items_out += _items(result)
+                    else:
+                        st.errors += 1
+                        st.error_types[err] = st.error_types.get(err, 0) + 1
+
+        wrapper.tool_name = st.name
+        wrapper.tool_description = description
+        return wrapper
+    return _dec
+
+def enable_profiling(sample_rate: float = 0.01, memory: bool = False):
+    _profiling['rate'] = float(sample_rate)
+    _profiling['memory'] = memory
+
+def disable_profiling():
+    _profiling['rate'] = 0.0
+    if _profiling['memory'] and tracemalloc.is_tracing():
+        tracemalloc.stop()
+    _profiling['memory'] = False
+
+def profile_report(name: str, limit: int = 20, sort: str = 'cumulative') -> str:
+    st = _stats.get(name)
+    if st is None or st.profile is None:
+        return ''
+    out = io.StringIO()
+    with _lock:
+        st.profile.stream = out
+        st.profile.sort_stats(sort).print_stats(limit)
+    return out.getvalue()
+
+def snapshot() -> Dict[str, Dict[str, Any]]:
+    with _lock:
+        return {name: st.to_dict() for name, st in _stats.items()}
+
+def reset():
+    with _lock:
+        for name, st in list(_stats.items()):
+            _stats[name].__init__(name, st.description)
+
+def to_json(indent: int = None) -> str:
+    return json.dumps({'ts': time.time(), 'buckets': list(BUCKETS), 'tools': snapshot()}, indent=indent)
+
+def write_snapshot(path: str) -> str:
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + '.tmp'
+    with open(tmp, 'w') as f:
+        f.write(to_json(indent=1))
+    os.replace(tmp, path)
+    return path
+
+def _label(v: str) -> str:
+    return str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def to_prometheus() -> str:
+    snap = snapshot()
+    lines: List[str] = []
+
+    def counter(metric, help_, key):
+        lines.append(f'# HELP {metric} {help_}')
+        lines.append(f'# TYPE {metric} counter')
+        for name, s in snap.items():
+            lines.append(f'{metric}{{tool="{_label(name)}"}} {s[key]}')
+
+    counter('tool_calls_total', 'Completed tool calls.', 'calls')
+    counter('tool_errors_total', 'Tool calls that raised.', 'errors')
+    counter('tool_payload_items_in_total', 'Items in the main argument of tool calls.', 'items_in')
+    counter('tool_payload_items_out_total', 'Items in tool results.', 'items_out')
+    lines.append('# HELP tool_in_flight Tool calls currently running.')
+    lines.append('# TYPE tool_in_flight gauge')
+    for name, s in snap.items():
+        lines.append(f'tool_in_flight{{tool="{_label(name)}"}} {s["in_flight"]}')
+    for metric, key, help_ in (('tool_wall_seconds', 'wall_seconds', 'Wall-clock time per tool call.'),
+                               ('tool_cpu_seconds', 'cpu_seconds', 'CPU time of the calling thread per tool call.')):
+        lines.append(f'# HELP {metric} {help_}')
+        lines.append(f'# TYPE {metric} histogram')
+        for name, s in snap.items():
+            h, lbl, cum = s[key], _label(name), 0
+            for le, c in zip(BUCKETS + ('+Inf',), h['buckets']):
+                cum += c
+                lines.append(f'{metric}_bucket{{tool="{lbl}",le="{le}"}} {cum}')
+            lines.append(f'{metric}_sum{{tool="{lbl}"}} {h["sum"]}')
+            lines.append(f'{metric}_count{{tool="{lbl}"}} {h["count"]}')
+    lines.append('# HELP tool_errors_by_type_total Tool calls that raised, by exception type.')
+    lines.append('# TYPE tool_errors_by_type_total counter')
+    for name, s in snap.items():
+        for et, c in s['error_types'].items():
+            lines.append(f'tool_errors_by_type_total{{tool="{_label(name)}",type="{_label(et)}"}} {c}')
+    return '\n'.join(lines) + '\n'
+
+if __name__ == '__main__':
+    @tool(name='Demo Sleep', description='sleeps')
+    def nap(xs):
+        time.sleep(0.002)
+        return [x * 2 for x in xs]
+
+    @tool
+    def boom(x):
+        raise ValueError(x)
+
+    enable_profiling(sample_rate=0.5, memory=True)
+    for _ in range(20):
+        nap(list(range(100)))
+    try:
+        boom(1)
+    except ValueError:
+        pass
+    print(to_json(indent=1))
+    print(to_prometheus())
+    print(profile_report('Demo Sleep', limit=5))
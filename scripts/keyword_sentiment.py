@@ -0,0 +1,118 @@
+
+"""keyword_sentiment.py
+
+Bulk keyword sentiment scorer: thousands of headlines scored in one vectorized pass.
+Classes:
+- KeywordScorer(weights, phrases=None, stopwords=(), negations=NEGATIONS, negation_window=3)
+
+Functions on KeywordScorer:
+- score_many(texts) -> np.ndarray of per-article scores (lexicon sum / sqrt(non-stopword token count))
+- aggregate(scores) -> tanh(mean) in [-1, 1], as analyze_sentiment reports it
+
+The lexicon is compiled once into a vocabulary index. Each call tokenizes every text with one precompiled
+regex, maps the whole corpus onto vocabulary ids with np.unique, and resolves weights, phrase terms
+(multi-word n-grams, longest first, replacing their component words) and negation (a negator within
+`negation_window` tokens before a term flips its sign) with array operations; per-article sums come
+from np.bincount. Python only loops over distinct tokens and over phrase terms, never over tokens.
+"""
+from typing import Dict, Iterable, List, Sequence
+import math, re
+import numpy as np
+
+NEGATIONS = frozenset(["not", "no", "never", "without", "neither", "nor", "hardly", "barely"])
+
+# financial phrase terms; weights override the component words
+DEFAULT_PHRASES = {
+    "beat estimates": 1.5, "beats estimates": 1.5, "above estimates": 1.0, "record high": 1.5,
+    "raises guidance": 1.5, "price target raised": 1.5, "upgraded to buy": 2.0, "strong buy": 1.5,
+    "missed estimates": -1.5, "misses estimates": -1.5, "below estimates": -1.0, "profit warning": -2.0,
+    "cuts guidance": -1.5, "price target cut": -1.5, "downgraded to sell": -2.0, "record low": -1.5,
+    "under investigation": -1.5, "52 week low": -1.0, "52 week high": 1.0,
+}
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+
+class KeywordScorer:
+    def __init__(self, weights: Dict[str, float], phrases: Dict[str, float] = None, stopwords: Iterable[str] = (),
+                 negations: Iterable[str] = NEGATIONS, negation_window: int = 3):
+        self.weights = {k.lower(): float(v) for k, v in weights.items()}
+        phrases = DEFAULT_PHRASES if phrases is None else phrases
+        self.phrases = sorted(((tuple(_TOKEN_RE.findall(p.lower())), float(w)) for p, w in phrases.items()),
+                              key=lambda pw: -len(pw[0]))
+        self.stopwords = frozenset(s.lower() for s in stopwords)
+        self.negations = frozenset(n.lower() for n in negations)
+        self.negation_window = negation_window
+
+    @classmethod
+    def from_sets(cls, positive: Iterable[str], negative: Iterable[str], stopwords: Iterable[str] = (), **kwargs) -> 'KeywordScorer':
+        weights = {w: 1.0 for w in positive}
+        for w in negative:
+            weights[w] = weights.get(w, 0.0) - 1.0
+        return cls(weights, stopwords=stopwords, **kwargs)
+
+    def _is_negation(self, tok: str) -> bool:
+        return tok in self.negations or tok.endswith("n't")
+
+    def score_many(self, texts: Sequence[str]) -> np.ndarray:
+        n_docs = len(texts)
+        if not n_docs:
+            return np.zeros(0)
+        per_doc = [_TOKEN_RE.findall(t.lower()) if t else [] for t in texts]
+        lengths = np.fromiter((len(toks) for toks in per_doc), dtype=np.int64, count=n_docs)
+        if not lengths.sum():
+            return np.zeros(n_docs)
+        tokens = np.array([tok for toks in per_doc for tok in toks])
+        doc = np.repeat(np.arange(n_docs), lengths)
+        uniq, inv = np.unique(tokens, return_inverse=True)
+        uniq = uniq.tolist()
+        w = np.array([self.weights.get(u, 0.0) for u in uniq])[inv]
+        is_stop = np.array([u in self.stopwords for u in uniq])[inv]
+        is_neg = np.array([self._is_negation(u) for u in uniq])[inv]
+        # phrase terms: match id n-grams inside one document, longest phrases claim their span first
+        pos = {u: i for i, u in enumerate(uniq)}
+        consumed = np.zeros(len(inv), dtype=bool)
+        for words, pw in self.phrases:
+            L = len(words)
+            if L < 2 or L > len(inv) or any(x not in pos for x in words):
+                continue
+            m = len(inv) - L + 1
+            hit = doc[:m] == doc[L - 1:]
+            for k, x in enumerate(words):
+                hit &= (inv[k:k + m] == pos[x]) & ~consumed[k:k + m]
+            starts = np.flatnonzero(hit)
+            if not len(starts):
+                continue
+            w[starts] = pw
+            consumed[starts] = True
+            for k in range(1, L):
+                w[starts + k] = 0.0
+                consumed[starts + k] = True
+        # negation: a negator up to `negation_window` tokens earlier in the same document flips the term
+        negated = np.zeros(len(inv), dtype=bool)
+        for k in range(1, self.negation_window + 1):
+            if k >= len(inv):
+                break
+            negated[k:] |= is_neg[:-k] & (doc[k:] == doc[:-k])
+        w = np.where(negated, -w, w)
+        sums = np.bincount(doc, weights=w, minlength=n_docs)
+        counts = np.bincount(doc, weights=(~is_stop).astype(float), minlength=n_docs)
+        return sums / np.sqrt(np.maximum(1.0, counts))
+
+    @staticmethod
+    def aggregate(scores: Sequence[float]) -> float:
+        if not len(scores):
+            return 0.0
+        # clamp to -1..1 roughly via tanh
+        return math.tanh(float(np.mean(scores)))
+
+if __name__ == '__main__':
+    import time
+    scorer = KeywordScorer.from_sets(["good", "growth", "surge", "strong", "beat"], ["weak", "fall", "miss", "loss"],
+                                     ["the", "is", "a", "on"])
+    samples = ["Shares surge on strong growth", "Company did not beat estimates", "Profit warning issued, shares fall",
+               "Results were not weak at all"]
+    print(dict(zip(samples, scorer.score_many(samples).round(3))))
+    corpus = samples * 25000
+    t0 = time.perf_counter()
+    s = scorer.score_many(corpus)
+    print(f"{len(corpus)} headlines in {time.perf_counter() - t0:.2f}s, aggregate {scorer.aggregate(s):.3f}")
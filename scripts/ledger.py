@@ -0,0 +1,306 @@
+
+"""ledger.py
+
+In-process position and order ledger with a snapshot + append-only journal for fast restart.
+Classes:
+- Position(symbol) -> signed qty, average cost, realized P&L, last mark
+- Ledger(state_dir='state/ledger', starting_cash=None, snapshot_every=1000, fsync=False, keep_closed_orders=1000)
+
+Functions on Ledger:
+- record_orders(orders) -> track validated orders by client_order_id
+- apply_executions(results) -> fold order_router/execute_trades results in (only the newly filled quantity)
+- apply_fill(symbol, side, qty, price, client_order_id=None) -> one fill, O(1)
+- mark(prices) / mark_candles(data) -> latest prices for unrealized P&L
+- position(symbol), positions(), open_orders(), equity(), pnl()
+- snapshot() -> write the full state and start a fresh journal; close()
+
+Every state change is appended to journal-<seq>.jsonl before it is applied. Every `snapshot_every` events the
+whole state is written to snapshot.json (atomically, via rename) and the journal starts over, so a restart
+loads one snapshot and replays at most `snapshot_every` lines no matter how long the trade history is
+(snapshots keep open orders, every position and only the last `keep_closed_orders` finished orders).
+A torn last journal line from a crash is ignored. Marks are not journaled; they come back with the next bar.
+starting_cash defaults to the DEFAULT_EQUITY env var, as in risk_manager. It only applies when the ledger is
+created: a new ledger snapshots it right away, and a restart takes cash from the snapshot, not the constructor.
+Fills of orders the ledger does not track (never recorded, or dropped with the old finished orders) are
+remembered per client_order_id for the last `keep_closed_orders` such orders, so a result seen again is not
+booked twice.
+"""
+from typing import List, Dict, Any, Iterable, Union
+import glob, json, os, threading, time
+from scripts.candles import Candles, as_candles
+
+class Position:
+    __slots__ = ('symbol', 'qty', 'avg_cost', 'realized', 'last_price')
+
+    def __init__(self, symbol: str, qty: float = 0.0, avg_cost: float = 0.0, realized: float = 0.0, last_price: float = None):
+        self.symbol = symbol
+        self.qty, self.avg_cost, self.realized, self.last_price = qty, avg_cost, realized, last_price
+
+    def fill(self, dq: float, price: float):
+        """Signed quantity change at `price`; realizes P&L on the part that closes existing quantity."""
+        if self.qty == 0 or (self.qty > 0) == (dq > 0):
+            self.avg_cost = (self.avg_cost * abs(self.qty) + price * abs(dq)) / abs(self.qty + dq)
+        else:
+            closing = min(abs(dq), abs(self.qty))
+            self.realized += closing * (price - self.avg_cost) * (1 if self.qty > 0 else -1)
+            if abs(dq) > abs(self.qty):
+                self.avg_cost = price  # flipped sides: the remainder opens at the fill price
+        self.qty += dq
+        if self.qty == 0:
+            self.avg_cost = 0.0
+        if self.last_price is None:
+            self.last_price = price
+
+    @property
+    def unrealized(self) -> float:
+        if not self.qty or self.last_price is None:
+            return 0.0
+        return self.qty * (self.last_price - self.avg_cost)
+
+    def to_dict(self):
+        return {'symbol': self.symbol, 'qty': self.qty, 'avg_cost': self.avg_cost, 'realized': self.realized,
+                'last_price': self.last_price, 'unrealized': self.unrealized}
+
+    @classmethod
+    def from_dict(cls, d):
+        return cls(d['symbol'], d['qty'], d['avg_cost'], d['realized'], d.get('last_price'))
+
+ORDER_FIELDS = ('symbol', 'side', 'qty', 'price', 'stop_loss', 'reason')
+FINAL_STATUSES = ('FILLED', 'ERROR', 'REJECTED', 'CANCELLED')
+
+class Ledger:
+    def __init__(self, state_dir: str = 'state/ledger', starting_cash: float = None, snapshot_every: int = 1000,
+                 fsync: bool = False, keep_closed_orders: int = 1000):
+        self.state_dir = state_dir
+        self.keep_closed_orders = keep_closed_orders
+        self.snapshot_every = snapshot_every
+        self.fsync = fsync
+        self.cash = float(os.getenv('DEFAULT_EQUITY', '100000')) if starting_cash is None else float(starting_cash)
+        self.positions_by_symbol: Dict[str, Position] = {}
+        self.orders: Dict[str, Dict[str, Any]] = {}
+        self.untracked_fills: Dict[str, List[float]] = {}  # client_order_id -> [filled_qty, avg_price]
+        self.seq = 0
+        self.replayed = 0
+        self._since_snapshot = 0
+        self._journal = None
+        self._lock = threading.RLock()
+        os.makedirs(state_dir, exist_ok=True)
+        t0 = time.perf_counter()
+        fresh = self._recover()
+        if fresh:
+            self.snapshot()  # persist starting_cash before any event
+        self.recovery_seconds = time.perf_counter() - t0
+
+    # --- persistence ---
+    @property
+    def snapshot_path(self) -> str:
+        return os.path.join(self.state_dir, 'snapshot.json')
+
+    def _journal_path(self, seq: int) -> str:
+        return os.path.join(self.state_dir, f'journal-{seq:012d}.jsonl')
+
+    def _recover(self) -> bool:
+        """Load the snapshot and replay the journal; True when there was no prior state at all."""
+        base = 0
+        fresh = not os.path.exists(self.snapshot_path)
+        if not fresh:
+            with open(self.snapshot_path) as f:
+                state = json.load(f)
+            base = self.seq = state['seq']
+            self.cash = state['cash']
+            self.positions_by_symbol = {s: Position.from_dict(p) for s, p in state['positions'].items()}
+            self.orders = state['orders']
+            self.untracked_fills = state.get('untracked_fills', {})
+        for path in sorted(glob.glob(os.path.join(self.state_dir, 'journal-*.jsonl'))):
+            if int(os.path.basename(path)[8:-6]) < base:
+                continue  # superseded by the snapshot
+            with open(path, 'rb+') as f:
+                good = 0
+                for line in iter(f.readline, b''):
+                    try:
+                        if not line.endswith(b'\n'):
+                            raise ValueError('unterminated line')
+                        ev = json.loads(line)
+                    except ValueError:
+                        # torn write at crash time: cut it off so new events do not land behind it
+                        f.truncate(good)
+                        break
+                    good += len(line)
+                    if ev['seq'] > self.seq:
+                        self._apply(ev)
+                        self.seq = ev['seq']
+                        self.replayed += 1
+        self._since_snapshot = self.replayed
+        self._journal = open(self._journal_path(base), 'a')
+        return fresh and self.seq == 0
+
+    def _log(self, ev: Dict[str, Any]):
+        self.seq += 1
+        ev['seq'] = self.seq
+        self._journal.write(json.dumps(ev, separators=(',', ':')) + '\n')
+        self._journal.flush()
+        if self.fsync:
+            os.fsync(self._journal.fileno())
+        self._apply(ev)
+        self._since_snapshot += 1
+        if self.snapshot_every and self._since_snapshot >= self.snapshot_every:
+            self.snapshot()
+
+    def snapshot(self):
+        with self._lock:
+            # finished orders beyond the most recent `keep_closed_orders` are dropped so the snapshot stays bounded
+            closed = [k for k, o in self.orders.items() if o['status'] in FINAL_STATUSES]
+            for k in closed[:max(0, len(closed) - self.keep_closed_orders)]:
+                o = self.orders.pop(k)
+                if o['filled_qty']:
+                    self._remember_fill(k, o['filled_qty'], o['avg_price'])
+            state = {'seq': self.seq, 'cash': self.cash, 'ts': time.time(),
+                     'positions': {s: p.to_dict() for s, p in self.positions_by_symbol.items()},
+                     'orders': self.orders, 'untracked_fills': self.untracked_fills}
+            tmp = self.snapshot_path + '.tmp'
+            with open(tmp, 'w') as f:
+                json.dump(state, f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, self.snapshot_path)
+            self._journal.close()
+            self._journal = open(self._journal_path(self.seq), 'a')
+            for path in glob.glob(os.path.join(self.state_dir, 'journal-*.jsonl')):
+                if path != self._journal.name and int(os.path.basename(path)[8:-6]) <= self.seq:
+                    os.remove(path)
+            self._since_snapshot = 0
+
+    def close(self):
+        with self._lock:
+            if self._journal is not None:
+                self._journal.close()
+                self._journal = None
+
+    def _remember_fill(self, coid: str, filled: float, avg: float):
+        self.untracked_fills.pop(coid, None)
+        self.untracked_fills[coid] = [filled, avg]
+        while len(self.untracked_fills) > self.keep_closed_orders:
+            del self.untracked_fills[next(iter(self.untracked_fills))]
+
+    # --- state changes (journaled) ---
+    def _apply(self, ev: Dict[str, Any]):
+        kind = ev['type']
+        if kind == 'order':
+            self.orders[ev['client_order_id']] = {**{k: ev.get(k) for k in ORDER_FIELDS}, 'status': 'OPEN',
+                                                  'filled_qty': 0, 'avg_price': None, 'order_id': None}
+        elif kind == 'fill':
+            dq = ev['qty'] if ev['side'] == 'BUY' else -ev['qty']
+            pos = self.positions_by_symbol.get(ev['symbol'])
+            if pos is None:
+                pos = self.positions_by_symbol[ev['symbol']] = Position(ev['symbol'])
+            pos.fill(dq, ev['price'])
+            self.cash -= dq * ev['price']
+            coid = ev.get('client_order_id')
+            o = self.orders.get(coid)
+            if o is not None:
+                filled = o['filled_qty'] + ev['qty']
+                o['avg_price'] = ((o['avg_price'] or 0.0) * o['filled_qty'] + ev['price'] * ev['qty']) / filled
+                o['filled_qty'] = filled
+                o['status'] = 'FILLED' if o.get('qty') is not None and filled >= o['qty'] else 'PARTIAL'
+            elif coid is not None:
+                prev_qty, prev_avg = self.untracked_fills.get(coid, (0, None))
+                filled = prev_qty + ev['qty']
+                self._remember_fill(coid, filled, ((prev_avg or 0.0) * prev_qty + ev['price'] * ev['qty']) / filled)
+        elif kind == 'status':
+            o = self.orders.get(ev['client_order_id'])
+            if o is not None:
+                o['status'] = ev['status']
+                if ev.get('order_id'):
+                    o['order_id'] = ev['order_id']
+        elif kind == 'cash':
+            self.cash += ev['amount']
+
+    def record_orders(self, orders: Iterable[Dict[str, Any]]):
+        with self._lock:
+            for o in orders:
+                if o.get('client_order_id') not in self.orders:
+                    self._log({'type': 'order', 'client_order_id': o['client_order_id'], **{k: o.get(k) for k in ORDER_FIELDS}})
+
+    def apply_fill(self, symbol: str, side: str, qty: float, price: float, client_order_id: str = None):
+        if qty <= 0:
+            return
+        with self._lock:
+            self._log({'type': 'fill', 'symbol': symbol, 'side': side, 'qty': qty, 'price': float(price),
+                       'client_order_id': client_order_id})
+
+    def apply_executions(self, results: Iterable[Dict[str, Any]]):
+        """Results carry cumulative filled_qty/avg_price per order (as order_router returns them); only the
+        quantity not seen before is booked, at the price implied by the change in average price."""
+        with self._lock:
+            for r in results:
+                coid = r.get('client_order_id')
+                o = self.orders.get(coid)
+                filled, avg = r.get('filled_qty') or 0, r.get('avg_price')
+                if o is not None:
+                    prev_qty, prev_avg = o['filled_qty'], o['avg_price']
+                else:
+                    prev_qty, prev_avg = self.untracked_fills.get(coid, (0, None)) if coid is not None else (0, None)
+                if filled > prev_qty and avg is not None:
+                    prev_notional = prev_qty * (prev_avg or 0.0)
+                    dq = filled - prev_qty
+                    self.apply_fill(r.get('symbol'), r.get('side'), dq, (filled * avg - prev_notional) / dq, coid)
+                status = r.get('status')
+                if o is not None and status and (status != o['status'] or r.get('order_id') != o['order_id']):
+                    self._log({'type': 'status', 'client_order_id': coid, 'status': status, 'order_id': r.get('order_id')})
+
+    def deposit(self, amount: float):
+        with self._lock:
+            self._log({'type': 'cash', 'amount': float(amount)})
+
+    # --- marks and queries ---
+    def mark(self, prices: Dict[str, float]):
+        with self._lock:
+            for s, p in prices.items():
+                pos = self.positions_by_symbol.get(s)
+                if pos is not None and p is not None:
+                    pos.last_price = float(p)
+
+    def mark_candles(self, data: Dict[str, Union[List[Dict[str, Any]], Candles]]):
+        """Mark every held symbol at the close of its latest bar."""
+        prices = {}
+        for s, c in data.items():
+            if s in self.positions_by_symbol and c is not None and len(c):
+                prices[s] = float(as_candles(c).sorted().close[-1])
+        self.mark(prices)
+
+    def position(self, symbol: str) -> Dict[str, Any]:
+        pos = self.positions_by_symbol.get(symbol)
+        return pos.to_dict() if pos is not None else Position(symbol).to_dict()
+
+    def positions(self) -> Dict[str, Dict[str, Any]]:
+        return {s: p.to_dict() for s, p in self.positions_by_symbol.items() if p.qty}
+
+    def open_orders(self) -> Dict[str, Dict[str, Any]]:
+        return {k: o for k, o in self.orders.items() if o['status'] not in FINAL_STATUSES}
+
+    def pnl(self) -> Dict[str, float]:
+        realized = sum(p.realized for p in self.positions_by_symbol.values())
+        unrealized = sum(p.unrealized for p in self.positions_by_symbol.values())
+        return {'realized': realized, 'unrealized': unrealized, 'total': realized + unrealized}
+
+    def equity(self) -> float:
+        """Cash plus positions at their latest marks (average cost when never marked)."""
+        return self.cash + sum(p.qty * (p.last_price if p.last_price is not None else p.avg_cost)
+                               for p in self.positions_by_symbol.values())
+
+if __name__ == '__main__':
+    import random, shutil
+    shutil.rmtree('state/demo_ledger', ignore_errors=True)
+    led = Ledger('state/demo_ledger', starting_cash=100000, snapshot_every=500)
+    rng = random.Random(0)
+    for i in range(2000):
+        sym = f"S{rng.randrange(20)}.NS"
+        o = {'client_order_id': f"{sym}-{i}", 'symbol': sym, 'side': rng.choice(['BUY', 'SELL']), 'qty': 10, 'price': 100.0}
+        led.record_orders([o])
+        led.apply_executions([{**o, 'filled_qty': 10, 'avg_price': 100 + rng.uniform(-5, 5), 'status': 'FILLED', 'order_id': i}])
+    led.mark({f"S{k}.NS": 101.0 for k in range(20)})
+    print(led.pnl(), round(led.equity(), 2))
+    led.close()
+    again = Ledger('state/demo_ledger')
+    again.mark({f"S{k}.NS": 101.0 for k in range(20)})
+    print(f"restart replayed {again.replayed} events in {1000 * again.recovery_seconds:.1f} ms", round(again.equity(), 2))
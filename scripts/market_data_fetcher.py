@@ -3,62 +3,253 @@
 
 AgentX-ready tool to fetch OHLC data from Yahoo Finance (public endpoint).
 Functions:
-- fetch_ohlc(symbol, range='1mo', interval='1d') -> list of candles dict
+- fetch_ohlc(symbol, range='1mo', interval='1d', columnar=False) -> list of candles dict (or Candles)
+- fetch_ohlc_cached(symbol, range='1mo', interval='1d', store=None) -> list of candles dict (local cache + tail top-up)
+- fetch_ohlc_many(symbols, range='1mo', interval='1d', max_workers=8, store=None) -> {symbol: candles} (with `.errors`)
+- fetch_timeframes(symbols, timeframes=('5m', '15m', '1h'), range='1mo', base=None, book=None, store=None)
+  -> TimeframeBook: one download at the finest interval, every other timeframe resampled locally
 
 Symbols: use Yahoo format, e.g., 'RELIANCE.NS' for NSE Reliance Industries.
+
+All requests share one pooled `requests.Session`, are throttled per host and retried with
+exponential backoff on 429/5xx. Set YAHOO_CHART_URL to point the fetcher at a local stub server.
+With a CandleStore (see candle_store.py) only the missing tail of a series is downloaded.
+With INSTRUMENTS_FILE set, bare tradingsymbols and 'NSE:X' / 'BSE:X' names map to Yahoo symbols through the
+symbol master (symbol_master.py) instead of the .NS suffix guess.
 """
-from typing import List, Dict, Any
-import requests, time, os
+from typing import List, Dict, Any, Iterable, Optional, Union
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+import time, os, threading, datetime
+from scripts.candle_store import CandleStore, INTRADAY_INTERVALS
+from scripts.candles import Candles
+from scripts.instrumentation import tool
+from scripts.symbol_master import get_master
+from scripts.timeframes import TimeframeBook, timeframe_seconds
+from scripts.runtime import lazy_import
 
-# AgentX may expect a decorator like @tool; create a safe noop decorator if not present.
-def tool(name=None, description=None):
-    def _dec(f):
-        return f
-    return _dec
+requests = lazy_import('requests')  # loaded by the first fetch, not by importing this module
 
-@tool(name='Market Data Fetcher', description='Fetch OHLC from Yahoo Finance')
-def fetch_ohlc(symbol: str, range: str = '1mo', interval: str = '1d') -> List[Dict[str, Any]]:
-    """Fetch OHLC data for `symbol` using Yahoo Finance chart API.
-    Returns a list of candles: {timestamp, open, high, low, close, volume}
-    """
-    # sanitize symbol input
+YAHOO_CHART_URL = os.getenv('YAHOO_CHART_URL', 'https://query1.finance.yahoo.com/v7/finance/chart')
+MAX_RETRIES = int(os.getenv('YAHOO_MAX_RETRIES', '3'))
+BACKOFF_BASE = float(os.getenv('YAHOO_BACKOFF_BASE', '0.5'))  # seconds, doubled per attempt
+HOST_RATE_LIMIT = float(os.getenv('YAHOO_RATE_LIMIT', '10'))  # max requests per second per host
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+_RANGE_SECONDS = {'1d': 86400, '5d': 5 * 86400, '1mo': 31 * 86400, '3mo': 92 * 86400, '6mo': 183 * 86400,
+                  '1y': 366 * 86400, '2y': 731 * 86400, '5y': 1827 * 86400, '10y': 3653 * 86400}
+_INTERVAL_SECONDS = {'1m': 60, '2m': 120, '5m': 300, '15m': 900, '30m': 1800, '60m': 3600, '90m': 5400, '1h': 3600,
+                     '1d': 86400, '5d': 5 * 86400, '1wk': 7 * 86400, '1mo': 30 * 86400, '3mo': 91 * 86400}
+
+_session = None
+_session_lock = threading.Lock()
+
+def _get_session(pool_size: int = 16) -> 'requests.Session':
+    """Return the process-wide pooled session (created on first use)."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            s = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+            s.mount('https://', adapter)
+            s.mount('http://', adapter)
+            _session = s
+        return _session
+
+class _HostRateLimiter:
+    """Spaces out requests to the same host so we never exceed `rate` requests/second."""
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next = {}
+        self._lock = threading.Lock()
+
+    def wait(self, host: str):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next.get(host, now))
+            self._next[host] = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+_rate_limiter = _HostRateLimiter(HOST_RATE_LIMIT)
+
+def _normalize_symbol(symbol: str) -> str:
+    master = get_master()
+    if master is not None:
+        yahoo = master.yahoo(symbol)  # bare tradingsymbol, 'NSE:X' or 'BSE:X'
+        if yahoo:
+            return yahoo
     if not symbol.upper().endswith('.NS'):
         # assume NSE if no suffix provided
         if '.' not in symbol:
             symbol = symbol + '.NS'
-    url = f"https://query1.finance.yahoo.com/v7/finance/chart/{symbol}?range={range}&interval={interval}"
-    resp = requests.get(url, timeout=10)
-    if resp.status_code != 200:
-        raise Exception(f"Yahoo Finance request failed: {resp.status_code} {resp.text}")
-    data = resp.json().get('chart', {}).get('result')
+    return symbol
+
+def _get_with_retry(url: str, session: 'requests.Session' = None, timeout: float = 10) -> 'requests.Response':
+    """GET `url` with per-host throttling and exponential backoff on 429/5xx and connection errors."""
+    session = session or _get_session()
+    host = urlparse(url).netloc
+    attempt = 0
+    while True:
+        _rate_limiter.wait(host)
+        try:
+            resp = session.get(url, timeout=timeout)
+        except (requests.ConnectionError, requests.Timeout):
+            if attempt >= MAX_RETRIES:
+                raise
+        else:
+            if resp.status_code not in RETRY_STATUS or attempt >= MAX_RETRIES:
+                return resp
+            retry_after = resp.headers.get('Retry-After')
+            if retry_after and retry_after.isdigit():
+                time.sleep(float(retry_after))
+                attempt += 1
+                continue
+        time.sleep(BACKOFF_BASE * (2 ** attempt))
+        attempt += 1
+
+def _parse_chart(payload: Dict[str, Any]) -> Candles:
+    """Parse a chart API payload straight from the `indicators.quote` arrays into columnar Candles."""
+    data = payload.get('chart', {}).get('result')
     if not data:
-        return []
+        return Candles.empty()
     result = data[0]
     timestamps = result.get('timestamp', [])
     indicators = result.get('indicators', {}).get('quote', [])
     if not indicators:
-        return []
-    quote = indicators[0]
-    candles = []
-    for i, ts in enumerate(timestamps):
-        o = quote.get('open', [None])[i]
-        h = quote.get('high', [None])[i]
-        l = quote.get('low', [None])[i]
-        c = quote.get('close', [None])[i]
-        v = quote.get('volume', [None])[i]
-        # skip if data missing
-        if o is None or c is None:
-            continue
-        candles.append({
-            'timestamp': int(ts),
-            'open': float(o),
-            'high': float(h),
-            'low': float(l),
-            'close': float(c),
-            'volume': int(v) if v is not None else None
-        })
-    return candles
+        return Candles.empty()
+    return Candles.from_quote(timestamps, indicators[0])
+
+def _fetch_chart(symbol: str, interval: str, session: 'requests.Session' = None, **window) -> Candles:
+    """Query the chart API for an already-normalized symbol; `window` is range=... or period1=/period2=."""
+    query = '&'.join(f"{k}={v}" for k, v in window.items())
+    url = f"{YAHOO_CHART_URL}/{symbol}?{query}&interval={interval}"
+    resp = _get_with_retry(url, session=session)
+    if resp.status_code != 200:
+        raise Exception(f"Yahoo Finance request failed: {resp.status_code} {resp.text}")
+    return _parse_chart(resp.json())
+
+def _range_start(range: str, now: float) -> Optional[int]:
+    """Epoch seconds where a Yahoo `range` window starts; None for 'max' (unbounded)."""
+    if range == 'ytd':
+        return int(datetime.datetime(datetime.datetime.utcfromtimestamp(now).year, 1, 1).timestamp())
+    if range in _RANGE_SECONDS:
+        return int(now - _RANGE_SECONDS[range])
+    return None
+
+@tool(name='Market Data Fetcher', description='Fetch OHLC from Yahoo Finance')
+def fetch_ohlc(symbol: str, range: str = '1mo', interval: str = '1d', session: 'requests.Session' = None,
+               columnar: bool = False) -> Union[List[Dict[str, Any]], Candles]:
+    """Fetch OHLC data for `symbol` using Yahoo Finance chart API.
+    Returns a list of candles: {timestamp, open, high, low, close, volume}
+    (or a columnar Candles object when `columnar=True`).
+    """
+    candles = _fetch_chart(_normalize_symbol(symbol), interval, session=session, range=range)
+    return candles if columnar else candles.to_records()
+
+_default_store = None
+
+def _get_store() -> CandleStore:
+    global _default_store
+    with _session_lock:
+        if _default_store is None:
+            _default_store = CandleStore()
+        return _default_store
+
+@tool(name='Cached Market Data Fetcher', description='Fetch OHLC through the local candle cache')
+def fetch_ohlc_cached(symbol: str, range: str = '1mo', interval: str = '1d', store: CandleStore = None,
+                      session: 'requests.Session' = None, columnar: bool = False) -> Union[List[Dict[str, Any]], Candles]:
+    """Same contract as fetch_ohlc, but served from the local CandleStore.
+    If the cached series already covers the start of the window only bars from the last cached
+    timestamp onwards are requested (the last bar is re-fetched since it may still be forming);
+    a series refreshed less than one bar interval ago is returned without any network call.
+    Intraday windows are clamped to the store's TTL, since older bars are evicted anyway.
+    """
+    store = store or _get_store()
+    symbol = _normalize_symbol(symbol)
+    now = time.time()
+    start = _range_start(range, now)
+    if interval in INTRADAY_INTERVALS and store.intraday_ttl:
+        floor = int(now - store.intraday_ttl)
+        start = floor if start is None else max(start, floor)
+    covered_from, fetched_at = store.meta(symbol, interval)
+    _, last = store.bounds(symbol, interval)
+    covered = last is not None and covered_from is not None and covered_from <= (start if start is not None else 0)
+    if covered and fetched_at is not None and now - fetched_at < _INTERVAL_SECONDS.get(interval, 60):
+        return store.load(symbol, interval, start_ts=start, columnar=columnar)
+    if covered:
+        candles = _fetch_chart(symbol, interval, session=session, period1=int(last), period2=int(now))
+    else:
+        candles = _fetch_chart(symbol, interval, session=session, range=range)
+    store.upsert(symbol, interval, candles)
+    store.mark_fetched(symbol, interval, covered_from=start if start is not None else 0, fetched_at=now)
+    if interval in INTRADAY_INTERVALS:
+        store.evict(now)
+    return store.load(symbol, interval, start_ts=start, columnar=columnar)
+
+class OHLCBatch(dict):
+    """{symbol: candles} dict as consumed by generate_signals; failed symbols are listed in `.errors`."""
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.errors: Dict[str, str] = {}
+
+@tool(name='Market Data Batch Fetcher', description='Fetch OHLC for many symbols concurrently from Yahoo Finance')
+def fetch_ohlc_many(symbols: Iterable[str], range: str = '1mo', interval: str = '1d', max_workers: int = 8,
+                    store: CandleStore = None, columnar: bool = False) -> OHLCBatch:
+    """Fetch OHLC for every symbol over a bounded thread pool sharing one connection pool.
+    Pass a CandleStore to go through fetch_ohlc_cached (tail top-up only).
+    Returns an OHLCBatch keyed by the symbols as passed in; symbols that failed after retries
+    are omitted from the dict and reported in `batch.errors` as {symbol: error message}.
+    """
+    symbols = list(dict.fromkeys(symbols))
+    batch = OHLCBatch()
+    if not symbols:
+        return batch
+    workers = max(1, min(max_workers, len(symbols)))
+    session = _get_session(pool_size=max(16, workers))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        if store is not None:
+            futures = {sym: pool.submit(fetch_ohlc_cached, sym, range, interval, store, session, columnar) for sym in symbols}
+        else:
+            futures = {sym: pool.submit(fetch_ohlc, sym, range, interval, session, columnar) for sym in symbols}
+        for sym, fut in futures.items():
+            try:
+                batch[sym] = fut.result()
+            except Exception as e:
+                batch.errors[sym] = str(e)
+    return batch
+
+@tool(name='Multi-Timeframe Data Fetcher', description='Fetch base bars once and resample them to several timeframes')
+def fetch_timeframes(symbols: Iterable[str], timeframes: Iterable[str] = ('5m', '15m', '1h'), range: str = '1mo',
+                     base: str = None, book: TimeframeBook = None, store: CandleStore = None,
+                     max_workers: int = 8) -> TimeframeBook:
+    """Download only the base interval (default: the finest of `timeframes`) through fetch_ohlc_many and derive
+    the other timeframes locally. Pass the previous `book` back in to top it up: only bars from each symbol's
+    last base bar onwards are merged, so the open aggregated bars are updated incrementally. Yahoo serves 1m
+    bars for the last 7 days and other intraday intervals for 60 days; `range` must fit the base interval.
+    `timeframes` only shapes a new book. Failed symbols are reported in `book.errors`."""
+    timeframes = list(timeframes)
+    base = base or (book.base if book is not None else min(timeframes, key=timeframe_seconds))
+    if base not in _INTERVAL_SECONDS:
+        raise ValueError(f"base interval {base!r} is not a Yahoo chart interval")
+    if book is None:
+        book = TimeframeBook(base, timeframes)
+    elif book.base != base:
+        raise ValueError(f"book holds {book.base!r} base bars, not {base!r}")
+    batch = fetch_ohlc_many(symbols, range=range, interval=base, max_workers=max_workers, store=store, columnar=True)
+    for sym, candles in batch.items():
+        last = book.last_timestamp(sym)
+        if last is not None:
+            candles = candles.sorted()
+            candles = candles[int(candles.timestamp.searchsorted(last)):]
+        book.update(sym, candles)
+    book.errors = batch.errors
+    return book
 
 if __name__ == '__main__':
     # quick demo
     print(fetch_ohlc('RELIANCE.NS', range='1mo', interval='1d')[:3])
+    many = fetch_ohlc_many(['RELIANCE', 'TCS', 'INFY'])
+    print({s: len(c) for s, c in many.items()}, many.errors)
@@ -0,0 +1,283 @@
+
+"""market_replay.py
+
+Deterministic event-driven market replay: recorded bars (or ticks folded into bars) go through the streaming
+signal stage, risk sizing and a simulated exchange with latency, slippage, partial fills and queue priority.
+Classes:
+- ConstantLatency(seconds), LogNormalLatency(median=0.05, sigma=0.5, floor=0.001) -> sample(rng) seconds
+- FixedSlippage(bps=5.0), ImpactSlippage(half_spread_bps=2.0, impact=0.5, noise_bps=0.0) -> fill price models
+- MarketReplay(data, params=None, account_equity=100000, ...) -> run() -> results dict
+
+Functions:
+- bars_from_ticks(ticks, interval_seconds=60) -> {symbol: Candles} via tick_ingestion.BarAggregator
+- latency_sweep(data, latencies, **kwargs) -> [{latency, pnl, shortfall_bps, fill_rate}, ...]
+
+Event loop: one heap of (sim_time, seq, kind, payload); seq breaks ties in insertion order, and every random
+draw comes from one random.Random(seed), so a given seed always replays identically. Per symbol only the
+next bar close is on the heap. At a bar close the resting orders for that symbol are matched against the
+bar first (FIFO in arrival order, sharing max_participation * bar volume; an order that arrived mid-bar only
+sees the rest of the bar, at a price interpolated from open to close), then the bar goes to
+StreamingSignal, candidates are sized with `risk_fn` (risk_manager.validate_trades by default) and the order
+reaches the exchange after decision + order latency. Fill reports reach the strategy after report latency and
+update positions (ledger.Position) and cash. Unfilled remainders are cancelled after order_ttl_bars bars.
+speed=None runs as fast as possible; speed=N paces the replay at N x real time.
+"""
+from typing import List, Dict, Any, Callable, Iterable, Optional, Union
+import heapq, math, random, time
+import numpy as np
+from scripts.candles import Candles, as_candles
+from scripts.streaming_indicators import StreamingSignal
+from scripts.risk_manager import validate_trades
+from scripts.ledger import Position
+
+class ConstantLatency:
+    def __init__(self, seconds: float = 0.05):
+        self.seconds = seconds
+
+    def sample(self, rng: random.Random) -> float:
+        return self.seconds
+
+class LogNormalLatency:
+    def __init__(self, median: float = 0.05, sigma: float = 0.5, floor: float = 0.001):
+        self.median, self.sigma, self.floor = median, sigma, floor
+
+    def sample(self, rng: random.Random) -> float:
+        return max(self.floor, self.median * math.exp(self.sigma * rng.gauss(0.0, 1.0)))
+
+class FixedSlippage:
+    def __init__(self, bps: float = 5.0):
+        self.bps = bps
+
+    def price(self, side: int, ref: float, qty: float, bar: Dict[str, float], rng: random.Random) -> float:
+        return ref * (1 + side * self.bps / 1e4)
+
+class ImpactSlippage:
+    """Half spread plus square-root market impact: impact * bar range / close * sqrt(qty / bar volume)."""
+    def __init__(self, half_spread_bps: float = 2.0, impact: float = 0.5, noise_bps: float = 0.0):
+        self.half_spread_bps, self.impact, self.noise_bps = half_spread_bps, impact, noise_bps
+
+    def price(self, side: int, ref: float, qty: float, bar: Dict[str, float], rng: random.Random) -> float:
+        cost = self.half_spread_bps / 1e4
+        vol = bar['volume']
+        if vol > 0 and bar['close'] > 0:
+            cost += self.impact * (bar['high'] - bar['low']) / bar['close'] * math.sqrt(qty / vol)
+        if self.noise_bps:
+            cost += rng.gauss(0.0, self.noise_bps / 1e4)
+        return ref * (1 + side * cost)
+
+def bars_from_ticks(ticks: Iterable[Dict[str, Any]], interval_seconds: int = 60) -> Dict[str, Candles]:
+    """Fold normalized ticks ({symbol, timestamp, price, qty|cum_volume}) into bars, one Candles per symbol."""
+    from scripts.tick_ingestion import BarAggregator
+    agg = BarAggregator(interval_seconds, max_bars=None)
+    for t in ticks:
+        agg.on_tick(t)
+    agg.flush()
+    return {s: Candles.from_records(list(bars)) for s, bars in agg.history.items()}
+
+BAR, ARRIVE, REPORT = 0, 1, 2
+
+class MarketReplay:
+    def __init__(self, data: Dict[str, Union[List[Dict[str, Any]], Candles]], params: Dict[str, Any] = None,
+                 account_equity: float = 100000.0, interval: float = None, risk_fn: Callable = None,
+                 order_latency=None, decision_latency=None, report_latency=None, slippage=None,
+                 max_participation: float = 0.1, order_ttl_bars: int = 5, seed: int = 0, speed: float = None,
+                 on_fill: Callable[[Dict[str, Any]], None] = None):
+        self.data = {s: as_candles(c).sorted() for s, c in data.items() if c is not None and len(c)}
+        self.params = dict(params or {})
+        self.account_equity = float(account_equity)
+        self.interval = interval or self._infer_interval()
+        self.risk_fn = risk_fn or (lambda cands, equity: validate_trades(cands, account_equity=equity, params=self.params))
+        self.order_latency = order_latency or ConstantLatency(0.05)
+        self.decision_latency = decision_latency or ConstantLatency(0.0)
+        self.report_latency = report_latency or ConstantLatency(0.0)
+        self.slippage = slippage or FixedSlippage(5.0)
+        self.max_participation = max_participation
+        self.order_ttl_bars = order_ttl_bars
+        self.seed = seed
+        self.speed = speed
+        self.on_fill = on_fill
+
+    def _infer_interval(self) -> float:
+        for c in self.data.values():
+            if len(c) > 1:
+                return float(np.median(np.diff(c.timestamp)))
+        return 86400.0
+
+    # --- event loop ---
+    def _push(self, t: float, kind: int, payload):
+        self._seq += 1
+        heapq.heappush(self._heap, (t, self._seq, kind, payload))
+
+    def _equity(self) -> float:
+        return self.cash + sum(p.qty * (p.last_price or p.avg_cost) for p in self.positions.values())
+
+    def run(self) -> Dict[str, Any]:
+        self.rng = random.Random(self.seed)
+        self._heap, self._seq = [], 0
+        self.cash = self.account_equity
+        self.positions: Dict[str, Position] = {}
+        self.orders: Dict[str, Dict[str, Any]] = {}
+        self.resting: Dict[str, List[Dict[str, Any]]] = {s: [] for s in self.data}
+        self.signals = {s: StreamingSignal(s, self.params) for s in self.data}
+        self._in_flight = set()
+        self.events = 0
+        for s, c in self.data.items():
+            self._push(float(c.timestamp[0]) + self.interval, BAR, (s, 0))
+        wall0 = time.perf_counter()
+        sim0 = self._heap[0][0] if self._heap else 0.0
+        now = sim0
+        while self._heap:
+            now, _, kind, payload = heapq.heappop(self._heap)
+            self.events += 1
+            if self.speed:
+                lag = (now - sim0) / self.speed - (time.perf_counter() - wall0)
+                if lag > 0:
+                    time.sleep(lag)
+            if kind == BAR:
+                self._on_bar(now, *payload)
+            elif kind == ARRIVE:
+                self._in_flight.discard(payload['symbol'])
+                self.resting[payload['symbol']].append(payload)
+            else:
+                self._on_report(now, payload)
+        for rest in self.resting.values():
+            for o in rest:
+                self._finish(o, 'CANCELLED')
+        return self._results(time.perf_counter() - wall0, now - sim0)
+
+    def _on_bar(self, now: float, symbol: str, i: int):
+        c = self.data[symbol]
+        bar = {'timestamp': int(c.timestamp[i]), 'open': float(c.open[i]), 'high': float(c.high[i]),
+               'low': float(c.low[i]), 'close': float(c.close[i]), 'volume': float(c.volume[i])}
+        pos = self.positions.get(symbol)
+        if pos is not None:
+            pos.last_price = bar['close']
+        self._match(now, symbol, bar)
+        cand = self.signals[symbol].update(bar)
+        if cand is not None and cand['signal'] in ('BUY', 'SELL') and not self.resting[symbol] \
+                and symbol not in self._in_flight:
+            for order in self.risk_fn([cand], self._equity()):
+                decided = now + self.decision_latency.sample(self.rng)
+                arrive = decided + self.order_latency.sample(self.rng)
+                # sequential ids instead of the risk stage's random ones keep replays identical per seed
+                coid = f"{symbol}-SIM{len(self.orders) + 1:07d}"
+                o = {**order, 'client_order_id': coid, 'side_sign': 1 if order['side'] == 'BUY' else -1, 'decided_at': decided,
+                     'decision_price': order['price'], 'arrived_at': arrive, 'remaining': order['qty'],
+                     'filled_qty': 0, 'notional_filled': 0.0, 'bars_resting': 0, 'status': 'IN_FLIGHT',
+                     'order_id': f"SIM-{len(self.orders) + 1}", 'reported_qty': 0, 'reported_notional': 0.0, 'first_fill_at': None}
+                self.orders[o['client_order_id']] = o
+                self._in_flight.add(symbol)
+                self._push(arrive, ARRIVE, o)
+        if i + 1 < len(c):
+            self._push(float(c.timestamp[i + 1]) + self.interval, BAR, (symbol, i + 1))
+
+    def _match(self, now: float, symbol: str, bar: Dict[str, float]):
+        rest = self.resting[symbol]
+        if not rest:
+            return
+        start, end = float(bar['timestamp']), float(bar['timestamp']) + self.interval
+        liquidity = self.max_participation * bar['volume'] if bar['volume'] >= 0 else math.inf
+        used = 0.0
+        keep = []
+        for o in rest:
+            o['status'] = 'OPEN'
+            t0 = max(start, o['arrived_at'])
+            frac_elapsed = min(1.0, max(0.0, (t0 - start) / self.interval))
+            avail = liquidity * (1.0 - frac_elapsed) - used if liquidity != math.inf else math.inf
+            qty = min(o['remaining'], math.floor(max(0.0, avail)))
+            if qty > 0 and t0 < end:
+                ref = bar['open'] + (bar['close'] - bar['open']) * frac_elapsed
+                px = self.slippage.price(o['side_sign'], ref, qty, bar, self.rng)
+                used += qty
+                o['remaining'] -= qty
+                o['filled_qty'] += qty
+                o['notional_filled'] += qty * px
+                # the fill happens at t0 inside the bar; the report is delivered no earlier than the bar close
+                reported = t0 + self.report_latency.sample(self.rng)
+                if o['first_fill_at'] is None:
+                    o['first_fill_at'] = reported
+                self._push(max(now, reported), REPORT, (o, qty, px))
+            o['bars_resting'] += 1
+            if o['remaining'] <= 0:
+                o['status'] = 'FILLED'
+            elif o['bars_resting'] >= self.order_ttl_bars:
+                self._finish(o, 'CANCELLED')
+            else:
+                keep.append(o)
+        self.resting[symbol] = keep
+
+    def _on_report(self, now: float, payload):
+        o, qty, px = payload
+        dq = qty * o['side_sign']
+        pos = self.positions.get(o['symbol'])
+        if pos is None:
+            pos = self.positions[o['symbol']] = Position(o['symbol'])
+        pos.fill(dq, px)
+        self.cash -= dq * px
+        o['reported_qty'] += qty
+        o['reported_notional'] += qty * px
+        if self.on_fill is not None:
+            self.on_fill(self._result(o, reported=True))
+
+    def _finish(self, o: Dict[str, Any], status: str):
+        o['status'] = status if not o['filled_qty'] else ('PARTIAL' if o['remaining'] > 0 else 'FILLED')
+
+    def _result(self, o: Dict[str, Any], reported: bool = False) -> Dict[str, Any]:
+        """Execution result in the order_router format (cumulative filled_qty / avg_price); with reported=True
+        only the fills whose reports have reached the strategy so far."""
+        filled = o['reported_qty'] if reported else o['filled_qty']
+        notional = o['reported_notional'] if reported else o['notional_filled']
+        avg = round(notional / filled, 4) if filled else None
+        first = o['first_fill_at']
+        return {'client_order_id': o['client_order_id'], 'order_id': o['order_id'], 'symbol': o['symbol'],
+                'side': o['side'], 'qty': o['qty'], 'filled_qty': filled, 'avg_price': avg,
+                'notional': round(notional, 2), 'status': o['status'] if filled else 'CANCELLED',
+                'latency_ms': round((first - o['decided_at']) * 1000, 3) if first is not None else None}
+
+    def _results(self, wall: float, sim_seconds: float) -> Dict[str, Any]:
+        fills = [self._result(o) for o in self.orders.values()]
+        lat = sorted(f['latency_ms'] for f in fills if f['latency_ms'] is not None)
+        pick = lambda q: lat[min(len(lat) - 1, int(q * len(lat)))] if lat else None
+        # implementation shortfall vs. the decision price, signed so that positive = cost, quantity-weighted
+        num = sum(o['side_sign'] * (o['notional_filled'] - o['filled_qty'] * o['decision_price']) for o in self.orders.values())
+        den = sum(o['filled_qty'] * o['decision_price'] for o in self.orders.values())
+        ordered = sum(o['qty'] for o in self.orders.values())
+        realized = sum(p.realized for p in self.positions.values())
+        unrealized = sum(p.unrealized for p in self.positions.values())
+        return {'seed': self.seed, 'orders': len(self.orders), 'fills': fills,
+                'filled': sum(1 for f in fills if f['status'] == 'FILLED'),
+                'partial': sum(1 for f in fills if f['status'] == 'PARTIAL'),
+                'cancelled': sum(1 for f in fills if f['status'] == 'CANCELLED'),
+                'fill_rate': sum(o['filled_qty'] for o in self.orders.values()) / ordered if ordered else 0.0,
+                'shortfall_bps': 1e4 * num / den if den else 0.0,
+                'latency_ms': {'p50': pick(0.5), 'p95': pick(0.95), 'max': lat[-1] if lat else None},
+                'pnl': {'realized': realized, 'unrealized': unrealized, 'total': realized + unrealized},
+                'equity': self._equity(),
+                'positions': {s: p.to_dict() for s, p in self.positions.items() if p.qty},
+                'events': self.events, 'wall_s': wall, 'events_per_s': self.events / wall if wall else None,
+                'sim_seconds': sim_seconds, 'speedup': sim_seconds / wall if wall else None}
+
+def latency_sweep(data, latencies: Iterable[float], **kwargs) -> List[Dict[str, Any]]:
+    """Replay the same data and seed once per constant order latency (seconds)."""
+    out = []
+    for lat in latencies:
+        r = MarketReplay(data, order_latency=ConstantLatency(lat), **kwargs).run()
+        out.append({'latency': lat, 'pnl': r['pnl']['total'], 'shortfall_bps': r['shortfall_bps'],
+                    'fill_rate': r['fill_rate'], 'orders': r['orders']})
+    return out
+
+if __name__ == '__main__':
+    rng = np.random.default_rng(1)
+    n_bars, data = 2000, {}
+    ts = 1_700_000_000 + 60 * np.arange(n_bars)
+    for i in range(20):
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.002, n_bars)))
+        open_ = np.r_[close[0], close[:-1]]
+        data[f'SYM{i}.NS'] = Candles(ts, open_, np.maximum(open_, close) * 1.001, np.minimum(open_, close) * 0.999,
+                                     close, rng.integers(500, 5000, n_bars))
+    sim = MarketReplay(data, params={'sma_short': 5, 'sma_long': 20}, order_latency=LogNormalLatency(0.2, 0.5),
+                       slippage=ImpactSlippage(), seed=7)
+    res = sim.run()
+    print({k: v for k, v in res.items() if k not in ('fills', 'positions')})
+    for row in latency_sweep(data, [0.0, 1.0, 10.0, 30.0], params={'sma_short': 5, 'sma_long': 20}, seed=7):
+        print(row)
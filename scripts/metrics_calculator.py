@@ -1,18 +1,276 @@
 
-import pandas as pd
-import math
+import numpy as np
+from collections import deque
+import csv, hashlib, json, math, os, threading
+from scripts.runtime import lazy_import
+
+pd = lazy_import('pandas')  # only the full-CSV path needs it
+
+DEFAULT_SIZING = {"max_position_pct": 0.05, "risk_per_trade_pct": 0.01}
+FINGERPRINT_BYTES = 4096  # sampled from the start of the file and just before the sync offset
+
+def summarize_returns(pnl_pct):
+    """sharpe / win_rate / avg_return for one strategy's per-trade returns (same formulas as the CSV path).
+    NaN returns (trades without an exit price) are skipped by the mean/std, as pandas does, but still count
+    towards the trade total used for win_rate and the sqrt(n) scaling."""
+    pnl_pct = np.asarray(pnl_pct, dtype=float)
+    n = len(pnl_pct)
+    valid = pnl_pct[~np.isnan(pnl_pct)]
+    avg_return = np.nanmean(valid) if len(valid) else math.nan
+    win_rate = (pnl_pct > 0).sum() / max(1, n)
+    std = np.nanstd(valid, ddof=1) if len(valid) > 1 else math.nan
+    sharpe = (avg_return / (std + 1e-6)) * math.sqrt(n)
+    return {"sharpe": sharpe, "win_rate": win_rate, "avg_return": avg_return, **DEFAULT_SIZING}
+
+def _floats(values):
+    """float array; blank CSV fields become NaN"""
+    try:
+        return np.asarray(values, dtype=float)
+    except (TypeError, ValueError):
+        return np.array([math.nan if v is None or v == "" else v for v in values], dtype=float)
+
+def trade_returns(price, exit_price, qty):
+    """per-trade return as used by the metrics: ((exit - entry) / entry) * qty"""
+    price = _floats(price)
+    return ((_floats(exit_price) - price) / price) * _floats(qty)
 
 def compute_strategy_metrics(log_path="logs/trade_history.csv"):
-    """Compute performance metrics per strategy from trade history"""
+    """Compute performance metrics per strategy from trade history.
+    `log_path` may also be a TradeStore directory (trade_store.py), which is aggregated in bounded memory."""
+    if os.path.isdir(log_path):
+        from scripts.trade_store import TradeStore  # trade_store builds on this module
+        return TradeStore(log_path).strategy_metrics()
     if not pd.io.common.file_exists(log_path):
         return {}
     df = pd.read_csv(log_path)
     metrics = {}
     for strat, g in df.groupby("strategy"):
-        pnl_pct = ((g["exit_price"] - g["price"]) / g["price"]) * g["qty"]
-        avg_return = pnl_pct.mean()
-        win_rate = (pnl_pct > 0).sum() / max(1, len(pnl_pct))
-        sharpe = (avg_return / (pnl_pct.std() + 1e-6)) * math.sqrt(len(pnl_pct))
-        metrics[strat] = {"sharpe": sharpe, "win_rate": win_rate, "avg_return": avg_return,
-                          "max_position_pct": 0.05, "risk_per_trade_pct": 0.01}
+        metrics[strat] = summarize_returns(trade_returns(g["price"], g["exit_price"], g["qty"]))
     return metrics
+
+class RunningStats:
+    """Welford mean/variance + win count for one strategy, plus an optional rolling window (running sums).
+    `n` counts valid returns; NaN returns only bump `skipped` (see summarize_returns)."""
+    __slots__ = ("n", "skipped", "mean", "m2", "wins", "window", "recent", "r_sum", "r_sumsq", "r_wins")
+
+    def __init__(self, window=None):
+        self.n, self.skipped, self.mean, self.m2, self.wins = 0, 0, 0.0, 0.0, 0
+        self.window = window
+        self.recent = deque(maxlen=window) if window else None
+        self.r_sum, self.r_sumsq, self.r_wins = 0.0, 0.0, 0
+
+    @property
+    def count(self):
+        """trades seen, including those without a valid return"""
+        return self.n + self.skipped
+
+    def add(self, x):
+        if math.isnan(x):
+            self.skipped += 1
+            return
+        self.n += 1
+        d = x - self.mean
+        self.mean += d / self.n
+        self.m2 += d * (x - self.mean)
+        self.wins += x > 0
+        if self.recent is not None:
+            self._push_recent(x)
+
+    def add_many(self, xs):
+        """Fold a batch in at once: the batch's mean/M2 are merged into the running ones (Chan et al.),
+        so streaming a long history chunk by chunk gives the same metrics as add() per trade."""
+        xs = np.asarray(xs, dtype=float)
+        nan = np.isnan(xs)
+        if nan.any():
+            self.skipped += int(nan.sum())
+            xs = xs[~nan]
+        k = len(xs)
+        if not k:
+            return
+        mean_b = xs.mean()
+        m2_b = float(((xs - mean_b) ** 2).sum())
+        n = self.n + k
+        d = mean_b - self.mean
+        self.mean += d * k / n
+        self.m2 += m2_b + d * d * self.n * k / n
+        self.n = n
+        self.wins += int((xs > 0).sum())
+        if self.recent is not None:
+            for x in xs[-self.window:].tolist():
+                self._push_recent(x)
+
+    def _push_recent(self, x):
+        if len(self.recent) == self.window:
+            old = self.recent[0]
+            self.r_sum -= old
+            self.r_sumsq -= old * old
+            self.r_wins -= old > 0
+        self.recent.append(x)
+        self.r_sum += x
+        self.r_sumsq += x * x
+        self.r_wins += x > 0
+
+    def metrics(self, rolling=False):
+        if rolling and self.recent is not None:
+            n = len(self.recent)
+            avg = self.r_sum / n if n else math.nan
+            var = max(0.0, (self.r_sumsq - n * avg * avg) / (n - 1)) if n > 1 else math.nan
+            wins = self.r_wins
+        else:
+            avg, wins = (self.mean if self.n else math.nan), self.wins
+            var = self.m2 / (self.n - 1) if self.n > 1 else math.nan
+            n = self.count
+        sharpe = (avg / (math.sqrt(var) + 1e-6)) * math.sqrt(n)
+        return {"sharpe": sharpe, "win_rate": wins / max(1, n), "avg_return": avg, **DEFAULT_SIZING}
+
+    def to_dict(self):
+        return {"n": self.n, "skipped": self.skipped, "mean": self.mean, "m2": self.m2, "wins": self.wins,
+                "recent": list(self.recent) if self.recent is not None else None}
+
+    @classmethod
+    def from_dict(cls, d, window=None):
+        s = cls(window)
+        s.n, s.mean, s.m2, s.wins = d["n"], d["mean"], d["m2"], d["wins"]
+        s.skipped = d.get("skipped", 0)
+        for x in (d.get("recent") or [])[-window:] if window else []:
+            s.recent.append(x)
+            s.r_sum += x
+            s.r_sumsq += x * x
+            s.r_wins += x > 0
+        return s
+
+def file_fingerprint(f, offset):
+    """sha1 over the first and the last FINGERPRINT_BYTES before `offset` of an open binary file: if it still
+    matches, the bytes already consumed were not rewritten and reading can resume at `offset`."""
+    f.seek(0)
+    head = f.read(min(offset, FINGERPRINT_BYTES))
+    f.seek(max(0, offset - FINGERPRINT_BYTES))
+    tail = f.read(min(offset, FINGERPRINT_BYTES))
+    return hashlib.sha1(head + b"\0" + tail).hexdigest()
+
+class StrategyMetricsStore:
+    """Per-strategy running aggregates over trade_history.csv, persisted as JSON next to the log.
+    `sync()` reads only the bytes appended since the last call. A fingerprint of the consumed bytes is kept
+    with the offset, so a truncated or rewritten file (even a larger one) triggers a rebuild. Writers that
+    append in-process call `trades_logged` and the rows are folded in without being re-read."""
+
+    def __init__(self, log_path="logs/trade_history.csv", state_path=None, window=None):
+        self.log_path = log_path
+        suffix = f".w{window}" if window else ""
+        self.state_path = state_path or os.path.splitext(log_path)[0] + f".metrics{suffix}.json"
+        self.window = window
+        self.stats = {}
+        self.offset = 0
+        self.header = None
+        self.fingerprint = None
+        self._lock = threading.RLock()
+        if os.path.exists(self.state_path):
+            self._load()
+
+    def _load(self):
+        with open(self.state_path) as f:
+            state = json.load(f)
+        if state.get("window") != self.window:
+            return  # different rolling window: rebuild on next sync
+        self.offset, self.header, self.fingerprint = state["offset"], state["header"], state.get("fingerprint")
+        self.stats = {k: RunningStats.from_dict(v, self.window) for k, v in state["strategies"].items()}
+
+    def save(self):
+        with self._lock:
+            state = {"log_path": self.log_path, "offset": self.offset, "header": self.header,
+                     "fingerprint": self.fingerprint, "window": self.window,
+                     "strategies": {k: v.to_dict() for k, v in self.stats.items()}}
+        if os.path.dirname(self.state_path):
+            os.makedirs(os.path.dirname(self.state_path), exist_ok=True)
+        tmp = self.state_path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(state, f)
+        os.replace(tmp, self.state_path)
+
+    def record(self, strategy, price, exit_price, qty):
+        """Fold one closed trade in (use when trades are produced in-process rather than via the CSV)."""
+        x = float(trade_returns([price], [exit_price], [qty])[0])
+        with self._lock:
+            st = self.stats.get(strategy)
+            if st is None:
+                st = self.stats[strategy] = RunningStats(self.window)
+            st.add(x)
+
+    def _reset(self):
+        self.stats, self.offset, self.header, self.fingerprint = {}, 0, None, None
+
+    def rebuild(self):
+        """Drop the aggregates and re-read the CSV from the start."""
+        with self._lock:
+            self._reset()
+            return self.sync()
+
+    def sync(self):
+        """Consume complete rows appended to the CSV since the last sync. Returns number of trades added."""
+        with self._lock:
+            if not os.path.exists(self.log_path):
+                return 0
+            with open(self.log_path, "rb") as f:
+                size = os.fstat(f.fileno()).st_size
+                if self.offset and (size < self.offset or file_fingerprint(f, self.offset) != self.fingerprint):
+                    self._reset()  # truncated or replaced since the last sync
+                f.seek(self.offset)
+                chunk = f.read()
+                end = chunk.rfind(b"\n") + 1  # leave a partially written last line for next time
+                if end == 0:
+                    return 0
+                self.fingerprint = file_fingerprint(f, self.offset + end)
+            lines = chunk[:end].decode().splitlines()
+            reader = csv.reader(lines)
+            if self.header is None:
+                self.header = next(reader)
+            idx = {c: i for i, c in enumerate(self.header)}
+            added = 0
+            for row in reader:
+                if not row:
+                    continue
+                self.record(row[idx["strategy"]], row[idx["price"]], row[idx["exit_price"]], row[idx["qty"]])
+                added += 1
+            self.offset += end
+            self.save()
+            return added
+
+    def append_logged(self, trades, start, end):
+        """Fold `trades` that were just written to the CSV at bytes [start, end). If this store had not
+        consumed exactly up to `start` (or has no header yet) it falls back to sync()."""
+        with self._lock:
+            if self.header is None or self.offset != start or not os.path.exists(self.log_path):
+                return self.sync()
+            with open(self.log_path, "rb") as f:
+                if start and file_fingerprint(f, start) != self.fingerprint:
+                    return self.sync()
+                fingerprint = file_fingerprint(f, end)
+            for t in trades:
+                self.record(t.get("strategy"), t.get("price"), t.get("exit_price"), t.get("qty"))
+            self.offset, self.fingerprint = end, fingerprint
+            self.save()
+            return len(trades)
+
+    def metrics(self, rolling=False):
+        """Same dict shape as compute_strategy_metrics; O(number of strategies)."""
+        with self._lock:
+            return {k: v.metrics(rolling) for k, v in self.stats.items()}
+
+def cached_strategy_metrics(log_path="logs/trade_history.csv", rolling_window=None, rolling=False):
+    """Drop-in for compute_strategy_metrics backed by a persisted StrategyMetricsStore."""
+    key = (log_path, rolling_window)
+    store = _stores.get(key)
+    if store is None:
+        store = _stores[key] = StrategyMetricsStore(log_path, window=rolling_window)
+    store.sync()
+    return store.metrics(rolling)
+
+def trades_logged(log_path, trades, start, end):
+    """Called by writers of trade_history.csv after appending `trades` at bytes [start, end): every metrics
+    store open on that file in this process is updated in place."""
+    path = os.path.abspath(log_path)
+    for store in list(_stores.values()):
+        if os.path.abspath(store.log_path) == path:
+            store.append_logged(trades, start, end)
+
+_stores = {}
@@ -1,22 +1,23 @@
+"""mock_agentx_orchestrator.py
 
-import time
-import random
+Local fallback for `agentx.AgentXOrchestrator`: runs the workflow graph for real with WorkflowExecutor
+(parallel nodes, memoized outputs) instead of simulating it.
+Classes:
+- AgentXOrchestrator(workflow_data, max_workers=8, tools=None)
+  - run(inputs=None) -> WorkflowExecutor result {workflow, status, outputs, nodes, ran, reused, elapsed_seconds}
+  - rerun(inputs=None, invalidate=()) -> partial re-execution within the same cycle
+"""
+from typing import Any, Callable, Dict, Iterable
+from scripts.workflow_executor import WorkflowExecutor
 
 class AgentXOrchestrator:
-    def __init__(self, workflow_data):
+    def __init__(self, workflow_data: Dict[str, Any], max_workers: int = 8, tools: Dict[str, Callable] = None):
         self.workflow_data = workflow_data
+        self.executor = WorkflowExecutor(workflow_data, max_workers=max_workers, tools=tools)
 
-    def run(self):
-        print("🧠 Simulating AgentX orchestration locally...")
-        time.sleep(1)
-        print("📡 Fetching live data and running sentiment model...")
-        time.sleep(1.5)
-        print("💹 Generating trade recommendation...")
-        time.sleep(1)
+    def run(self, inputs: Dict[str, Any] = None) -> Dict[str, Any]:
+        print(f"🧠 Running workflow '{self.executor.workflow.name}' locally ({len(self.executor.workflow.nodes)} nodes)...")
+        return self.executor.run(inputs)
 
-        return {
-            "status": "success",
-            "recommendation": random.choice(["BUY", "HOLD", "SELL"]),
-            "confidence": round(random.uniform(0.7, 0.95), 2),
-            "summary": "The AI agent analyzed market data and sentiment to produce a recommendation."
-        }
+    def rerun(self, inputs: Dict[str, Any] = None, invalidate: Iterable[str] = ()) -> Dict[str, Any]:
+        return self.executor.rerun(inputs, invalidate)
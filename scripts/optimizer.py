@@ -0,0 +1,275 @@
+
+"""optimizer.py
+
+Grid / random parameter search and walk-forward optimization over the backtester, fanned out to a process pool.
+Functions:
+- grid(space) -> list of param dicts (cartesian product of {name: [values]})
+- random_params(space, n, seed=0) -> list of n param dicts sampled from {name: [values]}
+- evaluate(data, param_sets, strategy='momentum', max_workers=None, cache_path=None) -> [(params, metrics)]
+- walk_forward(data, param_sets, n_splits=4, train_frac=0.7, ...) -> out-of-sample metrics + chosen params per fold
+- optimize(data, spaces, ...) -> strategy_metrics dict for ai_strategy_agent.select_strategy
+
+Candle arrays are packed once into shared memory; workers attach to them and build zero-copy Candles views, so
+a task only pickles its parameter dict and time window. Results are cached by a hash of (data, params, window,
+strategy), in memory and optionally in a JSON file, so repeated sweeps only run new combinations.
+"""
+from typing import Dict, Any, List, Tuple, Iterable, Optional
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import hashlib, itertools, json, os, random, datetime
+import numpy as np
+from scripts.candles import Candles, as_candles
+from scripts.backtester import backtest
+from scripts.metrics_calculator import summarize_returns, trade_returns
+from scripts.signal_generator import _read_params
+
+_FIELDS = ('open', 'high', 'low', 'close')
+
+# --- parameter spaces ---
+def grid(space: Dict[str, List[Any]]) -> List[Dict[str, Any]]:
+    names = list(space)
+    return [dict(zip(names, combo)) for combo in itertools.product(*(space[n] for n in names))]
+
+def random_params(space: Dict[str, List[Any]], n: int, seed: int = 0) -> List[Dict[str, Any]]:
+    rnd = random.Random(seed)
+    seen, out = set(), []
+    total = 1
+    for v in space.values():
+        total *= len(v)
+    while len(out) < min(n, total):
+        p = {k: rnd.choice(v) for k, v in space.items()}
+        key = json.dumps(p, sort_keys=True, default=str)
+        if key not in seen:
+            seen.add(key)
+            out.append(p)
+    return out
+
+def perf_score(metrics: Dict[str, Any]) -> float:
+    """Same weighting select_strategy uses to rank strategies (NaN sharpe counts as 0)."""
+    sharpe = metrics.get('sharpe', 0.0)
+    sharpe = 0.0 if sharpe is None or sharpe != sharpe else sharpe
+    avg_ret = metrics.get('avg_return', 0.0)
+    avg_ret = 0.0 if avg_ret is None or avg_ret != avg_ret else avg_ret
+    return 0.6 * sharpe + 0.3 * metrics.get('win_rate', 0.5) + 0.1 * avg_ret
+
+# --- shared-memory candle panel ---
+class SharedCandles:
+    """Packs {symbol: Candles} into two shared-memory blocks (int64 timestamps, float64 OHLC)."""
+
+    def __init__(self, data: Dict[str, Any]):
+        data = {s: as_candles(c).sorted() for s, c in data.items() if c is not None and len(c)}
+        self.layout = []
+        offset = 0
+        for s, c in data.items():
+            self.layout.append((s, offset, len(c)))
+            offset += len(c)
+        total = max(offset, 1)
+        self._ts = shared_memory.SharedMemory(create=True, size=total * 8)
+        self._px = shared_memory.SharedMemory(create=True, size=total * 8 * len(_FIELDS))
+        ts = np.ndarray((total,), dtype=np.int64, buffer=self._ts.buf)
+        px = np.ndarray((len(_FIELDS), total), dtype=np.float64, buffer=self._px.buf)
+        h = hashlib.sha1()
+        for s, off, n in self.layout:
+            c = data[s]
+            ts[off:off + n] = c.timestamp
+            for k, f in enumerate(_FIELDS):
+                px[k, off:off + n] = getattr(c, f)
+            h.update(s.encode())
+        h.update(ts.tobytes())
+        h.update(px.tobytes())
+        self.fingerprint = h.hexdigest()
+        del ts, px
+
+    @property
+    def handle(self):
+        return self._ts.name, self._px.name, self.layout
+
+    def close(self):
+        for shm in (self._ts, self._px):
+            shm.close()
+            shm.unlink()
+
+def _attach(handle) -> Tuple[Dict[str, Candles], list]:
+    ts_name, px_name, layout = handle
+    ts_shm = shared_memory.SharedMemory(name=ts_name)
+    px_shm = shared_memory.SharedMemory(name=px_name)
+    total = ts_shm.size // 8
+    ts = np.ndarray((total,), dtype=np.int64, buffer=ts_shm.buf)
+    px = np.ndarray((len(_FIELDS), total), dtype=np.float64, buffer=px_shm.buf)
+    data = {s: Candles._wrap(ts[o:o + n], *(px[k, o:o + n] for k in range(len(_FIELDS))),
+                             np.full(n, -1, dtype=np.int64)) for s, o, n in layout}
+    return data, [ts_shm, px_shm]
+
+_worker_data: Dict[str, Candles] = {}
+_worker_shm: list = []
+
+def _init_worker(handle):
+    global _worker_data, _worker_shm
+    _worker_data, _worker_shm = _attach(handle)
+
+def _window(data: Dict[str, Candles], start_ts: Optional[int], end_ts: Optional[int], warmup: int) -> Dict[str, Candles]:
+    """Zero-copy slice of each series to [start_ts, end_ts), keeping `warmup` earlier bars for the indicators."""
+    out = {}
+    for s, c in data.items():
+        lo = 0 if start_ts is None else int(np.searchsorted(c.timestamp, start_ts, side='left'))
+        hi = len(c) if end_ts is None else int(np.searchsorted(c.timestamp, end_ts, side='left'))
+        if hi > lo:
+            out[s] = c[max(0, lo - warmup):hi]
+    return out
+
+def _run_task(params: Dict[str, Any], start_ts: Optional[int], end_ts: Optional[int], strategy: str,
+              data: Dict[str, Candles] = None) -> Dict[str, Any]:
+    data = _worker_data if data is None else data
+    sma_short, sma_long, rsi_period = _read_params(params)[:3]
+    trades = backtest(_window(data, start_ts, end_ts, max(sma_short, sma_long, rsi_period + 1)), params, strategy)
+    if start_ts is not None:
+        first = datetime.datetime.utcfromtimestamp(int(start_ts)).isoformat()
+        trades = [t for t in trades if t['entry_timestamp'] >= first]
+    rets = trade_returns([t['price'] for t in trades], [t['exit_price'] for t in trades], [t['qty'] for t in trades])
+    metrics = {k: (None if isinstance(v, float) and v != v else float(v)) for k, v in summarize_returns(rets).items()}
+    metrics['trades'] = len(trades)
+    return metrics
+
+# --- result cache ---
+class ResultCache:
+    def __init__(self, path: str = None):
+        self.path = path
+        self.results: Dict[str, Dict[str, Any]] = {}
+        if path and os.path.exists(path):
+            with open(path) as f:
+                self.results = json.load(f)
+
+    @staticmethod
+    def key(fingerprint: str, params: Dict[str, Any], start_ts, end_ts, strategy: str) -> str:
+        blob = json.dumps({'data': fingerprint, 'params': params, 'window': [start_ts, end_ts], 'strategy': strategy},
+                          sort_keys=True, default=str)
+        return hashlib.sha1(blob.encode()).hexdigest()
+
+    def save(self):
+        if not self.path:
+            return
+        if os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp = self.path + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(self.results, f)
+        os.replace(tmp, self.path)
+
+def _evaluate_windows(shared: SharedCandles, local: Dict[str, Candles], jobs: List[Tuple[Dict[str, Any], Any, Any]],
+                      strategy: str, max_workers: Optional[int], cache: ResultCache) -> List[Dict[str, Any]]:
+    keys = [ResultCache.key(shared.fingerprint, p, s, e, strategy) for p, s, e in jobs]
+    todo = [(k, job) for k, job in zip(keys, jobs) if k not in cache.results]
+    todo = list({k: job for k, job in todo}.items())
+    if todo:
+        if max_workers == 1:
+            for k, (p, s, e) in todo:
+                cache.results[k] = _run_task(p, s, e, strategy, data=local)
+        else:
+            with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker, initargs=(shared.handle,)) as pool:
+                futures = {k: pool.submit(_run_task, p, s, e, strategy) for k, (p, s, e) in todo}
+                for k, fut in futures.items():
+                    cache.results[k] = fut.result()
+        cache.save()
+    return [cache.results[k] for k in keys]
+
+def evaluate(data: Dict[str, Any], param_sets: List[Dict[str, Any]], strategy: str = 'momentum', max_workers: int = None,
+             cache_path: str = None, start_ts: int = None, end_ts: int = None) -> List[Tuple[Dict[str, Any], Dict[str, Any]]]:
+    """Backtest every param set over [start_ts, end_ts). Returns [(params, metrics)] in input order.
+    max_workers=1 runs in-process (no pool, deterministic and easy to debug)."""
+    shared = SharedCandles(data)
+    try:
+        local, shms = _attach(shared.handle) if max_workers == 1 else ({}, [])
+        results = _evaluate_windows(shared, local, [(p, start_ts, end_ts) for p in param_sets], strategy, max_workers,
+                                    ResultCache(cache_path))
+        local.clear()
+        for shm in shms:
+            shm.close()
+    finally:
+        shared.close()
+    return list(zip(param_sets, results))
+
+def _fold_bounds(data: Dict[str, Any], n_splits: int, train_frac: float):
+    """Rolling walk-forward folds over the global time span: [(train_start, test_start, test_end)]."""
+    firsts = [int(as_candles(c).timestamp.min()) for c in data.values() if c is not None and len(c)]
+    lasts = [int(as_candles(c).timestamp.max()) for c in data.values() if c is not None and len(c)]
+    t0, t1 = min(firsts), max(lasts) + 1
+    span = (t1 - t0) / (n_splits * (1 - train_frac) + train_frac)
+    test_len = span * (1 - train_frac)
+    folds = []
+    for i in range(n_splits):
+        train_start = t0 + i * test_len
+        test_start = train_start + span * train_frac
+        folds.append((int(train_start), int(test_start), int(min(t1, test_start + test_len))))
+    return folds
+
+def walk_forward(data: Dict[str, Any], param_sets: List[Dict[str, Any]], n_splits: int = 4, train_frac: float = 0.7,
+                 strategy: str = 'momentum', max_workers: int = None, cache_path: str = None) -> Dict[str, Any]:
+    """For each fold pick the best param set on the train window (by perf_score), then score it on the
+    following test window. Returns {'metrics': pooled out-of-sample metrics, 'params': last chosen params,
+    'folds': [{train, test, params, train_metrics, test_metrics}]}."""
+    folds = _fold_bounds(data, n_splits, train_frac)
+    shared = SharedCandles(data)
+    cache = ResultCache(cache_path)
+    try:
+        local, shms = _attach(shared.handle) if max_workers == 1 else ({}, [])
+        # every (params, train window) pair goes out in one batch
+        train_jobs = [(p, tr, te) for tr, te, _ in folds for p in param_sets]
+        train_res = _evaluate_windows(shared, local, train_jobs, strategy, max_workers, cache)
+        chosen = []
+        for i, (tr, te, end) in enumerate(folds):
+            block = train_res[i * len(param_sets):(i + 1) * len(param_sets)]
+            best = max(range(len(param_sets)), key=lambda j: perf_score(block[j]))
+            chosen.append((param_sets[best], block[best]))
+        test_res = _evaluate_windows(shared, local, [(p, te, end) for (p, _), (_, te, end) in zip(chosen, folds)],
+                                     strategy, max_workers, cache)
+        local.clear()
+        for shm in shms:
+            shm.close()
+    finally:
+        shared.close()
+    out_folds = [{'train': [tr, te], 'test': [te, end], 'params': p, 'train_metrics': m, 'test_metrics': t}
+                 for (tr, te, end), (p, m), t in zip(folds, chosen, test_res)]
+    # pool out-of-sample folds, weighting each fold's average by its trade count
+    n = sum(t['trades'] for t in test_res)
+    pooled = {'trades': n}
+    if n:
+        pooled['avg_return'] = sum((t['avg_return'] or 0.0) * t['trades'] for t in test_res) / n
+        pooled['win_rate'] = sum(t['win_rate'] * t['trades'] for t in test_res) / n
+        sharpes = [t['sharpe'] for t in test_res if t['sharpe'] is not None]
+        pooled['sharpe'] = float(np.mean(sharpes)) if sharpes else 0.0
+    return {'metrics': pooled, 'params': chosen[-1][0] if chosen else {}, 'folds': out_folds}
+
+def optimize(data: Dict[str, Any], spaces: Dict[str, List[Dict[str, Any]]], walk_forward_splits: int = 0,
+             max_workers: int = None, cache_path: str = 'cache/optimizer_results.json') -> Dict[str, Dict[str, Any]]:
+    """Search each named strategy's param sets and return the `strategy_metrics` dict select_strategy consumes:
+    {name: {sharpe, win_rate, avg_return, max_position_pct, risk_per_trade_pct, params}}.
+    With walk_forward_splits > 0 the reported metrics are out-of-sample walk-forward results."""
+    strategy_metrics = {}
+    for name, param_sets in spaces.items():
+        if walk_forward_splits:
+            wf = walk_forward(data, param_sets, n_splits=walk_forward_splits, strategy=name,
+                              max_workers=max_workers, cache_path=cache_path)
+            best_params, m = wf['params'], wf['metrics']
+        else:
+            results = evaluate(data, param_sets, strategy=name, max_workers=max_workers, cache_path=cache_path)
+            best_params, m = max(results, key=lambda r: perf_score(r[1]))
+        strategy_metrics[name] = {'sharpe': m.get('sharpe') or 0.0, 'win_rate': m.get('win_rate', 0.5),
+                                  'avg_return': m.get('avg_return') or 0.0,
+                                  'max_position_pct': best_params.get('max_position_pct', 0.05),
+                                  'risk_per_trade_pct': best_params.get('risk_per_trade_pct', 0.01),
+                                  'params': best_params}
+    return strategy_metrics
+
+if __name__ == '__main__':
+    import time
+    rng = np.random.default_rng(0)
+    ts = np.arange(5000, dtype=np.int64) * 3600 + 1_700_000_000
+    data = {}
+    for i in range(50):
+        close = 1000 * np.exp(np.cumsum(rng.normal(0, 0.004, len(ts))))
+        data[f'SYM{i}.NS'] = Candles(ts, close, close * 1.002, close * 0.998, close)
+    spaces = {'momentum': grid({'sma_short': [5, 10, 20], 'sma_long': [30, 50, 100], 'rsi_period': [14]}),
+              'trend': random_params({'sma_short': [10, 15, 20, 30], 'sma_long': [60, 100, 150], 'rsi_upper': [70, 80]}, 6)}
+    t0 = time.perf_counter()
+    sm = optimize(data, spaces, walk_forward_splits=3, cache_path=None)
+    print(json.dumps(sm, indent=1), f"{time.perf_counter() - t0:.2f}s")
@@ -0,0 +1,203 @@
+
+"""order_router.py
+
+Concurrent order submission under broker rate limits, shared by the mock and live executors.
+Classes:
+- OrderRouter(broker, max_concurrency=8, rate_limit=10.0, max_retries=3, keep_results=100000)
+  -> submit_batch(orders) -> results
+- MockBroker(latency=0.05, fail_rate=0.0, seed=None) -> local fake broker using the mock fill model
+- KiteBroker(kite, exchange='NSE') -> adapter over a KiteConnect client
+- RetryableOrderError -> raised by brokers for transient failures (network, throttling)
+
+Results come back in input order and are correlated by `client_order_id`. Every submission carries the
+client id to the broker (Kite `tag`), so before a retry the router asks the broker whether the order
+already went through and never places it twice; re-submitting a known client_order_id returns the
+first result (for the last `keep_results` orders). Orders without a client_order_id get a generated one, so
+they are never deduplicated against each other. Per-order latency and attempt counts are recorded (`router.stats()`).
+"""
+from typing import List, Dict, Any, Optional
+from concurrent.futures import ThreadPoolExecutor
+import random, threading, time, uuid
+from scripts.trade_executor import simulate_fill
+
+class RetryableOrderError(Exception):
+    """Transient broker failure; the router checks for the order and retries with backoff."""
+
+class RateLimiter:
+    """Spaces out calls so no more than `rate` per second start, across all threads."""
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate and rate > 0 else 0.0
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next)
+            self._next = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+class MockBroker:
+    """In-process fake broker. Fills immediately via simulate_fill after `latency` seconds.
+    `fail_rate` injects RetryableOrderError; with `lost_ack_rate` the order is recorded but the
+    acknowledgement is lost, which exercises the idempotent-retry path."""
+
+    def __init__(self, latency: float = 0.05, fail_rate: float = 0.0, lost_ack_rate: float = 0.0, seed: int = None):
+        self.latency = latency
+        self.fail_rate = fail_rate
+        self.lost_ack_rate = lost_ack_rate
+        self.rng = random.Random(seed)
+        self.orders: Dict[str, Dict[str, Any]] = {}
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def submit(self, order: Dict[str, Any]) -> Dict[str, Any]:
+        if self.latency:
+            time.sleep(self.latency)  # simulate API latency
+        with self._lock:
+            self.calls += 1
+            roll = self.rng.random()
+            if roll < self.fail_rate:
+                raise RetryableOrderError('mock broker: transient failure')
+            filled_qty, avg_price = simulate_fill(order, self.rng)
+            ack = {'order_id': f"MOCK-{int(time.time()*1000)}-{len(self.orders)}", 'status': 'FILLED',
+                   'filled_qty': filled_qty, 'avg_price': avg_price}
+            self.orders[order['client_order_id']] = ack
+            if roll < self.fail_rate + self.lost_ack_rate:
+                raise RetryableOrderError('mock broker: acknowledgement lost')
+            return ack
+
+    def lookup(self, client_order_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            return self.orders.get(client_order_id)
+
+def kite_tag(client_order_id: str) -> str:
+    """Kite order tags are limited to 20 characters; keep the unique suffix."""
+    return str(client_order_id)[-20:]
+
+class KiteBroker:
+    """Adapter over a KiteConnect client. Network / throttling errors become RetryableOrderError."""
+
+    def __init__(self, kite, exchange: str = 'NSE', instruments=None):
+        if kite is None:
+            raise ValueError("kite client required")
+        self.kite = kite
+        self.exchange = exchange
+        self.instruments = instruments
+
+    @staticmethod
+    def _retryable(e: Exception) -> bool:
+        return type(e).__name__ in ('NetworkException', 'TimeoutError', 'ConnectionError', 'ReadTimeout') or \
+            getattr(e, 'code', None) == 429
+
+    def submit(self, order: Dict[str, Any]) -> Dict[str, Any]:
+        from scripts.trade_executor_live import kite_order_params
+        try:
+            order_id = self.kite.place_order(**kite_order_params(order, exchange=self.exchange, instruments=self.instruments))
+        except Exception as e:
+            if self._retryable(e):
+                raise RetryableOrderError(str(e)) from e
+            raise
+        return {'order_id': order_id, 'status': 'SUBMITTED'}
+
+    def lookup(self, client_order_id: str) -> Optional[Dict[str, Any]]:
+        tag = kite_tag(client_order_id)
+        for o in self.kite.orders():
+            if o.get('tag') == tag:
+                return {'order_id': o.get('order_id'), 'status': o.get('status', 'SUBMITTED'),
+                        'filled_qty': o.get('filled_quantity'), 'avg_price': o.get('average_price')}
+        return None
+
+class OrderRouter:
+    def __init__(self, broker, max_concurrency: int = 8, rate_limit: float = 10.0, max_retries: int = 3,
+                 backoff_base: float = 0.2, keep_results: int = 100_000):
+        self.broker = broker
+        self.max_concurrency = max_concurrency
+        self.limiter = RateLimiter(rate_limit)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.keep_results = keep_results
+        self.results: Dict[str, Dict[str, Any]] = {}
+        self._inflight: Dict[str, threading.Event] = {}
+        self._lock = threading.Lock()
+
+    def _submit_one(self, order: Dict[str, Any]) -> Dict[str, Any]:
+        coid = order.get('client_order_id')
+        if not coid:
+            coid = f"{order.get('symbol')}-{uuid.uuid4().hex[:8]}"
+            order = {**order, 'client_order_id': coid}
+        with self._lock:
+            if coid in self.results:
+                return self.results[coid]
+            waiter = self._inflight.get(coid)
+            if waiter is None:
+                self._inflight[coid] = threading.Event()
+        if waiter is not None:
+            # same client_order_id already in flight in this batch: wait for it instead of double-sending
+            waiter.wait()
+            return self.results[coid]
+        t0 = time.perf_counter()
+        attempts, ack, error = 0, None, None
+        while True:
+            attempts += 1
+            self.limiter.wait()
+            try:
+                ack = self.broker.submit(order)
+                break
+            except RetryableOrderError as e:
+                error = str(e)
+                ack = self.broker.lookup(coid)  # did it go through before the failure?
+                if ack is not None or attempts > self.max_retries:
+                    break
+                time.sleep(self.backoff_base * (2 ** (attempts - 1)))
+            except Exception as e:
+                error = str(e)
+                break
+        res = {'client_order_id': coid, 'symbol': order.get('symbol'), 'side': order.get('side'),
+               'attempts': attempts, 'latency_ms': round((time.perf_counter() - t0) * 1000, 3)}
+        if ack is not None:
+            res.update(ack)
+            if ack.get('filled_qty') is not None and ack.get('avg_price') is not None:
+                res['notional'] = round(ack['filled_qty'] * ack['avg_price'], 2)
+        else:
+            res.update({'order_id': None, 'status': 'ERROR', 'error': error})
+        with self._lock:
+            self.results[coid] = res
+            self._inflight.pop(coid).set()
+            while len(self.results) > self.keep_results:
+                self.results.pop(next(iter(self.results)))  # oldest first
+        return res
+
+    def submit_batch(self, orders: List[Dict[str, Any]], max_concurrency: int = None) -> List[Dict[str, Any]]:
+        """Submit all orders concurrently (bounded by max_concurrency and the rate limit).
+        Returns one result per input order, in input order."""
+        if not orders:
+            return []
+        workers = max(1, min(max_concurrency or self.max_concurrency, len(orders)))
+        if workers == 1:
+            return [self._submit_one(o) for o in orders]
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(self._submit_one, orders))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lat = sorted(r['latency_ms'] for r in self.results.values())
+            errors = sum(1 for r in self.results.values() if r['status'] == 'ERROR')
+            retries = sum(r['attempts'] - 1 for r in self.results.values())
+        if not lat:
+            return {'orders': 0}
+        pick = lambda q: lat[min(len(lat) - 1, int(q * len(lat)))]
+        return {'orders': len(lat), 'errors': errors, 'retries': retries, 'p50_ms': pick(0.5),
+                'p95_ms': pick(0.95), 'max_ms': lat[-1]}
+
+if __name__ == '__main__':
+    orders = [{'client_order_id': f'id{i}', 'symbol': 'RELIANCE.NS', 'side': 'BUY', 'qty': 1, 'price': 2600}
+              for i in range(40)]
+    router = OrderRouter(MockBroker(latency=0.05, fail_rate=0.1, lost_ack_rate=0.1, seed=0), rate_limit=100, backoff_base=0.01)
+    t0 = time.perf_counter()
+    results = router.submit_batch(orders)
+    print(f"{len(results)} orders in {time.perf_counter() - t0:.2f}s", router.stats(),
+          'broker orders', len(router.broker.orders))
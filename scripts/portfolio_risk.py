@@ -0,0 +1,329 @@
+
+"""portfolio_risk.py
+
+Portfolio-level risk engine: sizes a whole batch of signal candidates at once against the current book.
+Classes:
+- PortfolioRiskEngine(account_equity=None, sectors=None, max_gross_pct=1.0, max_net_pct=0.5, max_sector_pct=0.25,
+                      var_limit_pct=0.02, var_z=2.33, default_vol=0.02, instruments=None)
+
+Functions on PortfolioRiskEngine:
+- update_returns(data, window=60) -> cache the covariance of daily log returns from {symbol: candles}
+- validate_trades(candidates, params=None) -> orders (same dicts as risk_manager.validate_trades)
+- apply_fills(results) -> fold executions (order_router result dicts) into the book
+- release(orders) -> drop reservations for orders that will never fill
+- exposure() -> {gross, net, var, sectors, positions}
+
+Per batch, with NumPy over the book:
+- base size per candidate exactly as risk_manager.validate_trades (risk per trade, stop distance, max position),
+  rounded to whole lots and tick-size stops when `instruments` (a SymbolMaster) is given
+- name cap: a candidate may not push an existing position past max_position_pct of equity
+- gross / net / per-sector gross caps as fractions of equity
+- parametric VaR: var_z * sqrt(x' C x) of the signed exposure vector x, capped at var_limit_pct of equity
+
+Candidates are ranked by confidence and capped greedily in that order: sector, gross and net limits are
+applied as successive masks over ranked cumulative sums of each candidate's exposure change against the
+book, so the accepted set never breaches a cap and no Python loop runs over candidates. VaR is then evaluated on every prefix of the ranked batch at once and
+the batch is cut at the first candidate that raises VaR above the limit. Accepted orders reserve their
+exposure immediately; apply_fills replaces a reservation with the actual fill, so limits stay correct
+while orders are in flight. Only the highest-ranked candidate per symbol is considered in one batch.
+"""
+from typing import List, Dict, Any, Iterable, Union
+import os, time, uuid
+import numpy as np
+from scripts.candles import Candles
+from scripts.signal_generator import build_close_panel
+from scripts.symbol_master import round_qty, round_to_tick
+
+MIN_NOTIONAL = 1000.0  # same floor as risk_manager.validate_trades
+
+class PortfolioRiskEngine:
+    def __init__(self, account_equity: float = None, sectors: Dict[str, str] = None, max_gross_pct: float = 1.0,
+                 max_net_pct: float = 0.5, max_sector_pct: float = 0.25, var_limit_pct: float = 0.02,
+                 var_z: float = 2.33, default_vol: float = 0.02, capacity: int = 64, instruments=None):
+        if account_equity is None:
+            account_equity = float(os.getenv('DEFAULT_EQUITY', '100000'))
+        self.account_equity = float(account_equity)
+        self.sectors = dict(sectors or {})
+        self.max_gross_pct = max_gross_pct
+        self.max_net_pct = max_net_pct
+        self.max_sector_pct = max_sector_pct
+        self.var_limit_pct = var_limit_pct
+        self.var_z = var_z
+        self.default_vol = default_vol
+        self.instruments = instruments
+        self.returns_updated = None
+        self.last_check: Dict[str, Any] = {}
+        self._index: Dict[str, int] = {}
+        self._symbols: List[str] = []
+        self._sector_ids: Dict[str, int] = {}
+        self._sector_names: List[str] = []
+        self._working: Dict[str, tuple] = {}
+        self._alloc(capacity)
+        self.gross = 0.0
+        self.net = 0.0
+        self.q = 0.0  # x' C x
+
+    # --- book arrays ---
+    def _alloc(self, capacity: int):
+        old = getattr(self, 'pos', None)
+        n = 0 if old is None else len(old)
+        pos, px, x, sec = np.zeros(capacity), np.zeros(capacity), np.zeros(capacity), np.full(capacity, -1)
+        cov = np.diag(np.full(capacity, self.default_vol ** 2))
+        if old is not None:
+            pos[:n], px[:n], x[:n], sec[:n] = self.pos[:n], self.px[:n], self.x[:n], self.sec[:n]
+            cov[:n, :n] = self.cov[:n, :n]
+            sx = cov[:, :n] @ x[:n]
+        else:
+            sx = np.zeros(capacity)
+            self.sector_gross = np.zeros(8)
+        self.pos, self.px, self.x, self.sec, self.cov, self.sx = pos, px, x, sec, cov, sx
+
+    def _sector_id(self, symbol: str) -> int:
+        name = self.sectors.get(symbol)
+        if name is None:
+            return -1
+        sid = self._sector_ids.get(name)
+        if sid is None:
+            sid = self._sector_ids[name] = len(self._sector_names)
+            self._sector_names.append(name)
+            if sid >= len(self.sector_gross):
+                self.sector_gross = np.concatenate([self.sector_gross, np.zeros(len(self.sector_gross))])
+        return sid
+
+    def _idx(self, symbol: str) -> int:
+        i = self._index.get(symbol)
+        if i is None:
+            i = self._index[symbol] = len(self._symbols)
+            self._symbols.append(symbol)
+            if i >= len(self.pos):
+                self._alloc(2 * len(self.pos))
+            self.sec[i] = self._sector_id(symbol)
+        return i
+
+    def _apply(self, idx: np.ndarray, dq: np.ndarray, price: np.ndarray):
+        """Add quantity deltas at `price` for distinct book indices and update every aggregate incrementally."""
+        old = self.x[idx].copy()
+        self.pos[idx] += dq
+        self.px[idx] = price
+        new = self.pos[idx] * price
+        self.x[idx] = new
+        dx = new - old
+        self.sx += self.cov[:, idx] @ dx
+        self.q = float(self.x @ self.sx)
+        d_abs = np.abs(new) - np.abs(old)
+        self.gross += float(d_abs.sum())
+        self.net += float(dx.sum())
+        s = self.sec[idx]
+        has = s >= 0
+        if has.any():
+            np.add.at(self.sector_gross, s[has], d_abs[has])
+
+    def _var(self, q: Union[float, np.ndarray]):
+        return self.var_z * np.sqrt(np.maximum(q, 0.0))
+
+    # --- market data ---
+    def update_returns(self, data: Dict[str, Union[List[Dict[str, Any]], Candles]], window: int = 60):
+        """Replace the cached covariance with that of the last `window` daily log returns.
+        Pairs are estimated over the bars both symbols have; symbols without data keep default_vol."""
+        symbols, panel = build_close_panel(data, window + 1, min_len=3)
+        if not symbols:
+            return self
+        with np.errstate(invalid='ignore', divide='ignore'):
+            r = np.diff(np.log(panel), axis=0)
+        valid = np.isfinite(r)
+        r = np.where(valid, r - np.nanmean(np.where(valid, r, np.nan), axis=0), 0.0)
+        m = valid.astype(float)
+        cov = (r.T @ r) / np.maximum(m.T @ m - 1.0, 1.0)
+        idx = np.array([self._idx(s) for s in symbols])
+        self.cov[np.ix_(idx, idx)] = cov
+        n = len(self._symbols)
+        self.sx = np.zeros(len(self.pos))
+        self.sx[:n] = self.cov[:n, :n] @ self.x[:n]
+        self.q = float(self.x @ self.sx)
+        self.returns_updated = time.time()
+        return self
+
+    def mark(self, prices: Dict[str, float]):
+        """Revalue positions at new prices."""
+        idx = np.array([self._idx(s) for s in prices], dtype=int)
+        if len(idx):
+            self._apply(idx, np.zeros(len(idx)), np.array([float(p) for p in prices.values()]))
+
+    # --- checks ---
+    def validate_trades(self, candidates: List[Dict[str, Any]], params: Union[Dict[str, Any], List[Dict[str, Any]]] = None) -> List[Dict[str, Any]]:
+        t0 = time.perf_counter()
+        n = len(candidates)
+        if not n:
+            return []
+        eq = self.account_equity
+        if isinstance(params, list):
+            rpt = np.array([float((p or {}).get('risk_per_trade_pct', 0.02)) for p in params])
+            slp = np.array([float((p or {}).get('stop_loss_pct', 0.05)) for p in params])
+            mpp = np.array([float((p or {}).get('max_position_pct', 0.05)) for p in params])
+        else:
+            p = params or {}
+            rpt = float(p.get('risk_per_trade_pct', 0.02))
+            slp = float(p.get('stop_loss_pct', 0.05))
+            mpp = float(p.get('max_position_pct', 0.05))
+        index = self._index
+        syms = [c.get('symbol') for c in candidates]
+        idx = np.array([index[s] if s in index else self._idx(s) for s in syms], dtype=np.int64)
+        price = np.array([c.get('price') for c in candidates], dtype=float)
+        conf = np.array([c.get('confidence') or 0.0 for c in candidates], dtype=float)
+        sign = np.where(np.array([c.get('signal') == 'BUY' for c in candidates]), 1.0, -1.0)
+
+        # base sizing, identical to risk_manager.validate_trades
+        stop = price * slp
+        raw = np.floor(np.maximum(1.0, eq * rpt / stop))
+        max_notional = eq * mpp
+        qty = np.where(raw * price > max_notional, np.floor(np.maximum(1.0, max_notional // price)), raw)
+        stop_px = None  # tick-rounded stops (NaN where the tick size is unknown)
+        if self.instruments is not None:
+            tick, lot = self.instruments.tick_lot(syms)
+            qty = round_qty(qty, lot).astype(float)
+            stop_px = np.where(tick > 0, np.where(sign > 0, round_to_tick(price - stop, tick, 'up'),
+                                                  round_to_tick(price + stop, tick, 'down')), np.nan)
+        ok = (qty > 0) & (qty * price >= MIN_NOTIONAL)
+
+        # rank by confidence; keep the best candidate per symbol
+        rank = np.argsort(-conf, kind='stable')
+        first = np.zeros(n, dtype=bool)
+        first[rank[np.unique(idx[rank], return_index=True)[1]]] = True
+        ok &= first
+
+        reasons = {'size': int((~(qty * price >= MIN_NOTIONAL)).sum()), 'duplicate': int((~first).sum())}
+        r_idx, r_ok = idx[rank], ok[rank]
+        d = (sign * qty * price)[rank]
+        x0 = self.x[r_idx]
+        g = np.abs(x0 + d) - np.abs(x0)
+        name_ok = (x0 == 0) | (g <= 0) | (np.abs(x0 + d) <= max_notional if np.isscalar(max_notional) else np.abs(x0 + d) <= max_notional[rank])
+
+        # caps in stages, each over the survivors of the previous one. Within a stage the ranked cumulative
+        # exposure only grows, so the rejected candidates form a suffix and never count against earlier ones.
+        acc = r_ok & name_ok
+        inc = np.maximum(g, 0.0)
+        sec = self.sec[r_idx]
+        has = sec >= 0
+        if has.any():
+            gi = np.where(acc & has, inc, 0.0)
+            order = np.lexsort((np.arange(n), sec))  # by sector, then by rank
+            cs = np.cumsum(gi[order])
+            sec_sorted = sec[order]
+            start = np.r_[0, np.flatnonzero(sec_sorted[1:] != sec_sorted[:-1]) + 1]
+            base = np.repeat(cs[start] - gi[order][start], np.diff(np.r_[start, n]))
+            within = np.empty(n)
+            within[order] = cs - base
+            sector_ok = ~has | (g <= 0) | (self.sector_gross[np.maximum(sec, 0)] + within <= self.max_sector_pct * eq)
+        else:
+            sector_ok = np.ones(n, dtype=bool)
+        acc &= sector_ok
+        gross_ok = (g <= 0) | (self.gross + np.cumsum(np.where(acc, inc, 0.0)) <= self.max_gross_pct * eq)
+        acc &= gross_ok
+        # buys can only raise net and sells only lower it, so each side is checked against its own bound
+        net_cap = self.max_net_pct * eq
+        up = self.net + np.cumsum(np.where(acc, np.maximum(d, 0.0), 0.0))
+        down = self.net + np.cumsum(np.where(acc, np.minimum(d, 0.0), 0.0))
+        net_ok = np.where(d > 0, up <= net_cap, down >= -net_cap)
+        reasons.update(name=int((r_ok & ~name_ok).sum()), sector=int((r_ok & name_ok & ~sector_ok).sum()),
+                       gross=int((r_ok & name_ok & sector_ok & ~gross_ok).sum()), net=int((acc & ~net_ok).sum()))
+        acc &= net_ok
+
+        # VaR of every prefix of the ranked batch: q_k = q0 + 2 sum d_j sx_j + sum_{j,l<=k} d_j d_l C_jl
+        sel = np.flatnonzero(acc)
+        if len(sel):
+            si, sd = r_idx[sel], d[sel]
+            C = self.cov[np.ix_(si, si)]
+            q = self.q + np.cumsum(2.0 * sd * self.sx[si] + sd * (2.0 * (np.tril(C, -1) @ sd) + np.diag(C) * sd))
+            prev = np.r_[self.q, q[:-1]]
+            breach = np.flatnonzero((self._var(q) > self.var_limit_pct * eq) & (q > prev))
+            if len(breach):
+                reasons['var'] = len(sel) - int(breach[0])
+                acc[sel[breach[0]:]] = False
+        accepted = np.zeros(n, dtype=bool)
+        accepted[rank] = acc
+
+        orders = []
+        for k in np.flatnonzero(accepted):
+            c = candidates[k]
+            pr, st, qk = float(price[k]), float(stop[k]), int(qty[k])
+            side = 'BUY' if sign[k] > 0 else 'SELL'
+            if stop_px is not None and stop_px[k] == stop_px[k]:
+                stop_loss = float(stop_px[k])
+            else:
+                stop_loss = round(pr - st, 2) if side == 'BUY' else round(pr + st, 2)
+            orders.append({
+                'symbol': c.get('symbol'),
+                'side': side,
+                'qty': qk,
+                'price': pr,
+                'stop_loss': stop_loss,
+                'client_order_id': f"{c.get('symbol')}-{uuid.uuid4().hex[:8]}",
+                'notional': round(qk * pr, 2),
+                'reason': c.get('reason'),
+                'confidence': c.get('confidence', 0.0)
+            })
+        if orders:
+            ai = idx[accepted]
+            dq = (sign * qty)[accepted]
+            self._apply(ai, dq, price[accepted])
+            for o, i, q_ in zip(orders, ai.tolist(), dq.tolist()):
+                self._working[o['client_order_id']] = (i, q_, o['price'])
+        reasons = {k: v for k, v in reasons.items() if v}
+        self.last_check = {'candidates': n, 'accepted': len(orders), 'rejected': reasons,
+                           'elapsed_ms': 1000 * (time.perf_counter() - t0), **self.exposure(positions=False)}
+        return orders
+
+    # --- fills ---
+    def release(self, orders: Iterable[Dict[str, Any]]):
+        """Undo the reservation of orders that were cancelled or rejected downstream."""
+        for o in orders:
+            w = self._working.pop(o.get('client_order_id'), None)
+            if w is not None:
+                i, q, p = w
+                self._apply(np.array([i]), np.array([-q]), np.array([self.px[i]]))
+
+    def apply_fills(self, results: Iterable[Dict[str, Any]]):
+        """Replace reservations with actual fills. Results without a known client_order_id are applied as
+        new fills (skipped when they carry no symbol); results with status ERROR (or no fill) only release
+        their reservation."""
+        for r in results:
+            w = self._working.pop(r.get('client_order_id'), None)
+            if w is None and not r.get('symbol'):
+                continue  # nothing reserved and nothing to book it against
+            i = w[0] if w is not None else self._idx(r.get('symbol'))
+            dq = -w[1] if w is not None else 0.0
+            filled, avg = r.get('filled_qty'), r.get('avg_price')
+            if r.get('status') != 'ERROR' and filled and avg:
+                dq += float(filled) if r.get('side') == 'BUY' else -float(filled)
+                px = float(avg)
+            else:
+                px = self.px[i]
+            if dq or px != self.px[i]:
+                self._apply(np.array([i]), np.array([dq]), np.array([px]))
+
+    def exposure(self, positions: bool = True) -> Dict[str, Any]:
+        out = {'gross': self.gross, 'net': self.net, 'var': float(self._var(self.q)),
+               'sectors': {name: float(self.sector_gross[i]) for i, name in enumerate(self._sector_names)},
+               'working': len(self._working)}
+        if positions:
+            out['positions'] = {s: float(self.pos[i]) for i, s in enumerate(self._symbols) if self.pos[i]}
+        return out
+
+if __name__ == '__main__':
+    rng = np.random.default_rng(0)
+    syms = [f"S{i:03d}.NS" for i in range(400)]
+    sectors = {s: f"SEC{i % 12}" for i, s in enumerate(syms)}
+    data = {}
+    for s in syms:
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, 61)))
+        data[s] = Candles.from_quote(np.arange(61), {'open': close, 'high': close, 'low': close, 'close': close})
+    engine = PortfolioRiskEngine(account_equity=1e7, sectors=sectors).update_returns(data)
+    cands = [{'symbol': s, 'signal': 'BUY' if rng.random() < 0.6 else 'SELL', 'price': float(data[s].close[-1]),
+              'confidence': float(rng.random()), 'reason': 'demo'} for s in syms]
+    times = []
+    for _ in range(50):
+        t0 = time.perf_counter()
+        orders = engine.validate_trades(cands)
+        times.append(time.perf_counter() - t0)
+        engine.release(orders)
+    print(engine.last_check, f"median {1000 * sorted(times)[25]:.3f} ms for {len(cands)} candidates")
@@ -2,8 +2,14 @@
 """risk_manager.py
 
 AgentX-ready risk manager tool.
-Function:
-- validate_trades(candidates, account_equity=100000, params=None)
+Functions:
+- validate_trades(candidates, account_equity=100000, params=None, instruments=None)
+- validate_trades_by_strategy(candidates, choices, account_equity=None, instruments=None) -> orders sized with each
+  symbol's strategy params
+
+With `instruments` (a SymbolMaster) quantities are rounded down to whole lots and stop prices to the tick
+grid, towards the entry so the risk per trade stays within budget. Tick/lot sizes and stops for the batch
+come from one tick_lot() gather and one vectorized rounding pass.
 
 Defaults:
 - account_equity default 100000 (₹100k) unless provided.
@@ -12,14 +18,13 @@ Defaults:
 """
 from typing import List, Dict, Any
 import os, math, uuid
-
-def tool(name=None, description=None):
-    def _dec(f):
-        return f
-    return _dec
+import numpy as np
+from scripts.instrumentation import tool
+from scripts.symbol_master import round_to_tick
 
 @tool(name='Risk Manager', description='Position sizing and hard checks')
-def validate_trades(candidates: List[Dict[str, Any]], account_equity: float = None, params: Dict[str, Any] = None) -> List[Dict[str, Any]]:
+def validate_trades(candidates: List[Dict[str, Any]], account_equity: float = None, params: Dict[str, Any] = None,
+                    instruments=None) -> List[Dict[str, Any]]:
     params = params or {}
     if account_equity is None:
         # default equity from env var or fallback
@@ -27,8 +32,17 @@ def validate_trades(candidates: List[Dict[str, Any]], account_equity: float = No
     risk_per_trade_pct = float(params.get('risk_per_trade_pct', 0.02))
     stop_loss_pct = float(params.get('stop_loss_pct', 0.05))
     max_position_pct = float(params.get('max_position_pct', 0.05))
+    lots = stops = None
+    if instruments is not None and candidates:
+        ticks, lot_arr = instruments.tick_lot([c.get('symbol') for c in candidates])
+        px = np.array([float(c.get('price')) for c in candidates])
+        buy = np.array([c.get('signal') == 'BUY' for c in candidates])
+        # stops rounded towards the entry price, so the loss at the stop never exceeds the sized risk
+        stop_arr = np.where(buy, round_to_tick(px * (1 - stop_loss_pct), ticks, 'up'),
+                            round_to_tick(px * (1 + stop_loss_pct), ticks, 'down'))
+        lots, stops = lot_arr.tolist(), np.where(ticks > 0, stop_arr, np.nan).tolist()
     validated = []
-    for c in candidates:
+    for i, c in enumerate(candidates):
         side = 'BUY' if c.get('signal') == 'BUY' else 'SELL'
         price = float(c.get('price'))
         stop_distance = price * stop_loss_pct
@@ -39,14 +53,20 @@ def validate_trades(candidates: List[Dict[str, Any]], account_equity: float = No
             qty = int(max(1, max_notional // price))
         else:
             qty = raw_qty
+        if lots is not None:
+            qty = (qty // lots[i]) * lots[i]
         if qty <= 0:
             continue
+        if stops is not None and stops[i] == stops[i]:
+            stop_loss = stops[i]
+        else:
+            stop_loss = round(price - stop_distance, 2) if side == 'BUY' else round(price + stop_distance, 2)
         order = {
             'symbol': c.get('symbol'),
             'side': side,
             'qty': qty,
             'price': price,
-            'stop_loss': round(price - stop_distance, 2) if side == 'BUY' else round(price + stop_distance, 2),
+            'stop_loss': stop_loss,
             'client_order_id': f"{c.get('symbol')}-{uuid.uuid4().hex[:8]}",
             'notional': round(qty * price, 2),
             'reason': c.get('reason'),
@@ -58,6 +78,20 @@ def validate_trades(candidates: List[Dict[str, Any]], account_equity: float = No
         validated.append(order)
     return validated
 
+@tool(name='Strategy Risk Manager', description='Position sizing with per-symbol strategy params')
+def validate_trades_by_strategy(candidates: List[Dict[str, Any]], choices: Dict[str, Dict[str, Any]],
+                                account_equity: float = None, instruments=None) -> List[Dict[str, Any]]:
+    """`choices` is {symbol: select_strategy result}; one validate_trades call per distinct params set.
+    Symbols without a choice are sized with the defaults."""
+    groups: Dict[tuple, List[Dict[str, Any]]] = {}
+    for c in candidates:
+        params = (choices.get(c.get('symbol')) or {}).get('params') or {}
+        groups.setdefault(tuple(sorted(params.items())), []).append(c)
+    orders = []
+    for key, cands in groups.items():
+        orders.extend(validate_trades(cands, account_equity=account_equity, params=dict(key), instruments=instruments))
+    return orders
+
 if __name__ == '__main__':
     sample = [{'symbol':'RELIANCE.NS','signal':'BUY','price':2600,'confidence':0.7,'reason':'test'}]
     print(validate_trades(sample))
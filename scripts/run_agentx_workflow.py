@@ -1,18 +1,26 @@
 
 import os
+import sys
 import json
 from pathlib import Path
 from dotenv import load_dotenv
 
-# Try to import real AgentX orchestrator or fallback to mock
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))  # run as a script: make the `scripts` package importable
+
+# Try to import real AgentX orchestrator or fallback to the local workflow executor
 try:
     from agentx import AgentXOrchestrator
 except ImportError:
-    from mock_agentx_orchestrator import AgentXOrchestrator
+    from scripts.mock_agentx_orchestrator import AgentXOrchestrator
 
-def main():
+def main(argv=None):
     load_dotenv()
-    workflow_path = Path("workflows/stock_trader_workflow.json")
+    argv = sys.argv[1:] if argv is None else argv
+    workflow_path = Path(argv[0]) if argv else Path("workflows/stock_trader_workflow.json")
+    if not workflow_path.exists() and not workflow_path.is_absolute():
+        workflow_path = ROOT / workflow_path
     if not workflow_path.exists():
         raise FileNotFoundError(f"Workflow file not found: {workflow_path}")
 
@@ -26,7 +34,7 @@ def main():
 
     print("\n✅ Workflow execution completed.")
     print("📊 Results Summary:")
-    print(json.dumps(results, indent=2))
+    print(json.dumps(results, indent=2, default=str))
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,93 @@
+"""runtime.py
+
+Deferred imports and import-time accounting for the entry points.
+Functions:
+- lazy_import(name) -> module stand-in that imports `name` on first attribute access (the real module when
+  it is already loaded)
+- import_stats() -> {loaded: {module: {seconds, trigger, at}}, deferred: [modules not imported yet], uptime_seconds}
+  (`at` and `uptime_seconds` count from the first import of this module)
+- importtime_profile(module, top=15) -> heaviest imports of `module` in a fresh interpreter (python -X importtime)
+
+Heavy libraries (pandas, requests, transformers) are only needed by some code paths; binding them with
+lazy_import keeps `import scripts.<stage>` cheap, so a one-shot CLI run pays only for what it uses and a
+resident daemon pays once. Each deferred import records how long it took and which attribute triggered it.
+`python -m scripts.runtime <module> [top]` prints the import-time profile of a module.
+"""
+from typing import Any, Dict, List
+import importlib, os, subprocess, sys, threading, time, types
+
+_T0 = time.perf_counter()
+_lock = threading.RLock()  # a deferred import may itself call lazy_import
+_loaded: Dict[str, Dict[str, Any]] = {}
+_deferred: Dict[str, 'LazyModule'] = {}
+
+class LazyModule(types.ModuleType):
+    """Stand-in for a module that is imported on first attribute access. After loading, the real module's
+    namespace is copied in, so later lookups are plain attribute reads."""
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self.__dict__['_lazy_module'] = None
+
+    def _load(self, trigger: str = None) -> types.ModuleType:
+        mod = self.__dict__['_lazy_module']
+        if mod is not None:
+            return mod
+        with _lock:
+            mod = self.__dict__['_lazy_module']
+            if mod is None:
+                t0 = time.perf_counter()
+                mod = importlib.import_module(self.__name__)
+                if self.__name__ not in _loaded:
+                    _loaded[self.__name__] = {'seconds': time.perf_counter() - t0, 'trigger': trigger,
+                                              'at': t0 - _T0}
+                _deferred.pop(self.__name__, None)
+                self.__dict__.update(mod.__dict__)
+                self.__dict__['_lazy_module'] = mod
+        return mod
+
+    def __getattr__(self, attr: str):
+        if attr.startswith('__') and attr.endswith('__'):
+            raise AttributeError(attr)
+        return getattr(self._load(attr), attr)
+
+    def __repr__(self) -> str:
+        state = 'loaded' if self.__dict__['_lazy_module'] is not None else 'deferred'
+        return f'<lazy module {self.__name__!r} ({state})>'
+
+def lazy_import(name: str):
+    mod = sys.modules.get(name)
+    if mod is not None:
+        return mod
+    with _lock:
+        lm = _deferred.get(name)
+        if lm is None:
+            lm = _deferred[name] = LazyModule(name)
+    return lm
+
+def import_stats() -> Dict[str, Any]:
+    with _lock:
+        return {'loaded': {k: dict(v) for k, v in _loaded.items()}, 'deferred': sorted(_deferred),
+                'uptime_seconds': time.perf_counter() - _T0}
+
+def importtime_profile(module: str, top: int = 15) -> List[Dict[str, Any]]:
+    """Run `python -X importtime -c 'import <module>'` and return the `top` entries by cumulative time."""
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, [os.getcwd(), env.get('PYTHONPATH')]))
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'], capture_output=True,
+                          text=True, env=env)
+    if proc.returncode != 0:
+        raise ImportError(proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else module)
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cum_us, name = line[len('import time:'):].split('|')
+        rows.append({'module': name.strip(), 'self_ms': int(self_us) / 1000, 'cumulative_ms': int(cum_us) / 1000})
+    rows.sort(key=lambda r: -r['cumulative_ms'])
+    return rows[:top]
+
+if __name__ == '__main__':
+    target = sys.argv[1] if len(sys.argv) > 1 else 'scripts.trading_scheduler'
+    for r in importtime_profile(target, int(sys.argv[2]) if len(sys.argv) > 2 else 15):
+        print(f"{r['cumulative_ms']:9.1f} ms  {r['self_ms']:8.1f} ms  {r['module']}")
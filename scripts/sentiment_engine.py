@@ -0,0 +1,110 @@
+
+"""sentiment_engine.py
+
+Process-wide FinBERT sentiment engine: the model is loaded once, lazily, and headlines from many symbols are
+scored together in batched CPU forward passes.
+Classes:
+- SentimentEngine(model_name='yiyanghkust/finbert-tone', batch_size=32, num_threads=None, pipeline_factory=None)
+
+Functions:
+- get_engine(**kwargs) -> shared SentimentEngine (created on first call; conflicting kwargs later raise ValueError)
+- label_to_score(label, score) -> signed score in [-1, 1]
+
+`pipeline_factory` lets tests and benchmarks plug in a tiny local model or a stub: it is called once with
+(model_name) and must return a callable `nlp(texts, batch_size=...) -> [{label, score}, ...]`.
+Environment: FINBERT_MODEL, SENTIMENT_BATCH_SIZE, SENTIMENT_THREADS.
+"""
+from typing import List, Dict, Any, Callable, Optional
+import os, threading, time
+
+DEFAULT_MODEL = os.getenv('FINBERT_MODEL', 'yiyanghkust/finbert-tone')
+
+def label_to_score(label: str, score: float) -> float:
+    label = str(label).lower()
+    if label == 'positive':
+        return float(score)
+    if label == 'negative':
+        return -float(score)
+    return 0.0
+
+def _hf_pipeline(model_name: str):
+    from transformers import AutoTokenizer, AutoModelForSequenceClassification, pipeline
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = AutoModelForSequenceClassification.from_pretrained(model_name)
+    model.eval()
+    return pipeline("sentiment-analysis", model=model, tokenizer=tokenizer, device=-1)
+
+class SentimentEngine:
+    def __init__(self, model_name: str = DEFAULT_MODEL, batch_size: int = None, num_threads: int = None,
+                 pipeline_factory: Callable[[str], Callable] = None):
+        self.model_name = model_name
+        self.batch_size = batch_size or int(os.getenv('SENTIMENT_BATCH_SIZE', '32'))
+        self.num_threads = num_threads or (int(os.getenv('SENTIMENT_THREADS')) if os.getenv('SENTIMENT_THREADS') else None)
+        self.pipeline_factory = pipeline_factory or _hf_pipeline
+        self.load_seconds = None
+        self.scored = 0
+        self._nlp = None
+        self._load_lock = threading.Lock()
+        self._infer_lock = threading.Lock()
+
+    def _load(self):
+        with self._load_lock:
+            if self._nlp is None:
+                t0 = time.perf_counter()
+                if self.num_threads:
+                    try:
+                        import torch
+                        torch.set_num_threads(self.num_threads)
+                    except Exception:
+                        pass
+                self._nlp = self.pipeline_factory(self.model_name)
+                self.load_seconds = time.perf_counter() - t0
+        return self._nlp
+
+    @property
+    def loaded(self) -> bool:
+        return self._nlp is not None
+
+    def score_texts(self, texts: List[str]) -> List[float]:
+        """Signed score per text; one forward pass per `batch_size` texts."""
+        if not texts:
+            return []
+        nlp = self._nlp or self._load()
+        out = []
+        # one batch at a time: the model is shared and torch already uses all intra-op threads
+        with self._infer_lock:
+            for i in range(0, len(texts), self.batch_size):
+                batch = texts[i:i + self.batch_size]
+                out.extend(label_to_score(r['label'], r['score']) for r in nlp(batch, batch_size=len(batch), truncation=True))
+            self.scored += len(texts)
+        return out
+
+    def score_symbols(self, headlines: Dict[str, List[str]]) -> Dict[str, Optional[float]]:
+        """Average score per symbol; all symbols' headlines are flattened into shared batches.
+        Symbols with no headlines map to None."""
+        flat, owners = [], []
+        for sym, hs in headlines.items():
+            for h in hs or []:
+                flat.append(h)
+                owners.append(sym)
+        scores = self.score_texts(flat)
+        sums: Dict[str, List[float]] = {}
+        for sym, s in zip(owners, scores):
+            sums.setdefault(sym, []).append(s)
+        return {sym: (sum(sums[sym]) / len(sums[sym]) if sym in sums else None) for sym in headlines}
+
+_engine = None
+_engine_lock = threading.Lock()
+
+def get_engine(**kwargs) -> SentimentEngine:
+    """Shared engine. Config passed after the first call must match the engine already built (None means
+    "don't care"), since the model is loaded once per process."""
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = SentimentEngine(**kwargs)
+            return _engine
+        conflicts = {k: v for k, v in kwargs.items() if v is not None and getattr(_engine, k) != v}
+        if conflicts:
+            raise ValueError(f"sentiment engine already created with a different config: {sorted(conflicts)}")
+        return _engine
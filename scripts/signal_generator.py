@@ -4,34 +4,47 @@
 AgentX-ready tool that consumes OHLC candles and generates simple signals.
 Functions:
 - generate_signals(data: dict) -> list of candidate dicts
+- generate_signals_panel(data: dict) -> same candidates, computed for all symbols at once on a (time x symbol) panel
+- generate_signals_timeframes(book, timeframes=None, params=None) -> {timeframe: candidates} from one TimeframeBook
+  (see timeframes.py): every timeframe is resampled from the stored base bars, so no extra fetch per timeframe
 
 Input 'data' format: { 'SYMBOL': [ {timestamp, open, high, low, close, volume}, ... ] }
+  or { 'SYMBOL': Candles } (columnar arrays, see candles.py) -- both are accepted per symbol.
 Output candidate example:
   { 'symbol': 'RELIANCE.NS', 'signal': 'BUY', 'price': 2600.0, 'confidence': 0.7, 'reason': '...' }
 """
-from typing import Dict, Any, List
-import pandas as pd
+from typing import Dict, Any, List, Union
 import numpy as np
+from scripts.candles import Candles, as_candles
+from scripts.timeframes import TimeframeBook
+from scripts.instrumentation import tool
+from scripts.runtime import lazy_import
 
-def tool(name=None, description=None):
-    def _dec(f):
-        return f
-    return _dec
+pd = lazy_import('pandas')  # per-symbol engine only; the panel engine is plain numpy
 
-@tool(name='Signal Generator', description='SMA crossover + RSI filter')
-def generate_signals(data: Dict[str, List[Dict[str, Any]]], params: Dict[str, Any] = None) -> List[Dict[str, Any]]:
+def _read_params(params: Dict[str, Any] = None):
     params = params or {}
-    sma_short = params.get('sma_short', 20)
-    sma_long = params.get('sma_long', 50)
-    rsi_period = params.get('rsi_period', 14)
-    rsi_upper = params.get('rsi_upper', 70)
-    rsi_lower = params.get('rsi_lower', 30)
+    return (params.get('sma_short', 20), params.get('sma_long', 50), params.get('rsi_period', 14),
+            params.get('rsi_upper', 70), params.get('rsi_lower', 30))
+
+def _candidate(symbol, prev_short, prev_long, last_short, last_long, last_rsi, last_close, sma_short, sma_long, rsi_upper, rsi_lower):
+    """Crossover + RSI decision shared by the per-symbol and panel engines; returns a candidate dict or None."""
+    bullish = (prev_short <= prev_long) and (last_short > last_long)
+    bearish = (prev_short >= prev_long) and (last_short < last_long)
+    if bullish and (rsi_lower <= last_rsi <= rsi_upper):
+        return {'symbol': symbol, 'signal': 'BUY', 'price': float(last_close), 'confidence': 0.7, 'reason': f'sma{(sma_short)}/{(sma_long)} crossover + rsi'}
+    elif bearish:
+        return {'symbol': symbol, 'signal': 'SELL', 'price': float(last_close), 'confidence': 0.6, 'reason': 'bearish crossover'}
+    return None
+
+@tool(name='Signal Generator', description='SMA crossover + RSI filter')
+def generate_signals(data: Dict[str, Union[List[Dict[str, Any]], Candles]], params: Dict[str, Any] = None) -> List[Dict[str, Any]]:
+    sma_short, sma_long, rsi_period, rsi_upper, rsi_lower = _read_params(params)
     candidates = []
     for symbol, candles in data.items():
-        if not candles or len(candles) < max(sma_long, sma_short) + 1:
+        if candles is None or len(candles) < max(sma_long, sma_short) + 1:
             continue
-        df = pd.DataFrame(candles)
-        df = df.sort_values('timestamp').reset_index(drop=True)
+        df = pd.DataFrame({'close': as_candles(candles).sorted().close}, copy=False)
         close = df['close']
         df['sma_short'] = close.rolling(window=sma_short, min_periods=1).mean()
         df['sma_long'] = close.rolling(window=sma_long, min_periods=1).mean()
@@ -45,14 +58,92 @@ def generate_signals(data: Dict[str, List[Dict[str, Any]]], params: Dict[str, An
         df['rsi'] = 100 - (100 / (1 + rs))
         prev = df.iloc[-2]
         last = df.iloc[-1]
-        bullish = (prev['sma_short'] <= prev['sma_long']) and (last['sma_short'] > last['sma_long'])
-        bearish = (prev['sma_short'] >= prev['sma_long']) and (last['sma_short'] < last['sma_long'])
-        if bullish and (rsi_lower <= last['rsi'] <= rsi_upper):
-            candidates.append({'symbol': symbol, 'signal': 'BUY', 'price': float(last['close']), 'confidence': 0.7, 'reason': f'sma{(sma_short)}/{(sma_long)} crossover + rsi'})
-        elif bearish:
-            candidates.append({'symbol': symbol, 'signal': 'SELL', 'price': float(last['close']), 'confidence': 0.6, 'reason': 'bearish crossover'})
+        cand = _candidate(symbol, prev['sma_short'], prev['sma_long'], last['sma_short'], last['sma_long'], last['rsi'],
+                          last['close'], sma_short, sma_long, rsi_upper, rsi_lower)
+        if cand:
+            candidates.append(cand)
     return candidates
 
+def _rolling_mean_panel(x: np.ndarray, window: int) -> np.ndarray:
+    """Column-wise rolling mean with pandas' min_periods=1 semantics (NaNs skipped) via cumulative sums."""
+    valid = ~np.isnan(x)
+    csum = np.cumsum(np.where(valid, x, 0.0), axis=0)
+    ccnt = np.cumsum(valid, axis=0)
+    if window < len(x):
+        csum[window:] = csum[window:] - csum[:-window]
+        ccnt[window:] = ccnt[window:] - ccnt[:-window]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(ccnt > 0, csum / np.maximum(ccnt, 1), np.nan)
+
+def build_close_panel(data: Dict[str, Union[List[Dict[str, Any]], Candles]], rows: int, min_len: int = 0):
+    """Right-align the last `rows` closes of every symbol into a (rows x symbols) float64 panel.
+    Row -1 is each symbol's latest bar; shorter histories are NaN-padded at the top.
+    Symbols with fewer than `min_len` candles are dropped. Returns (symbols, panel)."""
+    symbols, cols = [], []
+    for symbol, candles in data.items():
+        if candles is None or len(candles) < max(min_len, 1):
+            continue
+        symbols.append(symbol)
+        cols.append(as_candles(candles).sorted().close[-rows:])
+    panel = np.full((rows, len(cols)), np.nan)
+    for j, c in enumerate(cols):
+        panel[rows - len(c):, j] = c
+    return symbols, panel
+
+def panel_indicators(panel: np.ndarray, sma_short: int, sma_long: int, rsi_period: int):
+    """SMA short/long and RSI for every column of a close panel at once. Returns three arrays shaped like `panel`."""
+    short = _rolling_mean_panel(panel, sma_short)
+    long_ = _rolling_mean_panel(panel, sma_long)
+    delta = np.full_like(panel, np.nan)
+    delta[1:] = panel[1:] - panel[:-1]
+    up = np.where(np.isnan(delta), np.nan, np.maximum(delta, 0.0))
+    down = np.where(np.isnan(delta), np.nan, -np.minimum(delta, 0.0))
+    ma_up = _rolling_mean_panel(up, rsi_period)
+    ma_down = _rolling_mean_panel(down, rsi_period)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        rs = ma_up / np.where(ma_down == 0, np.nan, ma_down)
+        rsi = 100 - (100 / (1 + rs))
+    return short, long_, rsi
+
+@tool(name='Panel Signal Generator', description='SMA crossover + RSI filter for the whole universe in one pass')
+def generate_signals_panel(data: Dict[str, Union[List[Dict[str, Any]], Candles]], params: Dict[str, Any] = None) -> List[Dict[str, Any]]:
+    """Same inputs, rules and candidate dicts as generate_signals, but every symbol is aligned into one
+    (time x symbol) panel and the indicators are computed for all columns at once.
+    Only the trailing rows that influence the last two bars are kept, so the panel stays small."""
+    sma_short, sma_long, rsi_period, rsi_upper, rsi_lower = _read_params(params)
+    rows = max(sma_short, sma_long, rsi_period + 1) + 1
+    symbols, panel = build_close_panel(data, rows, min_len=max(sma_long, sma_short) + 1)
+    if not symbols:
+        return []
+    short, long_, rsi = panel_indicators(panel, sma_short, sma_long, rsi_period)
+    bullish = (short[-2] <= long_[-2]) & (short[-1] > long_[-1])
+    bearish = (short[-2] >= long_[-2]) & (short[-1] < long_[-1])
+    in_band = (rsi_lower <= rsi[-1]) & (rsi[-1] <= rsi_upper)
+    candidates = []
+    # only the flagged columns go back through the scalar decision, keeping the dicts identical
+    for j in np.flatnonzero((bullish & in_band) | bearish):
+        cand = _candidate(symbols[j], short[-2, j], long_[-2, j], short[-1, j], long_[-1, j], rsi[-1, j],
+                          panel[-1, j], sma_short, sma_long, rsi_upper, rsi_lower)
+        if cand:
+            candidates.append(cand)
+    return candidates
+
+@tool(name='Multi-Timeframe Signal Generator', description='Panel signals on several timeframes of the same bars')
+def generate_signals_timeframes(book: TimeframeBook, timeframes: List[str] = None, params: Dict[str, Any] = None,
+                                symbols: List[str] = None) -> Dict[str, List[Dict[str, Any]]]:
+    """Run the panel engine once per timeframe over `book` (the base interval plus its resampled timeframes;
+    all of them when `timeframes` is None). `params` applies to every timeframe unless it has an entry per
+    timeframe, e.g. {'5m': {'sma_short': 9}, '1d': {...}}. Candidates carry a 'timeframe' key."""
+    timeframes = timeframes or [book.base] + book.timeframes
+    out = {}
+    for tf in timeframes:
+        tf_params = (params or {}).get(tf)
+        cands = generate_signals_panel(book.frame(tf, symbols), tf_params if isinstance(tf_params, dict) else params)
+        for c in cands:
+            c['timeframe'] = tf
+        out[tf] = cands
+    return out
+
 if __name__ == '__main__':
     from scripts.market_data_fetcher import fetch_ohlc
     data = {'RELIANCE.NS': fetch_ohlc('RELIANCE.NS', range='1mo')}
@@ -0,0 +1,170 @@
+
+"""streaming_indicators.py
+
+Stateful O(1)-per-bar indicators for bar-by-bar signal updates.
+Classes:
+- RollingMean(window) -> ring-buffer rolling mean (pandas `rolling(window, min_periods=1).mean()` semantics)
+- RollingRSI(period, method='rolling'|'wilder') -> RSI fed one close at a time
+- StreamingSignal(symbol, params=None) -> SMA crossover + RSI decision, one candle at a time
+
+Every class exposes `checkpoint() -> dict` (JSON-serializable) and `restore(state)` so intraday state
+can be persisted and resumed without replaying history. With method='rolling' (the default) the
+decisions are the same as generate_signals on the full history.
+"""
+from typing import Dict, Any, Optional
+import math
+from scripts.signal_generator import _read_params, _candidate
+
+class RollingMean:
+    """Ring buffer with a running sum; NaN inputs occupy a slot but are skipped, like pandas min_periods=1.
+    The sum is recomputed from the buffer each time it wraps so float drift stays bounded."""
+    __slots__ = ('window', 'buf', 'idx', 'total', 'count')
+
+    def __init__(self, window: int):
+        self.window = int(window)
+        self.buf = [math.nan] * self.window
+        self.idx = 0
+        self.total = 0.0
+        self.count = 0
+
+    def update(self, x: float) -> float:
+        old = self.buf[self.idx]
+        if not math.isnan(old):
+            self.total -= old
+            self.count -= 1
+        self.buf[self.idx] = x
+        if not math.isnan(x):
+            self.total += x
+            self.count += 1
+        self.idx += 1
+        if self.idx == self.window:
+            self.idx = 0
+            self.total = math.fsum(v for v in self.buf if not math.isnan(v))
+        return self.value
+
+    @property
+    def value(self) -> float:
+        return self.total / self.count if self.count else math.nan
+
+    def checkpoint(self) -> Dict[str, Any]:
+        return {'window': self.window, 'buf': [None if math.isnan(v) else v for v in self.buf], 'idx': self.idx}
+
+    @classmethod
+    def restore(cls, state: Dict[str, Any]) -> 'RollingMean':
+        obj = cls(state['window'])
+        obj.buf = [math.nan if v is None else float(v) for v in state['buf']]
+        obj.idx = state['idx']
+        valid = [v for v in obj.buf if not math.isnan(v)]
+        obj.total = math.fsum(valid)
+        obj.count = len(valid)
+        return obj
+
+class RollingRSI:
+    """RSI over close-to-close changes.
+    method='rolling' matches signal_generator (simple rolling mean of gains/losses);
+    method='wilder' uses Wilder smoothing, seeded with the simple mean of the first `period` changes."""
+    __slots__ = ('period', 'method', 'prev_close', 'up', 'down', 'avg_up', 'avg_down', 'seen')
+
+    def __init__(self, period: int = 14, method: str = 'rolling'):
+        if method not in ('rolling', 'wilder'):
+            raise ValueError(f"unknown RSI method: {method}")
+        self.period = int(period)
+        self.method = method
+        self.prev_close = None
+        self.up = RollingMean(self.period)
+        self.down = RollingMean(self.period)
+        self.avg_up = math.nan
+        self.avg_down = math.nan
+        self.seen = 0
+
+    def update(self, close: float) -> float:
+        if self.prev_close is None:
+            delta = math.nan  # first bar has no change, like close.diff()
+        else:
+            delta = close - self.prev_close
+        self.prev_close = close
+        gain = math.nan if math.isnan(delta) else max(delta, 0.0)
+        loss = math.nan if math.isnan(delta) else -min(delta, 0.0)
+        if self.method == 'rolling':
+            self.avg_up = self.up.update(gain)
+            self.avg_down = self.down.update(loss)
+        elif not math.isnan(delta):
+            self.seen += 1
+            if self.seen <= self.period:
+                self.avg_up = self.up.update(gain)
+                self.avg_down = self.down.update(loss)
+            else:
+                self.avg_up = (self.avg_up * (self.period - 1) + gain) / self.period
+                self.avg_down = (self.avg_down * (self.period - 1) + loss) / self.period
+        return self.value
+
+    @property
+    def value(self) -> float:
+        if math.isnan(self.avg_up) or math.isnan(self.avg_down) or self.avg_down == 0:
+            return math.nan
+        return 100 - (100 / (1 + self.avg_up / self.avg_down))
+
+    def checkpoint(self) -> Dict[str, Any]:
+        return {'period': self.period, 'method': self.method, 'prev_close': self.prev_close,
+                'up': self.up.checkpoint(), 'down': self.down.checkpoint(), 'seen': self.seen,
+                'avg_up': None if math.isnan(self.avg_up) else self.avg_up,
+                'avg_down': None if math.isnan(self.avg_down) else self.avg_down}
+
+    @classmethod
+    def restore(cls, state: Dict[str, Any]) -> 'RollingRSI':
+        obj = cls(state['period'], state['method'])
+        obj.prev_close = state['prev_close']
+        obj.up = RollingMean.restore(state['up'])
+        obj.down = RollingMean.restore(state['down'])
+        obj.seen = state['seen']
+        obj.avg_up = math.nan if state['avg_up'] is None else state['avg_up']
+        obj.avg_down = math.nan if state['avg_down'] is None else state['avg_down']
+        return obj
+
+class StreamingSignal:
+    """Per-symbol SMA crossover + RSI filter updated one candle at a time.
+    `update(candle)` returns the same candidate dict generate_signals would emit for the history seen so
+    far, or None. Candles with a timestamp <= the last one seen are ignored (replays/duplicates)."""
+
+    def __init__(self, symbol: str, params: Dict[str, Any] = None, rsi_method: str = 'rolling'):
+        self.symbol = symbol
+        self.params = dict(params or {})
+        self.sma_short, self.sma_long, self.rsi_period, self.rsi_upper, self.rsi_lower = _read_params(self.params)
+        self.short = RollingMean(self.sma_short)
+        self.long = RollingMean(self.sma_long)
+        self.rsi = RollingRSI(self.rsi_period, rsi_method)
+        self.bars = 0
+        self.last_ts = None
+        self.prev = None  # (sma_short, sma_long) of the previous bar
+
+    def update(self, candle: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        ts = candle.get('timestamp')
+        if ts is not None and self.last_ts is not None and ts <= self.last_ts:
+            return None
+        self.last_ts = ts
+        close = float(candle['close'])
+        short = self.short.update(close)
+        long_ = self.long.update(close)
+        rsi = self.rsi.update(close)
+        prev, self.prev = self.prev, (short, long_)
+        self.bars += 1
+        if prev is None or self.bars < max(self.sma_long, self.sma_short) + 1:
+            return None
+        return _candidate(self.symbol, prev[0], prev[1], short, long_, rsi, close,
+                          self.sma_short, self.sma_long, self.rsi_upper, self.rsi_lower)
+
+    def checkpoint(self) -> Dict[str, Any]:
+        return {'symbol': self.symbol, 'params': self.params, 'bars': self.bars, 'last_ts': self.last_ts,
+                'prev': list(self.prev) if self.prev else None, 'short': self.short.checkpoint(),
+                'long': self.long.checkpoint(), 'rsi': self.rsi.checkpoint()}
+
+    @classmethod
+    def restore(cls, state: Dict[str, Any]) -> 'StreamingSignal':
+        obj = cls(state['symbol'], state['params'], state['rsi']['method'])
+        obj.bars = state['bars']
+        obj.last_ts = state['last_ts']
+        obj.prev = tuple(state['prev']) if state['prev'] else None
+        obj.short = RollingMean.restore(state['short'])
+        obj.long = RollingMean.restore(state['long'])
+        obj.rsi = RollingRSI.restore(state['rsi'])
+        return obj
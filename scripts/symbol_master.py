@@ -0,0 +1,306 @@
+"""symbol_master.py
+
+Broker instrument master: Yahoo symbol <-> exchange:tradingsymbol <-> instrument_token <-> tick/lot size.
+Classes:
+- Instrument -> one row (token, exchange, tradingsymbol, yahoo, tick_size, lot_size, instrument_type, segment, name, expiry)
+- SymbolMaster(source=None, exchanges=None, refresh_at=REFRESH_AT)
+  - load(source=None) / refresh(force=False) -> {added, removed, changed}; refresh only reloads once the
+    daily dump has been republished since the last load
+  - lookup(symbol) -> Instrument or None; symbol may be a Yahoo symbol ('RELIANCE.NS'), 'NSE:RELIANCE',
+    a bare tradingsymbol (default exchange) or an instrument token
+  - token(symbol) / yahoo(symbol) / kite_symbol(symbol) -> (exchange, tradingsymbol)
+  - tick_lot(symbols) -> (tick_size array, lot_size array) for a whole batch (0.0 / 1 for unknown symbols)
+  - token_map(symbols) -> {instrument_token: yahoo symbol} (for KiteTickSource)
+
+Functions:
+- get_master(source=None) -> shared SymbolMaster loaded from `source` / INSTRUMENTS_FILE (None when neither
+  is set), refreshed when stale
+- load_instrument_csv(path) -> records from a Kite instruments dump (CSV, optionally .gz)
+- kite_loader(kite, exchanges=('NSE', 'BSE')) -> source callable over kite.instruments()
+- round_qty(qty, lot) / round_to_tick(price, tick, mode='nearest'|'down'|'up') -> vectorized rounding
+
+`source` is a path to an instruments dump or a callable returning records (dicts with the Kite dump
+columns). Numeric columns live in NumPy arrays and the three keys map to row numbers in plain dicts, so a
+lookup is one dict probe and a batch's tick/lot sizes are one gather. Rows never move: a refresh diffs the
+new dump by instrument_token, appends new contracts, updates changed tick/lot sizes in place and drops
+expired ones from the indexes (compacting once half the rows are dead).
+Only equity rows of NSE/BSE get a Yahoo symbol (<tradingsymbol>.NS / .BO).
+Environment: INSTRUMENTS_FILE, INSTRUMENTS_EXCHANGES (e.g. "NSE,BSE").
+"""
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple, Union
+import csv, gzip, os, threading, time
+import numpy as np
+
+YAHOO_SUFFIX = {'NSE': '.NS', 'BSE': '.BO'}
+IST_OFFSET = 5.5 * 3600
+REFRESH_AT = 8.5 * 3600  # seconds after IST midnight by which the broker has published the day's dump
+
+Source = Union[str, Callable[[], Iterable[Dict[str, Any]]]]
+
+class Instrument(NamedTuple):
+    token: int
+    exchange: str
+    tradingsymbol: str
+    yahoo: Optional[str]
+    tick_size: float
+    lot_size: int
+    instrument_type: str
+    segment: str
+    name: str
+    expiry: str
+
+def load_instrument_csv(path: str) -> List[Dict[str, Any]]:
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rt', newline='') as f:
+        return list(csv.DictReader(f))
+
+def kite_loader(kite, exchanges: Iterable[str] = ('NSE', 'BSE')) -> Callable[[], List[Dict[str, Any]]]:
+    def load():
+        rows = []
+        for ex in exchanges:
+            rows.extend(kite.instruments(ex))
+        return rows
+    return load
+
+def round_qty(qty, lot):
+    """Round quantities down to a whole number of lots."""
+    lot = np.maximum(np.asarray(lot, dtype=np.int64), 1)
+    return (np.asarray(qty, dtype=np.int64) // lot) * lot
+
+def round_to_tick(price, tick, mode: str = 'nearest'):
+    """Round prices to the tick grid; a tick of 0 leaves the price unchanged."""
+    price = np.asarray(price, dtype=float)
+    tick = np.asarray(tick, dtype=float)
+    safe = np.where(tick > 0, tick, 1.0)
+    steps = price / safe
+    steps = {'nearest': np.round, 'down': np.floor, 'up': np.ceil}[mode](np.round(steps, 9))
+    return np.where(tick > 0, np.round(steps * safe, 6), price)
+
+def _yahoo(exchange: str, tradingsymbol: str, instrument_type: str, segment: str) -> Optional[str]:
+    suffix = YAHOO_SUFFIX.get(exchange)
+    if suffix and instrument_type == 'EQ' and segment == exchange:
+        return tradingsymbol + suffix
+    return None
+
+class SymbolMaster:
+    def __init__(self, source: Source = None, exchanges: Iterable[str] = None, refresh_at: float = REFRESH_AT,
+                 default_exchange: str = 'NSE', capacity: int = 1024):
+        self.source = source
+        self.exchanges = set(exchanges) if exchanges else None
+        self.refresh_at = refresh_at
+        self.default_exchange = default_exchange
+        self.loaded_at = None
+        self.last_refresh: Dict[str, int] = {}
+        self._lock = threading.Lock()  # guards the arrays and indexes; lookups take it too
+        self._refresh_lock = threading.Lock()
+        self._n = 0
+        self._alloc(capacity)
+        self._strs: List[tuple] = []  # per row: (exchange, tradingsymbol, instrument_type, segment, name, expiry)
+        self._by_token: Dict[int, int] = {}
+        self._by_key: Dict[str, int] = {}  # 'NSE:RELIANCE'
+        self._by_yahoo: Dict[str, int] = {}
+        self._live = 0
+        if source is not None:
+            self.load(source)
+
+    def _alloc(self, capacity: int):
+        old = getattr(self, '_token', None)
+        token, tick = np.zeros(capacity, dtype=np.int64), np.zeros(capacity)
+        lot, alive = np.ones(capacity, dtype=np.int64), np.zeros(capacity, dtype=bool)
+        if old is not None:
+            n = self._n
+            token[:n], tick[:n], lot[:n], alive[:n] = self._token[:n], self._tick[:n], self._lot[:n], self._alive[:n]
+        self._token, self._tick, self._lot, self._alive = token, tick, lot, alive
+
+    def __len__(self) -> int:
+        return self._live
+
+    # --- loading ---
+    def _records(self, source: Source) -> List[Dict[str, Any]]:
+        rows = load_instrument_csv(source) if isinstance(source, str) else list(source())
+        if self.exchanges is not None:
+            rows = [r for r in rows if r.get('exchange') in self.exchanges]
+        return rows
+
+    @staticmethod
+    def _parse(r: Dict[str, Any]) -> tuple:
+        tick = r.get('tick_size')
+        lot = r.get('lot_size')
+        expiry = r.get('expiry') or ''
+        return (int(r['instrument_token']), float(tick) if tick not in (None, '') else 0.0,
+                int(float(lot)) if lot not in (None, '') else 1,
+                (r.get('exchange') or '', r.get('tradingsymbol') or '', r.get('instrument_type') or '',
+                 r.get('segment') or '', r.get('name') or '', str(expiry)))
+
+    def _index(self, row: int, strs: tuple):
+        ex, ts, itype, seg = strs[:4]
+        self._by_token[int(self._token[row])] = row
+        self._by_key[f'{ex}:{ts}'] = row
+        y = _yahoo(ex, ts, itype, seg)
+        if y:
+            self._by_yahoo[y] = row
+
+    def _unindex(self, row: int):
+        ex, ts, itype, seg = self._strs[row][:4]
+        self._by_token.pop(int(self._token[row]), None)
+        if self._by_key.get(f'{ex}:{ts}') == row:
+            del self._by_key[f'{ex}:{ts}']
+        y = _yahoo(ex, ts, itype, seg)
+        if y and self._by_yahoo.get(y) == row:
+            del self._by_yahoo[y]
+
+    def load(self, source: Source = None) -> Dict[str, int]:
+        """Apply a full dump as a diff against the current rows."""
+        source = source if source is not None else self.source
+        if source is None:
+            raise ValueError('no instrument source configured')
+        self.source = source
+        parsed = [self._parse(r) for r in self._records(source)]
+        with self._lock:
+            added = changed = 0
+            seen = set()
+            for token, tick, lot, strs in parsed:
+                seen.add(token)
+                row = self._by_token.get(token)
+                if row is None:
+                    if self._n == len(self._token):
+                        self._alloc(max(2 * len(self._token), 1024))
+                    row, self._n = self._n, self._n + 1
+                    self._token[row], self._tick[row], self._lot[row], self._alive[row] = token, tick, lot, True
+                    self._strs.append(strs)
+                    self._index(row, strs)
+                    self._live += 1
+                    added += 1
+                elif self._tick[row] != tick or self._lot[row] != lot or self._strs[row] != strs:
+                    self._unindex(row)
+                    self._tick[row], self._lot[row] = tick, lot
+                    self._strs[row] = strs
+                    self._index(row, strs)
+                    changed += 1
+            removed = [row for token, row in self._by_token.items() if token not in seen]
+            for row in removed:
+                self._unindex(row)
+                self._alive[row] = False
+            self._live -= len(removed)
+            if self._n > 1024 and self._live < self._n // 2:
+                self._compact()
+            self.loaded_at = time.time()
+            self.last_refresh = {'added': added, 'removed': len(removed), 'changed': changed}
+        return self.last_refresh
+
+    def _compact(self):
+        keep = np.flatnonzero(self._alive[:self._n])
+        strs = [self._strs[i] for i in keep.tolist()]
+        token, tick, lot = self._token[keep], self._tick[keep], self._lot[keep]
+        self._n = 0
+        self._alloc(max(1024, 2 * len(keep)))
+        n = len(keep)
+        self._token[:n], self._tick[:n], self._lot[:n], self._alive[:n] = token, tick, lot, True
+        self._n, self._strs = n, strs
+        self._by_token, self._by_key, self._by_yahoo = {}, {}, {}
+        for row, s in enumerate(strs):
+            self._index(row, s)
+
+    def stale(self, now: float = None) -> bool:
+        """True when the broker has published a dump since the last load."""
+        if self.loaded_at is None:
+            return True
+        now = time.time() if now is None else now
+        local = now + IST_OFFSET - self.refresh_at
+        published = (local // 86400) * 86400 - IST_OFFSET + self.refresh_at
+        return self.loaded_at < published
+
+    def refresh(self, force: bool = False, now: float = None) -> Optional[Dict[str, int]]:
+        # staleness is re-checked under the lock so concurrent callers reload the dump only once
+        with self._refresh_lock:
+            if force or self.stale(now):
+                return self.load()
+        return None
+
+    # --- lookups ---
+    def _row(self, symbol) -> int:
+        if isinstance(symbol, (int, np.integer)):
+            return self._by_token.get(int(symbol), -1)
+        row = self._by_yahoo.get(symbol)
+        if row is None:
+            row = self._by_key.get(symbol)
+            if row is None:
+                row = self._by_key.get(f'{self.default_exchange}:{symbol}', -1)
+        return row
+
+    # row numbers are only meaningful against the arrays they were read with, so each lookup resolves the
+    # row and gathers its fields under the lock (a refresh may append, update or compact rows meanwhile)
+    def lookup(self, symbol) -> Optional[Instrument]:
+        with self._lock:
+            row = self._row(symbol)
+            if row < 0:
+                return None
+            ex, ts, itype, seg, name, expiry = self._strs[row]
+            return Instrument(int(self._token[row]), ex, ts, _yahoo(ex, ts, itype, seg), float(self._tick[row]),
+                              int(self._lot[row]), itype, seg, name, expiry)
+
+    def __contains__(self, symbol) -> bool:
+        with self._lock:
+            return self._row(symbol) >= 0
+
+    def token(self, symbol) -> Optional[int]:
+        with self._lock:
+            row = self._row(symbol)
+            return int(self._token[row]) if row >= 0 else None
+
+    def yahoo(self, symbol) -> Optional[str]:
+        with self._lock:
+            row = self._row(symbol)
+            return _yahoo(*self._strs[row][:4]) if row >= 0 else None
+
+    def kite_symbol(self, symbol) -> Optional[Tuple[str, str]]:
+        with self._lock:
+            row = self._row(symbol)
+            return self._strs[row][:2] if row >= 0 else None
+
+    def tick_lot(self, symbols: Iterable) -> Tuple[np.ndarray, np.ndarray]:
+        symbols = list(symbols)
+        with self._lock:
+            rows = np.fromiter((self._row(s) for s in symbols), dtype=np.int64, count=len(symbols))
+            found = rows >= 0
+            safe = np.where(found, rows, 0)
+            return np.where(found, self._tick[safe], 0.0), np.where(found, self._lot[safe], 1)
+
+    def token_map(self, symbols: Iterable) -> Dict[int, str]:
+        out = {}
+        symbols = list(symbols)
+        with self._lock:
+            for s in symbols:
+                row = self._row(s)
+                if row >= 0:
+                    out[int(self._token[row])] = _yahoo(*self._strs[row][:4]) or f'{self._strs[row][0]}:{self._strs[row][1]}'
+        return out
+
+_master = None
+_master_lock = threading.Lock()
+
+def get_master(source: Source = None) -> Optional[SymbolMaster]:
+    global _master
+    if _master is None:
+        source = source or os.getenv('INSTRUMENTS_FILE')
+        if not source:
+            return None
+        with _master_lock:
+            if _master is None:
+                ex = os.getenv('INSTRUMENTS_EXCHANGES')
+                _master = SymbolMaster(source, exchanges=ex.split(',') if ex else None)
+    elif _master.stale():
+        with _master_lock:
+            if _master.stale():  # another caller may have reloaded while we waited
+                _master.refresh()
+    return _master
+
+if __name__ == '__main__':
+    import sys
+    m = SymbolMaster(sys.argv[1]) if len(sys.argv) > 1 else get_master()
+    if m is None:
+        print('usage: python -m scripts.symbol_master <instruments.csv> [SYMBOL ...] (or set INSTRUMENTS_FILE)')
+        sys.exit(1)
+    print(f'{len(m)} instruments loaded: {m.last_refresh}')
+    for s in sys.argv[2:]:
+        print(s, m.lookup(int(s) if s.isdigit() else s))
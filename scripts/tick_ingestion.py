@@ -0,0 +1,294 @@
+
+"""tick_ingestion.py
+
+Streaming market-data path: ticks -> OHLCV bars -> bounded queue -> signal stage.
+Classes:
+- BarAggregator(interval_seconds=60, max_bars=500) -> folds ticks into time-bucketed bars per symbol
+- BarQueue(maxsize=10000, policy='block'|'drop_oldest', put_timeout=None) -> bounded hand-off with backpressure
+- KiteTickSource(api_key, access_token, token_to_symbol, mode='quote') -> live ticks via KiteTicker
+- ReplayTickSource(ticks, speed=0.0) -> replays recorded/mock ticks through the same callbacks
+- TickIngestor(source, aggregator, queue) -> glues a source to the aggregator and queue
+
+Functions:
+- run_signal_consumer(queue, params=None, on_candidate=print, stop_event=None) -> feeds bars to StreamingSignal
+
+Ticks are normalized to {symbol, timestamp (epoch s), price, cum_volume}. Bars use the Candles field names
+plus 'symbol': {symbol, timestamp (bucket start), open, high, low, close, volume}.
+"""
+from typing import Dict, Any, List, Iterable, Callable, Optional
+from collections import deque
+import datetime, queue, threading, time
+from scripts.streaming_indicators import StreamingSignal
+try:
+    from kiteconnect import KiteTicker
+except Exception as e:
+    KiteTicker = None  # kiteconnect not installed; KiteTickSource will raise if used
+
+class BarAggregator:
+    """Aggregates ticks into `interval_seconds` bars. A bar is completed when a tick for a later bucket
+    arrives or when `close_due(now)` is called after the bucket has ended (illiquid symbols).
+    The last `max_bars` completed bars per symbol are kept in memory."""
+
+    def __init__(self, interval_seconds: int = 60, max_bars: int = 500):
+        self.interval = int(interval_seconds)
+        self.max_bars = max_bars
+        self.open_bars: Dict[str, Dict[str, Any]] = {}
+        self.history: Dict[str, deque] = {}
+        self._last_cum_volume: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def _complete(self, bar: Dict[str, Any]) -> Dict[str, Any]:
+        self.history.setdefault(bar['symbol'], deque(maxlen=self.max_bars)).append(bar)
+        return bar
+
+    def on_tick(self, tick: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Fold one normalized tick in; returns the bars completed by it (usually none)."""
+        symbol, ts, price = tick['symbol'], float(tick['timestamp']), float(tick['price'])
+        bucket = int(ts // self.interval) * self.interval
+        cum = tick.get('cum_volume')
+        qty = tick.get('qty', 0) or 0
+        completed = []
+        with self._lock:
+            if cum is not None:
+                prev_cum = self._last_cum_volume.get(symbol)
+                # cumulative day volume; a drop means a new session
+                qty = cum - prev_cum if prev_cum is not None and cum >= prev_cum else 0
+                self._last_cum_volume[symbol] = cum
+            bar = self.open_bars.get(symbol)
+            if bar is not None and bucket < bar['timestamp']:
+                return completed  # late tick for an already-closed bucket
+            if bar is not None and bucket > bar['timestamp']:
+                completed.append(self._complete(bar))
+                bar = None
+            if bar is None:
+                self.open_bars[symbol] = {'symbol': symbol, 'timestamp': bucket, 'open': price, 'high': price,
+                                          'low': price, 'close': price, 'volume': int(qty)}
+            else:
+                bar['high'] = max(bar['high'], price)
+                bar['low'] = min(bar['low'], price)
+                bar['close'] = price
+                bar['volume'] += int(qty)
+        return completed
+
+    def close_due(self, now: float = None) -> List[Dict[str, Any]]:
+        """Complete every open bar whose bucket has ended by `now`."""
+        now = time.time() if now is None else now
+        completed = []
+        with self._lock:
+            for symbol in list(self.open_bars):
+                bar = self.open_bars[symbol]
+                if bar['timestamp'] + self.interval <= now:
+                    completed.append(self._complete(self.open_bars.pop(symbol)))
+        return completed
+
+    def flush(self) -> List[Dict[str, Any]]:
+        """Complete all open bars (shutdown / end of replay)."""
+        with self._lock:
+            completed = [self._complete(b) for b in self.open_bars.values()]
+            self.open_bars.clear()
+        return completed
+
+    def bars(self, symbol: str) -> List[Dict[str, Any]]:
+        with self._lock:
+            return list(self.history.get(symbol, ()))
+
+class BarQueue:
+    """Bounded queue between ingestion and the signal stage.
+    policy='block' (default) applies backpressure: the producer waits for room. With `put_timeout` set the wait
+    is bounded and queue.Full is raised to the producer instead of losing the bar.
+    policy='drop_oldest' never blocks the tick thread but discards (and counts) the oldest bar; a dropped bar
+    leaves gaps in the downstream SMA/RSI state, so only use it where a stale-but-live feed is acceptable."""
+
+    def __init__(self, maxsize: int = 10000, policy: str = 'block', put_timeout: float = None):
+        if policy not in ('drop_oldest', 'block'):
+            raise ValueError(f"unknown backpressure policy: {policy}")
+        self.q = queue.Queue(maxsize=maxsize)
+        self.policy = policy
+        self.put_timeout = put_timeout
+        self.dropped = 0
+
+    def put(self, bar: Dict[str, Any]):
+        if self.policy == 'block':
+            self.q.put(bar, timeout=self.put_timeout)  # raises queue.Full after put_timeout
+            return
+        while True:
+            try:
+                self.q.put_nowait(bar)
+                return
+            except queue.Full:
+                try:
+                    self.q.get_nowait()
+                    self.dropped += 1
+                except queue.Empty:
+                    pass
+
+    def get(self, timeout: float = None) -> Optional[Dict[str, Any]]:
+        try:
+            return self.q.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def qsize(self) -> int:
+        return self.q.qsize()
+
+def _epoch(value) -> Optional[float]:
+    if value is None:
+        return None
+    if isinstance(value, datetime.datetime):
+        return value.timestamp()
+    return float(value)
+
+def normalize_kite_tick(tick: Dict[str, Any], token_to_symbol: Dict[int, str]) -> Optional[Dict[str, Any]]:
+    """Map a KiteTicker tick to {symbol, timestamp, price, cum_volume}; None for unknown tokens."""
+    symbol = token_to_symbol.get(tick.get('instrument_token'))
+    if symbol is None or tick.get('last_price') is None:
+        return None
+    ts = _epoch(tick.get('exchange_timestamp')) or _epoch(tick.get('last_trade_time')) or time.time()
+    return {'symbol': symbol, 'timestamp': ts, 'price': tick['last_price'], 'cum_volume': tick.get('volume_traded')}
+
+class KiteTickSource:
+    """Live ticks from Zerodha KiteTicker (websocket, runs in its own thread)."""
+
+    def __init__(self, api_key: str, access_token: str, token_to_symbol: Dict[int, str], mode: str = 'quote'):
+        if KiteTicker is None:
+            raise RuntimeError("kiteconnect package not installed. pip install kiteconnect")
+        self.token_to_symbol = dict(token_to_symbol)
+        self.mode = mode
+        self.kws = KiteTicker(api_key, access_token)
+        self._on_tick = None
+
+    def start(self, on_tick: Callable[[Dict[str, Any]], None]):
+        self._on_tick = on_tick
+        tokens = list(self.token_to_symbol)
+
+        def on_connect(ws, response):
+            ws.subscribe(tokens)
+            ws.set_mode(self.mode, tokens)
+
+        def on_ticks(ws, ticks):
+            for t in ticks:
+                norm = normalize_kite_tick(t, self.token_to_symbol)
+                if norm is not None:
+                    self._on_tick(norm)
+
+        self.kws.on_connect = on_connect
+        self.kws.on_ticks = on_ticks
+        self.kws.connect(threaded=True)
+
+    def stop(self):
+        self.kws.close()
+
+class ReplayTickSource:
+    """Replays ticks (already normalized, or raw Kite ticks with `token_to_symbol`) in a background thread.
+    `speed=0` replays as fast as possible; `speed=N` sleeps (dt / N) between ticks."""
+
+    def __init__(self, ticks: Iterable[Dict[str, Any]], speed: float = 0.0, token_to_symbol: Dict[int, str] = None):
+        self.ticks = ticks
+        self.speed = speed
+        self.token_to_symbol = token_to_symbol
+        self.done = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _run(self, on_tick):
+        prev_ts = None
+        try:
+            for t in self.ticks:
+                if self._stop.is_set():
+                    break
+                if self.token_to_symbol is not None:
+                    t = normalize_kite_tick(t, self.token_to_symbol)
+                    if t is None:
+                        continue
+                if self.speed and prev_ts is not None and t['timestamp'] > prev_ts:
+                    time.sleep((t['timestamp'] - prev_ts) / self.speed)
+                prev_ts = t['timestamp']
+                on_tick(t)
+        finally:
+            self.done.set()
+
+    def start(self, on_tick: Callable[[Dict[str, Any]], None]):
+        self._thread = threading.Thread(target=self._run, args=(on_tick,), daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+class TickIngestor:
+    """Source -> BarAggregator -> BarQueue. With `clock_interval` set, a timer thread also completes
+    bars whose bucket ended without a new tick (replay sources should leave it None and call stop())."""
+
+    def __init__(self, source, aggregator: BarAggregator = None, bar_queue: BarQueue = None, clock_interval: float = 1.0):
+        self.source = source
+        self.aggregator = aggregator or BarAggregator()
+        self.queue = bar_queue or BarQueue()
+        self.clock_interval = clock_interval
+        self.ticks = 0
+        self._stop = threading.Event()
+        self._clock = None
+
+    def _on_tick(self, tick: Dict[str, Any]):
+        self.ticks += 1
+        for bar in self.aggregator.on_tick(tick):
+            self.queue.put(bar)
+
+    def _run_clock(self):
+        while not self._stop.wait(self.clock_interval):
+            for bar in self.aggregator.close_due():
+                self.queue.put(bar)
+
+    def start(self):
+        self.source.start(self._on_tick)
+        if self.clock_interval:
+            self._clock = threading.Thread(target=self._run_clock, daemon=True)
+            self._clock.start()
+
+    def stop(self, flush: bool = True):
+        self.source.stop()
+        self._stop.set()
+        if self._clock is not None:
+            self._clock.join()
+        if flush:
+            for bar in self.aggregator.flush():
+                self.queue.put(bar)
+
+def run_signal_consumer(bar_queue: BarQueue, params: Dict[str, Any] = None,
+                        on_candidate: Callable[[Dict[str, Any]], None] = print,
+                        stop_event: threading.Event = None, idle_timeout: float = 0.5) -> Dict[str, StreamingSignal]:
+    """Pull completed bars and feed one StreamingSignal per symbol; candidates go to `on_candidate`.
+    Runs until `stop_event` is set and the queue is drained. Returns the per-symbol signal state."""
+    stop_event = stop_event or threading.Event()
+    states: Dict[str, StreamingSignal] = {}
+    while True:
+        bar = bar_queue.get(timeout=idle_timeout)
+        if bar is None:
+            if stop_event.is_set():
+                return states
+            continue
+        state = states.get(bar['symbol'])
+        if state is None:
+            state = states[bar['symbol']] = StreamingSignal(bar['symbol'], params)
+        cand = state.update(bar)
+        if cand:
+            on_candidate(cand)
+
+if __name__ == '__main__':
+    import random
+    rnd = random.Random(0)
+    t0 = int(time.time()) // 60 * 60
+    price = {'RELIANCE.NS': 2600.0, 'TCS.NS': 3900.0}
+    ticks = []
+    for i in range(60 * 120):
+        for sym in price:
+            price[sym] *= 1 + rnd.gauss(0, 0.0005)
+            ticks.append({'symbol': sym, 'timestamp': t0 + i, 'price': round(price[sym], 2), 'qty': rnd.randint(1, 50)})
+    ing = TickIngestor(ReplayTickSource(ticks), BarAggregator(60), BarQueue(), clock_interval=None)
+    ing.start()
+    ing.source.done.wait()
+    ing.stop()
+    stop = threading.Event()
+    stop.set()
+    states = run_signal_consumer(ing.queue, {'sma_short': 5, 'sma_long': 20}, stop_event=stop, idle_timeout=0.01)
+    print({s: st.bars for s, st in states.items()}, 'dropped', ing.queue.dropped)
@@ -0,0 +1,322 @@
+"""timeframes.py
+
+Multi-timeframe bars derived from one stored base interval.
+Functions:
+- timeframe_seconds(timeframe) -> bar length in seconds ('5m', '1h', '1d', '1wk' or an int)
+- bucket_start(timestamps, seconds, anchor=SESSION_ANCHOR) -> bucket label (start) of every timestamp
+- resample(candles, timeframe, anchor=SESSION_ANCHOR) -> Candles aggregated to `timeframe` (vectorized)
+
+Classes:
+- TimeframeBook(base='1m', timeframes=('5m', '15m', '1h', '1d'), max_bars=500, max_base_bars=None)
+  -> per symbol: the base bars plus every derived timeframe, kept up to date incrementally
+
+Buckets are aligned to the NSE session open (09:15 IST), so 1h bars run 09:15-10:15, a 1d bar covers one
+session and is labelled like Yahoo's daily bars, and 1wk bars start on Monday. Aggregation follows the
+usual OHLCV rules: first open, max high, min low, last close, summed volume (missing volume stays -1 when
+a bucket has none). Only fixed-length timeframes that are a multiple of the base interval are supported.
+
+TimeframeBook.update() takes new or revised base bars (an overwritten last bar is the forming bar): bars
+appended after the last one are folded into the open aggregated bars, and a revision re-aggregates only
+the buckets from the first changed bar onwards. Base bars older than the oldest open aggregated bar are
+dropped as late (counted in `late`). Candles returned by get()/frame() are views; bars from the next
+update's first affected bucket onwards may change under them, pass copy=True for a snapshot.
+"""
+from typing import Any, Dict, Iterable, List, Optional, Union
+import threading
+import numpy as np
+from scripts.candles import Candles, FIELDS, MISSING_VOLUME, as_candles
+
+SESSION_ANCHOR = 3 * 3600 + 45 * 60  # 09:15 IST as seconds after 00:00 UTC
+WEEK_ANCHOR = 4 * 86400  # the epoch was a Thursday; weekly buckets start on Monday
+TIMEFRAME_SECONDS = {'1m': 60, '2m': 120, '3m': 180, '5m': 300, '10m': 600, '15m': 900, '30m': 1800, '60m': 3600,
+                     '90m': 5400, '1h': 3600, '2h': 7200, '4h': 14400, '1d': 86400, '5d': 5 * 86400, '1wk': 7 * 86400}
+
+def timeframe_seconds(timeframe: Union[str, int]) -> int:
+    if isinstance(timeframe, (int, np.integer)):
+        return int(timeframe)
+    try:
+        return TIMEFRAME_SECONDS[timeframe]
+    except KeyError:
+        raise ValueError(f"unsupported timeframe: {timeframe!r} (variable-length bars such as '1mo' cannot be resampled)")
+
+def _anchor(seconds: int, anchor: int) -> int:
+    return anchor + WEEK_ANCHOR if seconds % (7 * 86400) == 0 else anchor
+
+def bucket_start(timestamps, seconds: int, anchor: int = SESSION_ANCHOR) -> np.ndarray:
+    a = _anchor(seconds, anchor)
+    ts = np.asarray(timestamps, dtype=np.int64)
+    return (ts - a) // seconds * seconds + a
+
+def _aggregate(c: Candles, seconds: int, anchor: int) -> Candles:
+    """Aggregate timestamp-ordered candles; one output bar per non-empty bucket."""
+    if not len(c):
+        return Candles.empty()
+    labels = bucket_start(c.timestamp, seconds, anchor)
+    change = np.empty(len(labels), dtype=bool)
+    change[0] = True
+    np.not_equal(labels[1:], labels[:-1], out=change[1:])
+    starts = np.flatnonzero(change)
+    ends = np.empty_like(starts)
+    ends[:-1] = starts[1:] - 1
+    ends[-1] = len(labels) - 1
+    # fmax/fmin skip the NaN highs/lows Yahoo sends for some bars
+    high = np.fmax.reduceat(c.high, starts)
+    low = np.fmin.reduceat(c.low, starts)
+    vol = np.add.reduceat(np.maximum(c.volume, 0), starts)
+    vol = np.where(np.maximum.reduceat(c.volume, starts) < 0, MISSING_VOLUME, vol)
+    return Candles._wrap(labels[starts], c.open[starts], high, low, c.close[ends], vol)
+
+def resample(candles, timeframe: Union[str, int], anchor: int = SESSION_ANCHOR) -> Candles:
+    """Aggregate candles (Candles or candle dicts, any order) into `timeframe` bars labelled by bucket start."""
+    return _aggregate(as_candles(candles).sorted(), timeframe_seconds(timeframe), anchor)
+
+class _Bars:
+    """Growable columnar buffer; view() hands out zero-copy Candles over the filled part."""
+    __slots__ = ('cols', 'n')
+
+    def __init__(self, capacity: int = 256):
+        self.cols = [np.empty(capacity, np.int64)] + [np.empty(capacity, np.float64) for _ in range(4)] + \
+                    [np.empty(capacity, np.int64)]
+        self.n = 0
+
+    @property
+    def timestamp(self) -> np.ndarray:
+        return self.cols[0][:self.n]
+
+    def view(self, start: int = 0) -> Candles:
+        return Candles._wrap(*(a[start:self.n] for a in self.cols))
+
+    def write(self, at: int, c: Candles):
+        """Overwrite from row `at` with `c`, dropping everything after it."""
+        end = at + len(c)
+        if end > len(self.cols[0]):
+            cap = max(end, 2 * len(self.cols[0]))
+            grown = []
+            for a in self.cols:
+                g = np.empty(cap, a.dtype)
+                g[:at] = a[:at]
+                grown.append(g)
+            self.cols = grown  # fresh buffers: views handed out earlier keep the old ones
+        for a, f in zip(self.cols, FIELDS):
+            a[at:end] = getattr(c, f)
+        self.n = end
+
+    def append_row(self, row: tuple):
+        n = self.n
+        if n == len(self.cols[0]):
+            self.cols = [np.concatenate([a[:n], np.empty(n, a.dtype)]) for a in self.cols]
+        for a, x in zip(self.cols, row):
+            a[n] = x
+        self.n = n + 1
+
+    def drop_front(self, k: int):
+        if k > 0:
+            # copy instead of shifting in place so outstanding views stay intact
+            self.cols = [np.concatenate([a[k:self.n], np.empty(max(256, self.n - k), a.dtype)]) for a in self.cols]
+            self.n -= k
+
+def _fold(frame: _Bars, new: Candles):
+    """Merge aggregated `new` bars into the tail of `frame`; the first one may continue the open bar."""
+    n = frame.n
+    if n and len(new) and new.timestamp[0] == frame.cols[0][n - 1]:
+        i = n - 1
+        ts, o, h, l, c, v = frame.cols
+        h[i] = np.fmax(h[i], new.high[0])
+        l[i] = np.fmin(l[i], new.low[0])
+        c[i] = new.close[0]
+        if new.volume[0] >= 0:
+            v[i] = new.volume[0] if v[i] < 0 else v[i] + new.volume[0]
+        frame.write(n, new[1:])
+    else:
+        frame.write(n, new)
+
+def _fold_row(frame: _Bars, label: int, o: float, h: float, l: float, c: float, v: int):
+    """Scalar _fold for a single base bar (the streaming case), skipping the array machinery."""
+    n = frame.n
+    if n and frame.cols[0][n - 1] == label:
+        i = n - 1
+        _, _, fh, fl, fc, fv = frame.cols
+        if h > fh[i] or fh[i] != fh[i]:  # NaN-skipping like np.fmax / np.fmin
+            fh[i] = h
+        if l < fl[i] or fl[i] != fl[i]:
+            fl[i] = l
+        fc[i] = c
+        if v >= 0:
+            fv[i] = v if fv[i] < 0 else fv[i] + v
+    else:
+        frame.append_row((label, o, h, l, c, v))
+
+class _Series:
+    __slots__ = ('base', 'frames')
+
+    def __init__(self, timeframes: Iterable[str]):
+        self.base = _Bars()
+        self.frames = {tf: _Bars(64) for tf in timeframes}
+
+class TimeframeBook:
+    """Base bars per symbol plus their resampled timeframes.
+    `max_bars` caps every derived timeframe; `max_base_bars` (default: enough base bars for one bar of the
+    largest timeframe plus `max_bars`) caps the stored base bars. Thread-safe: one writer (fetch / tick
+    thread) and any number of readers."""
+
+    def __init__(self, base: str = '1m', timeframes: Iterable[str] = ('5m', '15m', '1h', '1d'), max_bars: int = 500,
+                 max_base_bars: int = None, anchor: int = SESSION_ANCHOR):
+        self.base = base
+        self.base_seconds = timeframe_seconds(base)
+        self.anchor = anchor
+        self.seconds: Dict[str, int] = {}
+        for tf in dict.fromkeys(timeframes):
+            if tf == base:
+                continue
+            sec = timeframe_seconds(tf)
+            if sec % self.base_seconds:
+                raise ValueError(f"timeframe {tf!r} is not a multiple of the base interval {base!r}")
+            self.seconds[tf] = sec
+        self.timeframes = list(self.seconds)
+        self.max_bars = max_bars
+        widest = max(self.seconds.values(), default=self.base_seconds) // self.base_seconds
+        self.max_base_bars = max_base_bars or widest + max_bars
+        self.late = 0
+        self.errors: Dict[str, str] = {}  # filled by market_data_fetcher.fetch_timeframes
+        self._series: Dict[str, _Series] = {}
+        self._lock = threading.Lock()
+
+    def update(self, symbol: str, candles) -> int:
+        """Merge base-interval candles for `symbol` (bars on an existing timestamp overwrite it) and bring
+        every timeframe up to date. Returns the number of base bars accepted."""
+        new = as_candles(candles).sorted()
+        if not len(new):
+            return 0
+        with self._lock:
+            s = self._series.get(symbol)
+            if s is None:
+                s = self._series[symbol] = _Series(self.timeframes)
+            base = s.base
+            n = base.n
+            if n:
+                cutoff = self._cutoff(s)
+                if new.timestamp[0] < cutoff:
+                    keep = int(np.searchsorted(new.timestamp, cutoff))
+                    self.late += keep
+                    new = new[keep:]
+                    if not len(new):
+                        return 0
+            if len(new) == 1 and (not n or new.timestamp[0] > base.cols[0][n - 1]):
+                row = new[0]
+                t, v = row['timestamp'], row['volume']
+                v = MISSING_VOLUME if v is None else v
+                base.append_row((t, row['open'], row['high'], row['low'], row['close'], v))
+                for tf, sec in self.seconds.items():
+                    a = _anchor(sec, self.anchor)
+                    _fold_row(s.frames[tf], (t - a) // sec * sec + a, row['open'], row['high'], row['low'], row['close'], v)
+                    self._trim(s.frames[tf])
+            elif not n or new.timestamp[0] > base.cols[0][n - 1]:
+                base.write(n, new)
+                for tf, sec in self.seconds.items():
+                    _fold(s.frames[tf], _aggregate(new, sec, self.anchor))
+                    self._trim(s.frames[tf])
+            else:
+                if len(new) == 1 and new.timestamp[0] == base.cols[0][n - 1]:
+                    at = n - 1  # the forming bar again
+                    base.write(at, new)
+                else:
+                    at = self._merge(base, new)
+                first = base.cols[0][at]
+                for tf, sec in self.seconds.items():
+                    frame = s.frames[tf]
+                    label = bucket_start(first, sec, self.anchor)
+                    j = int(np.searchsorted(frame.timestamp, label))
+                    k = int(np.searchsorted(base.timestamp, label))
+                    frame.write(j, _aggregate(base.view(k), sec, self.anchor))
+                    self._trim(frame)
+            self._trim_base(s)
+            return len(new)
+
+    def on_bar(self, bar: Dict[str, Any]) -> int:
+        """Feed one completed bar from tick_ingestion.BarAggregator ({symbol, timestamp, open, ...})."""
+        return self.update(bar['symbol'], [bar])
+
+    def load(self, data: Dict[str, Any]) -> 'TimeframeBook':
+        """update() every {symbol: candles} entry (e.g. a fetch_ohlc_many batch at the base interval)."""
+        for symbol, candles in data.items():
+            if candles is not None:
+                self.update(symbol, candles)
+        return self
+
+    def _merge(self, base: _Bars, new: Candles) -> int:
+        """Splice out-of-order / revised bars into the base buffer; returns the first changed row."""
+        at = int(np.searchsorted(base.timestamp, new.timestamp[0]))
+        tail = base.view(at)
+        ts = np.concatenate([tail.timestamp, new.timestamp])
+        order = np.argsort(ts, kind='stable')
+        ts = ts[order]
+        last = np.empty(len(ts), dtype=bool)  # on duplicate timestamps the incoming bar (later in `ts`) wins
+        last[-1] = True
+        np.not_equal(ts[1:], ts[:-1], out=last[:-1])
+        pick = order[last]
+        merged = Candles._wrap(*(np.concatenate([getattr(tail, f), getattr(new, f)])[pick] for f in FIELDS))
+        base.write(at, merged)
+        return at
+
+    def _cutoff(self, s: _Series) -> int:
+        """Oldest timestamp a revision may still touch: the start of the oldest open aggregated bar, widened
+        to a bucket boundary of every timeframe so re-aggregation never sees a partly trimmed bucket."""
+        opens = [f.cols[0][f.n - 1] for f in s.frames.values() if f.n]
+        if not opens:
+            return int(s.base.cols[0][0])
+        t, prev = int(min(opens)), None
+        while t != prev:  # nested timeframes settle in one pass, others (90m vs 1h) at a common boundary
+            prev = t
+            for sec in self.seconds.values():
+                t = min(t, int(bucket_start(t, sec, self.anchor)))
+        return max(t, int(s.base.cols[0][0]))
+
+    def _trim(self, frame: _Bars):
+        if frame.n > self.max_bars + max(64, self.max_bars // 2):
+            frame.drop_front(frame.n - self.max_bars)
+
+    def _trim_base(self, s: _Series):
+        base = s.base
+        if base.n <= self.max_base_bars + max(256, self.max_base_bars // 2):
+            return
+        k = min(base.n - self.max_base_bars, int(np.searchsorted(base.timestamp, self._cutoff(s))))
+        base.drop_front(k)
+
+    def get(self, symbol: str, timeframe: str = None, copy: bool = False) -> Optional[Candles]:
+        """Bars of `symbol` at `timeframe` (the base interval when None); None for an unknown symbol."""
+        with self._lock:
+            s = self._series.get(symbol)
+            if s is None:
+                return None
+            if timeframe is None or timeframe == self.base:
+                bars = s.base.view(max(0, s.base.n - self.max_base_bars))
+            else:
+                if timeframe not in s.frames:
+                    raise KeyError(f"timeframe {timeframe!r} not tracked (have {self.base!r} + {self.timeframes})")
+                bars = s.frames[timeframe].view(max(0, s.frames[timeframe].n - self.max_bars))
+        return bars[np.arange(len(bars))] if copy else bars
+
+    def frame(self, timeframe: str = None, symbols: Iterable[str] = None, copy: bool = False) -> Dict[str, Candles]:
+        """{symbol: Candles} at one timeframe, in the shape generate_signals / generate_signals_panel take."""
+        symbols = list(self._series) if symbols is None else symbols
+        out = {}
+        for sym in symbols:
+            bars = self.get(sym, timeframe, copy=copy)
+            if bars is not None:
+                out[sym] = bars
+        return out
+
+    def last_timestamp(self, symbol: str) -> Optional[int]:
+        """Timestamp of the latest base bar of `symbol` (None before its first update)."""
+        with self._lock:
+            s = self._series.get(symbol)
+            return int(s.base.cols[0][s.base.n - 1]) if s is not None and s.base.n else None
+
+    def symbols(self) -> List[str]:
+        return list(self._series)
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self._series
+
+    def __len__(self) -> int:
+        return len(self._series)
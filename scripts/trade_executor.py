@@ -2,37 +2,42 @@
 """trade_executor.py
 
 AgentX-ready trade executor.
-- execute_trades(validated_orders, mock=True)
-By default runs in `mock=True` and simulates fills. For live trading, integrate broker SDK (e.g., kiteconnect).
+- execute_trades(validated_orders, mock=True, router=None)
+- simulate_fill(order, rng=random) -> (filled_qty, avg_price) using the mock slippage model
+By default runs in `mock=True` and simulates fills (orders go out concurrently, see order_router.py). For live trading, integrate broker SDK (e.g., kiteconnect).
 """
 from typing import List, Dict, Any
-import os, time, random
+import os, time, random, threading
+from scripts.instrumentation import tool
 
-def tool(name=None, description=None):
-    def _dec(f):
-        return f
-    return _dec
+MOCK_SLIPPAGE = 0.0005  # fills land uniformly within +/- 5 bps of the order price
+
+def simulate_fill(order: Dict[str, Any], rng=random):
+    """Mock fill model shared by execute_trades and the backtester. Returns (filled_qty, avg_price)."""
+    return order['qty'], round(order['price'] * (1 + rng.uniform(-MOCK_SLIPPAGE, MOCK_SLIPPAGE)), 2)
+
+_mock_router = None
+_router_lock = threading.Lock()
+
+def _get_mock_router():
+    """Process-wide mock router, so a client_order_id re-submitted in a later call is not placed again."""
+    global _mock_router
+    with _router_lock:
+        if _mock_router is None:
+            from scripts.order_router import OrderRouter, MockBroker
+            _mock_router = OrderRouter(MockBroker(latency=0.05), rate_limit=0)
+        return _mock_router
 
 @tool(name='Trade Executor', description='Mock executor; placeholder for real broker integration')
-def execute_trades(validated_orders: List[Dict[str, Any]], mock: bool = True) -> List[Dict[str, Any]]:
-    results = []
+def execute_trades(validated_orders: List[Dict[str, Any]], mock: bool = True, max_concurrency: int = 8,
+                   router=None) -> List[Dict[str, Any]]:
+    """Orders are submitted concurrently through OrderRouter (see order_router.py); results keep input order
+    and also carry `attempts` and `latency_ms`. Pass `router` to use your own OrderRouter; by default one
+    shared mock router is kept for the process so known client_order_ids are deduplicated across calls."""
+    if router is not None:
+        return router.submit_batch(validated_orders, max_concurrency=max_concurrency)
     if mock or os.getenv('BROKER', 'MOCK').upper() == 'MOCK':
-        for o in validated_orders:
-            time.sleep(0.05)  # simulate API latency
-            filled_qty = o['qty']
-            avg_price = round(o['price'] * (1 + random.uniform(-0.0005, 0.0005)), 2)
-            res = {
-                'client_order_id': o.get('client_order_id'),
-                'order_id': f"MOCK-{int(time.time()*1000)}",
-                'status': 'FILLED',
-                'filled_qty': filled_qty,
-                'avg_price': avg_price,
-                'notional': round(filled_qty * avg_price, 2),
-                'symbol': o.get('symbol'),
-                'side': o.get('side')
-            }
-            results.append(res)
-        return results
+        return _get_mock_router().submit_batch(validated_orders, max_concurrency=max_concurrency)
     # Placeholder for Kite Connect / Upstox SDK call integration
     raise NotImplementedError('Live broker integration not implemented. Use mock=True or extend this file.')
 
@@ -7,7 +7,12 @@ Functions:
 - get_login_url(api_key, redirect_uri) -> str
 - fetch_access_token(api_key, api_secret, request_token) -> access_token
 - init_kite(api_key, access_token) -> kite_client
-- place_order_live(kite_client, order) -> result dict
+- place_order_live(kite_client, order, instruments=None) -> result dict
+- place_orders_live(kite_client, orders, max_concurrency=8, rate_limit=10.0, instruments=None) -> list of result dicts
+
+Order symbols may be Yahoo-style ('RELIANCE.NS'); they are mapped to exchange + tradingsymbol (and limit
+prices to the tick grid) through `instruments` or the shared symbol master (symbol_master.get_master()),
+falling back to stripping the .NS/.BO suffix.
 
 Usage:
 1. Set KITE_API_KEY and KITE_API_SECRET as env vars or pass them explicitly.
@@ -17,8 +22,10 @@ Usage:
 
 Security: Use AgentX secret store or env vars. Do NOT commit secrets.
 """
-from typing import Dict, Any
+from typing import Dict, Any, List
 import os, time
+from scripts.order_router import OrderRouter, KiteBroker, kite_tag
+from scripts.symbol_master import YAHOO_SUFFIX, get_master, round_to_tick
 try:
     from kiteconnect import KiteConnect, KiteTicker
 except Exception as e:
@@ -51,36 +58,58 @@ def init_kite(api_key: str, access_token: str):
     kite.set_access_token(access_token)
     return kite
 
-def place_order_live(kite, order: Dict[str, Any]) -> Dict[str, Any]:
-    """Place an order via kite API. Order keys expected: symbol (e.g., 'RELIANCE'), side 'BUY'/'SELL', qty, price, order_type ('MARKET'/'LIMIT'), product ('MIS'/'NRML')"""
-    if kite is None:
-        raise ValueError("kite client required")
-    # map symbol to exchange instrument token / tradingsymbol expected by kite
-    # For simplicity assume NSE equity, instrument token lookup is required for real use.
-    tradingsymbol = order.get('symbol')
+def kite_order_params(order: Dict[str, Any], exchange: str = 'NSE', instruments=None) -> Dict[str, Any]:
+    """Map an order dict to kite.place_order kwargs. `client_order_id` is sent as the order tag so the
+    order can be found again after a lost acknowledgement."""
+    master = instruments if instruments is not None else get_master()
+    inst = master.lookup(order.get('symbol')) if master is not None else None
+    if inst is not None:
+        exchange, tradingsymbol = inst.exchange, inst.tradingsymbol
+    else:
+        tradingsymbol = order.get('symbol')
+        for ex, suffix in YAHOO_SUFFIX.items():
+            if tradingsymbol.upper().endswith(suffix.upper()):
+                exchange, tradingsymbol = ex, tradingsymbol[:-len(suffix)]
+                break
     side = order.get('side', 'BUY').upper()
     qty = int(order.get('qty', 1))
     order_type = order.get('order_type', 'MARKET').upper()
     product = order.get('product', 'MIS')  # intraday by default
     variety = order.get('variety', 'regular')
     price = order.get('price', None)
+    params = {
+        'variety': variety,
+        'tradingsymbol': tradingsymbol,
+        'exchange': exchange,
+        'transaction_type': 'BUY' if side == 'BUY' else 'SELL',
+        'quantity': qty,
+        'product': product,
+        'order_type': order_type
+    }
+    if order_type == 'LIMIT' and price is not None:
+        params['price'] = float(round_to_tick(price, inst.tick_size)) if inst is not None else float(price)
+        params['trigger_price'] = float(order.get('trigger_price', 0.0))
+    if order.get('client_order_id'):
+        params['tag'] = kite_tag(order['client_order_id'])
+    return params
+
+def place_order_live(kite, order: Dict[str, Any], instruments=None) -> Dict[str, Any]:
+    """Place an order via kite API. Order keys expected: symbol (e.g., 'RELIANCE'), side 'BUY'/'SELL', qty, price, order_type ('MARKET'/'LIMIT'), product ('MIS'/'NRML')"""
+    if kite is None:
+        raise ValueError("kite client required")
     try:
-        params = {
-            'tradingsymbol': tradingsymbol,
-            'exchange': 'NSE',
-            'transaction_type': 'BUY' if side == 'BUY' else 'SELL',
-            'quantity': qty,
-            'product': product,
-            'order_type': order_type
-        }
-        if order_type == 'LIMIT' and price is not None:
-            params['price'] = float(price)
-            params['trigger_price'] = float(order.get('trigger_price', 0.0))
         # place order
-        res = kite.place_order(**params)
+        res = kite.place_order(**kite_order_params(order, instruments=instruments))
         return {'status': 'ok', 'kite_response': res}
     except Exception as e:
         return {'status': 'error', 'error': str(e)}
 
+def place_orders_live(kite, orders: List[Dict[str, Any]], max_concurrency: int = 8, rate_limit: float = 10.0,
+                      instruments=None) -> List[Dict[str, Any]]:
+    """Submit a batch concurrently under Kite's order rate limit (10/s by default), with idempotent retries
+    keyed by client_order_id. Returns one result per order (input order) with order_id, status, latency_ms."""
+    router = OrderRouter(KiteBroker(kite, instruments=instruments), max_concurrency=max_concurrency, rate_limit=rate_limit)
+    return router.submit_batch(orders)
+
 if __name__ == '__main__':
     print('This module provides helper functions to integrate with Zerodha KiteConnect.')
@@ -2,27 +2,148 @@
 """trade_logger.py
 
 AgentX-ready logger to append executions to CSV.
-- log_trades(results, csv_path='logs/trades.csv')
+- log_trades(results, csv_path='logs/trades.csv', flush=True)
+- TradeLogWriter(path, backend='csv'|'parquet', max_buffer=500, flush_interval=2.0) -> buffered batch writer
+- export_csv(parquet_dir, csv_path) -> rebuild the CSV from a parquet log
+
+log_trades is write-through by default: rows are on disk when it returns, so the workflow `log` node and the
+metrics/trade-store syncs that read the CSV right after see them. Hot loops can pass flush=False (or use a
+TradeLogWriter directly); rows are then buffered in memory and written in batches when the buffer reaches
+`max_buffer` rows, when `flush_interval` seconds pass, or at interpreter shutdown. The CSV backend keeps one file handle open;
+the parquet backend (needs pyarrow) writes one part file per flush under date=YYYY-MM-DD/ partitions,
+so nothing is ever rewritten and the CSV stays available through export_csv.
 """
 from typing import List, Dict, Any
-import csv, os
+import atexit, csv, glob, importlib.util, os, threading
 from datetime import datetime
+from scripts.instrumentation import tool
+from scripts.runtime import lazy_import
 
-def tool(name=None, description=None):
-    def _dec(f):
-        return f
-    return _dec
+if importlib.util.find_spec('pyarrow') is not None:
+    pa = lazy_import('pyarrow')  # imported by the first parquet flush, CSV-only runs never load it
+    pq = lazy_import('pyarrow.parquet')
+else:
+    pa = pq = None  # pyarrow not installed; parquet backend will raise if used
 
-@tool(name='Trade Logger', description='Append executions to CSV')
-def log_trades(results: List[Dict[str, Any]], csv_path: str = 'logs/trades.csv') -> str:
-    os.makedirs(os.path.dirname(csv_path), exist_ok=True)
-    write_header = not os.path.exists(csv_path)
-    with open(csv_path, 'a', newline='') as f:
+TRADE_LOG_COLUMNS = ['timestamp','order_id','client_order_id','symbol','side','filled_qty','avg_price','notional','status']
+
+def _row(r: Dict[str, Any], ts: str) -> List[Any]:
+    return [ts, r.get('order_id'), r.get('client_order_id'), r.get('symbol'), r.get('side'), r.get('filled_qty'), r.get('avg_price'), r.get('notional'), r.get('status')]
+
+class TradeLogWriter:
+    def __init__(self, path: str, backend: str = 'csv', max_buffer: int = 500, flush_interval: float = 2.0):
+        if backend not in ('csv', 'parquet'):
+            raise ValueError(f"unknown trade log backend: {backend}")
+        if backend == 'parquet' and pa is None:
+            raise RuntimeError("pyarrow package not installed. pip install pyarrow")
+        self.path = path
+        self.backend = backend
+        self.max_buffer = max_buffer
+        self.flush_interval = flush_interval
+        self.rows_written = 0
+        self.flushes = 0
+        self._buf: List[List[Any]] = []
+        self._lock = threading.Lock()
+        self._file = None
+        self._writer = None
+        self._closed = False
+        self._stop = threading.Event()
+        self._timer = None
+        if flush_interval:
+            self._timer = threading.Thread(target=self._run_timer, daemon=True)
+            self._timer.start()
+        atexit.register(self.close)
+
+    def _run_timer(self):
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
+
+    def append(self, results: List[Dict[str, Any]]):
+        ts = datetime.utcnow().isoformat()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError('trade log writer is closed')
+            self._buf.extend(_row(r, ts) for r in results)
+            full = len(self._buf) >= self.max_buffer
+        if full:
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            if not self._buf:
+                return
+            rows, self._buf = self._buf, []
+            if self.backend == 'csv':
+                self._write_csv(rows)
+            else:
+                self._write_parquet(rows)
+            self.rows_written += len(rows)
+            self.flushes += 1
+
+    def _write_csv(self, rows: List[List[Any]]):
+        if self._file is None:
+            if os.path.dirname(self.path):
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            write_header = not os.path.exists(self.path) or os.path.getsize(self.path) == 0
+            self._file = open(self.path, 'a', newline='')
+            self._writer = csv.writer(self._file)
+            if write_header:
+                self._writer.writerow(TRADE_LOG_COLUMNS)
+        self._writer.writerows(rows)
+        self._file.flush()
+
+    def _write_parquet(self, rows: List[List[Any]]):
+        cols = list(zip(*rows))
+        table = pa.table({name: list(col) for name, col in zip(TRADE_LOG_COLUMNS, cols)})
+        part_dir = os.path.join(self.path, f"date={rows[0][0][:10]}")
+        os.makedirs(part_dir, exist_ok=True)
+        stamp = datetime.utcnow().strftime('%H%M%S%f')
+        pq.write_table(table, os.path.join(part_dir, f"part-{stamp}-{os.getpid()}-{self.flushes:06d}.parquet"))
+
+    def close(self):
+        if self._closed:
+            return
+        self._stop.set()
+        self.flush()
+        with self._lock:
+            self._closed = True
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+_writers: Dict[str, TradeLogWriter] = {}
+_writers_lock = threading.Lock()
+
+def get_writer(path: str, backend: str = 'csv', **kwargs) -> TradeLogWriter:
+    """Process-wide writer per (path, backend), created on first use."""
+    with _writers_lock:
+        w = _writers.get((path, backend))
+        if w is None or w._closed:
+            w = _writers[(path, backend)] = TradeLogWriter(path, backend=backend, **kwargs)
+        return w
+
+def export_csv(parquet_dir: str, csv_path: str) -> str:
+    """Write every part file of a parquet trade log (in partition/file order) to one CSV."""
+    if pq is None:
+        raise RuntimeError("pyarrow package not installed. pip install pyarrow")
+    if os.path.dirname(csv_path):
+        os.makedirs(os.path.dirname(csv_path), exist_ok=True)
+    with open(csv_path, 'w', newline='') as f:
         writer = csv.writer(f)
-        if write_header:
-            writer.writerow(['timestamp','order_id','client_order_id','symbol','side','filled_qty','avg_price','notional','status'])
-        for r in results:
-            writer.writerow([datetime.utcnow().isoformat(), r.get('order_id'), r.get('client_order_id'), r.get('symbol'), r.get('side'), r.get('filled_qty'), r.get('avg_price'), r.get('notional'), r.get('status')])
+        writer.writerow(TRADE_LOG_COLUMNS)
+        for part in sorted(glob.glob(os.path.join(parquet_dir, 'date=*', '*.parquet'))):
+            t = pq.read_table(part, columns=TRADE_LOG_COLUMNS)
+            writer.writerows(zip(*(t.column(c).to_pylist() for c in TRADE_LOG_COLUMNS)))
+    return csv_path
+
+@tool(name='Trade Logger', description='Append executions to CSV')
+def log_trades(results: List[Dict[str, Any]], csv_path: str = 'logs/trades.csv', flush: bool = True) -> str:
+    """Append executions to `csv_path` through the shared writer (one open handle per path). With flush=False
+    the rows are only buffered and reach disk on the next batch flush."""
+    writer = get_writer(csv_path)
+    writer.append(results)
+    if flush:
+        writer.flush()
     return csv_path
 
 if __name__ == '__main__':
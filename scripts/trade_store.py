@@ -0,0 +1,467 @@
+"""trade_store.py
+
+Partitioned, memory-mapped columnar trade history with predicate pushdown and streaming aggregates.
+Classes:
+- TradeStore(root='logs/trade_store', part_rows=1_000_000, batch_rows=1_000_000) -> on-disk store of closed trades
+  - append(trades) -> rows written (trade_history.csv dicts, e.g. backtester output)
+  - sync_csv(csv_path) -> rows imported from a trade_history.csv since the last sync
+  - scan(strategies=None, symbols=None, start=None, end=None, columns=None) -> iterator of TradeChunk
+  - read(...same predicates...) -> {column: array} (symbol/strategy decoded to strings)
+  - aggregate(by='strategy'|'symbol'|'date'|None, capital=None, ...predicates) -> {group: metrics}
+  - strategy_metrics(...predicates) -> compute_strategy_metrics shape (+ drawdown / turnover keys)
+  - compact(...predicates) -> merges the small part files of each partition
+
+Layout: <root>/date=YYYY-MM-DD/strategy=<name>/part-*/ holds one raw little-endian .bin file per column plus
+meta.json (rows, column dtypes, first/last timestamp, symbol dictionary). Dates are UTC days, as in the trade
+logger's parquet partitions. Columns of at least MMAP_MIN_BYTES are memory-mapped, smaller ones read whole. Symbols are stored as int32 codes into the part's dictionary and sides as int8 (+1 BUY, -1 SELL).
+Parts are immutable and published with an atomic rename, so readers never see half-written files.
+
+Predicates are pushed down in order: strategy and date prune partition directories, the part meta prunes
+by time range and symbol dictionary, and only then are the memory-mapped timestamp/symbol columns masked;
+other columns are only paged in for the rows selected. aggregate() streams whole UTC days in timestamp
+order, `batch_rows` rows at a time: sharpe / win_rate / avg_return use the same per-trade returns and formulas as
+metrics_calculator (batch Welford merge), max_drawdown is the deepest fall of cumulative pnl from its
+running peak, turnover is the traded notional of both legs (turnover_ratio = turnover / capital).
+Memory is bounded by `batch_rows` (or the largest selected day, if bigger), whatever the history size.
+"""
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+from collections import defaultdict
+from datetime import datetime, timezone
+from urllib.parse import quote, unquote
+import argparse, csv, json, os, shutil, threading
+import numpy as np
+from scripts.metrics_calculator import RunningStats, trade_returns
+
+COLUMNS = {'timestamp': np.int64, 'entry_timestamp': np.int64, 'symbol': np.int32, 'side': np.int8,
+           'qty': np.float64, 'price': np.float64, 'exit_price': np.float64, 'pnl': np.float64}
+SIDES = {'BUY': 1, 'SELL': -1}
+SIDE_NAMES = {1: 'BUY', -1: 'SELL', 0: ''}
+NO_TIMESTAMP = np.iinfo(np.int64).min
+DAY = 86400
+MMAP_MIN_BYTES = 1 << 20  # below this a plain read is cheaper than setting up a mapping
+
+def _epoch(value, end: bool = False) -> Optional[int]:
+    """Epoch seconds from an int/float, a datetime/date or an ISO string ('2024-01-05', '2024-01-05T10:00:00').
+    With end=True a bare date means the last second of that day, so date ranges are inclusive."""
+    if value is None or isinstance(value, (int, np.integer)):
+        return value
+    if isinstance(value, float):
+        return int(value)
+    whole_day = (isinstance(value, str) and len(value) == 10) or not hasattr(value, 'hour')
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if not isinstance(value, datetime):
+        value = datetime(value.year, value.month, value.day)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return int(value.timestamp()) + (DAY - 1 if end and whole_day else 0)
+
+def _epochs(values) -> np.ndarray:
+    """Vectorized _epoch for a column of numbers or ISO strings (naive times are UTC); blanks -> NO_TIMESTAMP."""
+    if isinstance(values, np.ndarray) and values.dtype.kind in 'iuf':
+        return values.astype(np.int64)
+    arr = np.asarray(values, dtype=object)
+    out = np.full(len(arr), NO_TIMESTAMP, dtype=np.int64)
+    blank = np.array([v is None or v == '' for v in arr], dtype=bool)
+    if blank.all():
+        return out
+    vals = arr[~blank]
+    try:
+        out[~blank] = np.asarray(vals, dtype=np.float64).astype(np.int64)
+    except (TypeError, ValueError):
+        num = np.array([isinstance(v, (int, float, np.number)) for v in vals], dtype=bool)
+        parsed = np.empty(len(vals), dtype=np.int64)
+        parsed[num] = np.asarray(vals[num], dtype=np.float64).astype(np.int64)
+        strs = np.array([str(v).replace('Z', '').split('+')[0] for v in vals[~num]])
+        parsed[~num] = strs.astype('datetime64[us]').astype('datetime64[s]').astype(np.int64)
+        out[~blank] = parsed
+    return out
+
+def _floats(values, n: int) -> np.ndarray:
+    if values is None:
+        return np.full(n, np.nan)
+    try:
+        return np.asarray(values, dtype=np.float64)
+    except (TypeError, ValueError):  # blanks / None from CSV rows or dicts
+        return np.array([np.nan if v is None or v == '' else v for v in values], dtype=np.float64)
+
+def _strings(values, n: int) -> np.ndarray:
+    """Column of str; None -> ''."""
+    if values is None:
+        return np.full(n, '')
+    arr = np.asarray(values, dtype=object)
+    arr[arr == None] = ''  # noqa: E711 (elementwise)
+    return arr.astype(str)
+
+def _codes(values: np.ndarray, mapping: Dict[str, int], default: int = 0) -> np.ndarray:
+    """Map a str column through `mapping` via its distinct values (one dict lookup per distinct value)."""
+    uniq, inv = np.unique(values, return_inverse=True)
+    return np.array([mapping.get(u, default) for u in uniq.tolist()], dtype=np.int64)[inv]
+
+class TradeChunk:
+    """Rows of one part file matching a scan: `columns` are memory-mapped arrays (masked copies when a row
+    predicate applied); symbol codes index `symbols`."""
+    __slots__ = ('date', 'strategy', 'symbols', 'columns')
+
+    def __init__(self, date: str, strategy: str, symbols: List[str], columns: Dict[str, np.ndarray]):
+        self.date, self.strategy, self.symbols, self.columns = date, strategy, symbols, columns
+
+    def __getitem__(self, column: str) -> np.ndarray:
+        return self.columns[column]
+
+    def __len__(self) -> int:
+        return len(next(iter(self.columns.values()))) if self.columns else 0
+
+    def symbol_names(self) -> np.ndarray:
+        return np.asarray(self.symbols, dtype=object)[self.columns['symbol']]
+
+    def __repr__(self) -> str:
+        return f"TradeChunk({self.date}, {self.strategy!r}, n={len(self)})"
+
+class _Agg:
+    __slots__ = ('returns', 'equity', 'peak', 'max_drawdown', 'turnover', 'pnl')
+
+    def __init__(self):
+        self.returns = RunningStats()
+        self.equity = self.peak = self.max_drawdown = self.turnover = self.pnl = 0.0
+
+    def add(self, qty: np.ndarray, price: np.ndarray, exit_price: np.ndarray, pnl: np.ndarray):
+        self.returns.add_many(trade_returns(price, exit_price, qty))
+        pnl = np.nan_to_num(pnl)
+        eq = self.equity + np.cumsum(pnl)
+        peaks = np.maximum(self.peak, np.maximum.accumulate(eq))
+        self.max_drawdown = max(self.max_drawdown, float((peaks - eq).max()))
+        self.equity, self.peak = float(eq[-1]), float(peaks[-1])
+        self.pnl += float(pnl.sum())
+        q = np.abs(qty)
+        self.turnover += float(np.nansum(q * price) + np.nansum(q * exit_price))
+
+    def metrics(self, capital: float = None) -> Dict[str, Any]:
+        out = self.returns.metrics()
+        out.update({'trades': self.returns.count, 'pnl': self.pnl, 'max_drawdown': self.max_drawdown,
+                    'turnover': self.turnover})
+        if capital:
+            out['turnover_ratio'] = self.turnover / capital
+            out['max_drawdown_pct'] = self.max_drawdown / capital
+        return out
+
+class TradeStore:
+    def __init__(self, root: str = 'logs/trade_store', part_rows: int = 1_000_000, batch_rows: int = 1_000_000):
+        self.root = root
+        self.part_rows = part_rows
+        self.batch_rows = batch_rows
+        self._meta: Dict[str, Dict[str, Any]] = {}  # part dir -> meta.json (parts are immutable)
+        self._lock = threading.Lock()
+        self._seq = 0
+        self.skipped = 0
+        os.makedirs(root, exist_ok=True)
+
+    # --- writing ---
+    def append(self, trades) -> int:
+        """Store closed trades given as trade_history dicts or as {column: values} (plus 'strategy'/'symbol')."""
+        if isinstance(trades, dict):
+            cols = trades
+        else:
+            trades = list(trades)
+            cols = {c: [t.get(c) for t in trades] for c in list(COLUMNS) + ['strategy']}
+        return self._write(cols)
+
+    def _write(self, cols: Dict[str, Any]) -> int:
+        ts = _epochs(cols['timestamp'])
+        valid = ts != NO_TIMESTAMP
+        n = int(valid.sum())
+        self.skipped += len(ts) - n  # no timestamp -> no partition
+        if not n:
+            return 0
+        m = len(ts)
+        entry = cols.get('entry_timestamp')
+        data = {'timestamp': ts,
+                'entry_timestamp': _epochs(entry) if entry is not None else np.full(m, NO_TIMESTAMP, np.int64),
+                'symbol': _strings(cols.get('symbol'), m),
+                'side': _codes(np.char.upper(_strings(cols.get('side'), m)), SIDES).astype(np.int8)}
+        for c in ('qty', 'price', 'exit_price'):
+            data[c] = _floats(cols.get(c), m)
+        pnl = _floats(cols.get('pnl'), m)
+        # missing pnl: same side-agnostic convention as metrics_calculator.trade_returns
+        data['pnl'] = np.where(np.isnan(pnl), (data['exit_price'] - data['price']) * data['qty'], pnl)
+        strategy = _strings(cols.get('strategy'), m)
+        if n < m:
+            data = {c: a[valid] for c, a in data.items()}
+            strategy, ts = strategy[valid], ts[valid]
+        strats, s_inv = np.unique(strategy, return_inverse=True)
+        days = ts // DAY
+        keys = days * len(strats) + s_inv
+        order = np.argsort(keys, kind='stable')
+        bounds = np.flatnonzero(np.diff(keys[order])) + 1
+        for idx in np.split(order, bounds):
+            k = keys[idx[0]]
+            rows = idx[np.argsort(ts[idx], kind='stable')]
+            for lo in range(0, len(rows), self.part_rows):
+                part = rows[lo:lo + self.part_rows]
+                self._write_part(int(k // len(strats)), strats[k % len(strats)], {c: a[part] for c, a in data.items()})
+        return n
+
+    def _partition_dir(self, day: int, strategy: str) -> str:
+        date = datetime.fromtimestamp(day * DAY, timezone.utc).strftime('%Y-%m-%d')
+        return os.path.join(self.root, f'date={date}', f'strategy={quote(strategy, safe="")}')
+
+    def _write_part(self, day: int, strategy: str, data: Dict[str, np.ndarray]):
+        pdir = self._partition_dir(day, strategy)
+        os.makedirs(pdir, exist_ok=True)
+        with self._lock:
+            self._seq += 1
+            name = f"part-{datetime.utcnow().strftime('%Y%m%d%H%M%S%f')}-{os.getpid()}-{self._seq:06d}"
+        tmp = os.path.join(pdir, '.' + name)
+        os.makedirs(tmp)
+        symbols, codes = np.unique(data['symbol'].astype(str), return_inverse=True)
+        data = dict(data, symbol=codes.astype(np.int32))
+        dtypes = {}
+        for c, dtype in COLUMNS.items():
+            a = np.ascontiguousarray(data[c], dtype=np.dtype(dtype).newbyteorder('<'))
+            a.tofile(os.path.join(tmp, c + '.bin'))
+            dtypes[c] = a.dtype.str
+        meta = {'rows': len(codes), 'columns': dtypes, 'ts_min': int(data['timestamp'][0]),
+                'ts_max': int(data['timestamp'][-1]), 'symbols': symbols.tolist()}
+        with open(os.path.join(tmp, 'meta.json'), 'w') as f:
+            json.dump(meta, f)
+        os.rename(tmp, os.path.join(pdir, name))
+
+    def sync_csv(self, csv_path: str, chunk_bytes: int = 8 << 20) -> int:
+        """Import rows appended to a trade_history.csv since the last sync, `chunk_bytes` at a time.
+        The byte offset is kept in <root>/imports.json; a truncated/replaced CSV is imported again from the start."""
+        state_path = os.path.join(self.root, 'imports.json')
+        state = {}
+        if os.path.exists(state_path):
+            with open(state_path) as f:
+                state = json.load(f)
+        key = os.path.abspath(csv_path)
+        entry = state.get(key) or {'offset': 0, 'header': None}
+        if not os.path.exists(csv_path):
+            return 0
+        if os.path.getsize(csv_path) < entry['offset']:
+            entry = {'offset': 0, 'header': None}
+        added = 0
+        with open(csv_path, 'rb') as f:
+            f.seek(entry['offset'])
+            while True:
+                chunk = f.read(chunk_bytes)
+                end = chunk.rfind(b'\n') + 1  # leave a partially written last line for next time
+                if end == 0:
+                    break
+                f.seek(entry['offset'] + end)
+                reader = csv.reader(chunk[:end].decode().splitlines())
+                if entry['header'] is None:
+                    entry['header'] = next(reader)
+                rows = [r for r in reader if r]
+                if rows:
+                    cols = dict(zip(entry['header'], zip(*rows)))
+                    added += self._write({c: cols.get(c) for c in list(COLUMNS) + ['strategy']})
+                entry['offset'] += end
+                state[key] = entry
+                tmp = state_path + '.tmp'
+                with open(tmp, 'w') as out:
+                    json.dump(state, out)
+                os.replace(tmp, state_path)
+        return added
+
+    # --- reading ---
+    def _partitions(self, strategies: Iterable[str] = None, start: int = None, end: int = None):
+        """(date, strategy, dir) in date order, pruned by strategy name and day range."""
+        wanted = set(strategies) if strategies is not None else None
+        lo = start // DAY if start is not None else None
+        hi = end // DAY if end is not None else None
+        out = []
+        for ddir in sorted(d for d in os.listdir(self.root) if d.startswith('date=')):
+            date = ddir[5:]
+            day = _epoch(date) // DAY
+            if (lo is not None and day < lo) or (hi is not None and day > hi):
+                continue
+            for sdir in sorted(os.listdir(os.path.join(self.root, ddir))):
+                strategy = unquote(sdir[len('strategy='):])
+                if wanted is None or strategy in wanted:
+                    out.append((date, strategy, os.path.join(self.root, ddir, sdir)))
+        return out
+
+    def _parts(self, pdir: str):
+        for name in sorted(os.listdir(pdir)):
+            if not name.startswith('part-'):
+                continue
+            path = os.path.join(pdir, name)
+            meta = self._meta.get(path)
+            if meta is None:
+                with open(os.path.join(path, 'meta.json')) as f:
+                    meta = self._meta[path] = json.load(f)
+            yield path, meta
+
+    def scan(self, strategies: Iterable[str] = None, symbols: Iterable[str] = None, start=None, end=None,
+             columns: Iterable[str] = None) -> Iterator[TradeChunk]:
+        """Yield the matching rows part by part (date order). `start`/`end` are inclusive epoch seconds, ISO
+        strings or dates; `columns` projects (default: all)."""
+        start, end = _epoch(start), _epoch(end, end=True)
+        columns = list(columns or COLUMNS)
+        wanted = set(symbols) if symbols is not None else None
+        for date, strategy, pdir in self._partitions(strategies, start, end):
+            for path, meta in self._parts(pdir):
+                if (start is not None and meta['ts_max'] < start) or (end is not None and meta['ts_min'] > end):
+                    continue
+                codes = None
+                if wanted is not None:
+                    codes = [i for i, s in enumerate(meta['symbols']) if s in wanted]
+                    if not codes:
+                        continue
+                    if len(codes) == len(meta['symbols']):
+                        codes = None
+                mask = None
+                if (start is not None and meta['ts_min'] < start) or (end is not None and meta['ts_max'] > end):
+                    ts = self._column(path, meta, 'timestamp')
+                    mask = np.ones(len(ts), dtype=bool)
+                    if start is not None:
+                        mask &= ts >= start
+                    if end is not None:
+                        mask &= ts <= end
+                if codes is not None:
+                    sym = np.isin(self._column(path, meta, 'symbol'), codes)
+                    mask = sym if mask is None else mask & sym
+                if mask is not None and not mask.any():
+                    continue
+                cols = {c: self._column(path, meta, c) for c in columns}
+                if mask is not None:
+                    cols = {c: a[mask] for c, a in cols.items()}
+                yield TradeChunk(date, strategy, meta['symbols'], cols)
+
+    @staticmethod
+    def _column(path: str, meta: Dict[str, Any], column: str) -> np.ndarray:
+        dtype = np.dtype(meta['columns'][column])
+        fn = os.path.join(path, column + '.bin')
+        if meta['rows'] * dtype.itemsize < MMAP_MIN_BYTES:
+            return np.fromfile(fn, dtype=dtype)
+        return np.memmap(fn, dtype=dtype, mode='r', shape=(meta['rows'],))
+
+    def read(self, strategies: Iterable[str] = None, symbols: Iterable[str] = None, start=None, end=None,
+             columns: Iterable[str] = None) -> Dict[str, np.ndarray]:
+        """Materialize a scan: {column: array} plus 'strategy', with 'symbol' and 'side' decoded to strings."""
+        columns = list(columns or COLUMNS)
+        need = list(dict.fromkeys(columns + ['symbol']))
+        parts = defaultdict(list)
+        for chunk in self.scan(strategies, symbols, start, end, need):
+            for c in columns:
+                parts[c].append(chunk.symbol_names() if c == 'symbol' else np.asarray(chunk[c]))
+            parts['strategy'].append(np.full(len(chunk), chunk.strategy, dtype=object))
+        out = {}
+        for c in columns + ['strategy']:
+            if not parts[c]:
+                out[c] = np.empty(0, dtype=object if c in ('symbol', 'strategy') else COLUMNS[c])
+            else:
+                out[c] = np.concatenate(parts[c])
+        if 'side' in out:
+            out['side'] = np.array([SIDE_NAMES[-1], SIDE_NAMES[0], SIDE_NAMES[1]], dtype=object)[out['side'].astype(np.int64) + 1]
+        return out
+
+    def _batches(self, strategies, symbols, start, end, group):
+        """Selected rows of every strategy in timestamp order, whole UTC days at a time, about `batch_rows` per
+        batch; `group(chunk)` gives each row's integer group code."""
+        columns = ['timestamp', 'symbol', 'qty', 'price', 'exit_price', 'pnl']
+        day, chunks, codes, rows = None, [], [], 0
+        for chunk in self.scan(strategies, symbols, start, end, columns):
+            if chunk.date != day and rows >= self.batch_rows:
+                yield self._merge(chunks, codes)
+                chunks, codes, rows = [], [], 0
+            day = chunk.date
+            chunks.append(chunk)
+            codes.append(group(chunk))
+            rows += len(chunk)
+        if chunks:
+            yield self._merge(chunks, codes)
+
+    @staticmethod
+    def _merge(chunks: List[TradeChunk], codes: List[np.ndarray]) -> Dict[str, np.ndarray]:
+        cols = {c: np.concatenate([np.asarray(ch[c]) for ch in chunks]) for c in ('timestamp', 'qty', 'price', 'exit_price', 'pnl')}
+        cols['group'] = np.concatenate(codes)
+        order = np.argsort(cols['timestamp'], kind='stable')
+        return {c: a[order] for c, a in cols.items()}
+
+    def aggregate(self, by: Optional[str] = 'strategy', strategies: Iterable[str] = None, symbols: Iterable[str] = None,
+                  start=None, end=None, capital: float = None) -> Dict[str, Dict[str, Any]]:
+        """Streaming per-group metrics (see module docstring); by=None gives one 'all' group."""
+        if by not in ('strategy', 'symbol', 'date', None):
+            raise ValueError(f"unknown grouping: {by}")
+        ids: Dict[str, int] = {'all': 0} if by is None else {}
+
+        def group(chunk: TradeChunk) -> np.ndarray:
+            # integer group codes: grouping never sorts strings
+            if by == 'symbol':
+                local = np.array([ids.setdefault(s, len(ids)) for s in chunk.symbols], dtype=np.int64)
+                return local[np.asarray(chunk['symbol'])]
+            name = 'all' if by is None else chunk.strategy if by == 'strategy' else chunk.date
+            return np.full(len(chunk), ids.setdefault(name, len(ids)), dtype=np.int64)
+
+        aggs: Dict[int, _Agg] = {}
+        for cols in self._batches(strategies, symbols, _epoch(start), _epoch(end, end=True), group):
+            g = cols['group']
+            order = np.argsort(g, kind='stable')  # stable: rows stay in time order inside each group
+            counts = np.bincount(g)
+            for gid, rows in zip(np.flatnonzero(counts).tolist(), np.split(order, np.cumsum(counts[counts > 0])[:-1])):
+                agg = aggs.get(gid)
+                if agg is None:
+                    agg = aggs[gid] = _Agg()
+                agg.add(cols['qty'][rows], cols['price'][rows], cols['exit_price'][rows], cols['pnl'][rows])
+        names = {i: k for k, i in ids.items()}
+        return {names[i]: aggs[i].metrics(capital) for i in sorted(aggs, key=names.get)}
+
+    def strategy_metrics(self, **predicates) -> Dict[str, Dict[str, Any]]:
+        """compute_strategy_metrics over the store: {strategy: {sharpe, win_rate, avg_return, sizing..., trades,
+        pnl, max_drawdown, turnover}}."""
+        return self.aggregate('strategy', **predicates)
+
+    def compact(self, strategies: Iterable[str] = None, start=None, end=None) -> int:
+        """Rewrite every selected partition holding more than one part as time-ordered parts of up to
+        `part_rows` rows. Run it when no scan is in flight. Returns the number of partitions compacted."""
+        done = 0
+        for date, strategy, pdir in self._partitions(strategies, _epoch(start), _epoch(end, end=True)):
+            parts = [path for path, _ in self._parts(pdir)]
+            if len(parts) < 2:
+                continue
+            cols = {c: [] for c in COLUMNS}
+            for path in parts:
+                meta = self._meta[path]
+                for c in COLUMNS:
+                    a = self._column(path, meta, c)
+                    cols[c].append(np.asarray(meta['symbols'], dtype=object)[a] if c == 'symbol' else np.asarray(a))
+            data = {c: np.concatenate(v) for c, v in cols.items()}
+            order = np.argsort(data['timestamp'], kind='stable')
+            day = _epoch(date) // DAY
+            for lo in range(0, len(order), self.part_rows):
+                rows = order[lo:lo + self.part_rows]
+                self._write_part(day, strategy, {c: a[rows] for c, a in data.items()})
+            for path in parts:
+                shutil.rmtree(path)
+                self._meta.pop(path, None)
+            done += 1
+        return done
+
+def _main(argv=None):
+    ap = argparse.ArgumentParser(prog='python -m scripts.trade_store', description=__doc__.split('\n')[2])
+    ap.add_argument('--root', default='logs/trade_store')
+    sub = ap.add_subparsers(dest='cmd', required=True)
+    imp = sub.add_parser('import', help='import new rows of a trade_history.csv')
+    imp.add_argument('csv', nargs='?', default='logs/trade_history.csv')
+    agg = sub.add_parser('metrics', help='streaming per-group metrics')
+    agg.add_argument('--by', default='strategy', choices=['strategy', 'symbol', 'date', 'all'])
+    agg.add_argument('--strategy', action='append')
+    agg.add_argument('--symbol', action='append')
+    agg.add_argument('--start')
+    agg.add_argument('--end')
+    agg.add_argument('--capital', type=float)
+    sub.add_parser('compact', help='merge part files per partition')
+    args = ap.parse_args(argv)
+    store = TradeStore(args.root)
+    if args.cmd == 'import':
+        print(store.sync_csv(args.csv))
+    elif args.cmd == 'metrics':
+        print(json.dumps(store.aggregate(None if args.by == 'all' else args.by, args.strategy, args.symbol,
+                                         args.start, args.end, args.capital), indent=2))
+    else:
+        print(store.compact())
+
+if __name__ == '__main__':
+    _main()
@@ -1,88 +1,74 @@
 
-from agentx import tool
 import json, os
+from scripts.instrumentation import tool
 
-# fallback decorator for AgentX tool
-def tool(name=None, description=None):
-    def _dec(f):
-        return f
-    return _dec
-
-from scripts.market_data_fetcher import fetch_market_data
-from scripts.signal_generator import generate_signal
-from scripts.risk_manager import validate_risk
-from scripts.trade_executor import execute_trade
-from scripts.trade_logger import log_trade
+from scripts.market_data_fetcher import fetch_ohlc
+from scripts.signal_generator import generate_signals
+from scripts.risk_manager import validate_trades
+from scripts.trade_executor import execute_trades
+from scripts.trade_logger import log_trades
 from scripts.ai_strategy_agent import analyze_sentiment, select_strategy
-from scripts.metrics_calculator import compute_strategy_metrics
+from scripts.metrics_calculator import cached_strategy_metrics
+from scripts.sentiment_engine import get_engine
 
-# Optional transformer-based sentiment using FinBERT
-def transformer_sentiment(symbol):
+# Optional transformer-based sentiment using FinBERT (model loaded once per process, see sentiment_engine.py)
+def transformer_sentiment(symbol, headlines=None):
     try:
-        from transformers import AutoTokenizer, AutoModelForSequenceClassification, pipeline
-        tokenizer = AutoTokenizer.from_pretrained("yiyanghkust/finbert-tone")
-        model = AutoModelForSequenceClassification.from_pretrained("yiyanghkust/finbert-tone")
-        nlp = pipeline("sentiment-analysis", model=model, tokenizer=tokenizer)
         # simple example: fetch last 5 news headlines (replace with proper news API in real use)
-        headlines = [f"{symbol} stock up" for _ in range(5)]
-        scores = []
-        for h in headlines:
-            res = nlp(h)[0]
-            label = res['label']
-            score = res['score']
-            if label == 'positive':
-                scores.append(score)
-            elif label == 'negative':
-                scores.append(-score)
-            else:
-                scores.append(0.0)
-        avg = sum(scores)/len(scores)
-        return avg
+        headlines = headlines or [f"{symbol} stock up" for _ in range(5)]
+        return get_engine().score_symbols({symbol: headlines})[symbol]
     except Exception:
         return None  # fallback to AI agent sentiment
 
 @tool
-def trader_manager(symbol: str, capital: float = 100000.0, period: str = "1mo"):
-    """Manager Agent integrating AI sentiment, metrics, strategy selection, and trade execution"""
+def trader_manager(symbol: str, capital: float = 100000.0, period: str = "1mo", interval: str = "1d",
+                   metrics_path: str = "logs/trade_history.csv", log_path: str = "logs/trades.csv",
+                   use_transformer: bool = True, router=None, verbose: bool = True):
+    """Manager Agent integrating AI sentiment, metrics, strategy selection, and trade execution.
+    `router` is passed to execute_trades (e.g. an OrderRouter over a fake broker)."""
+    say = print if verbose else (lambda *a, **k: None)
     try:
-        print(f"🚀 Starting TraderManager for {symbol}")
+        say(f"🚀 Starting TraderManager for {symbol}")
 
         # 1️⃣ Market data
-        data = fetch_market_data(symbol=symbol, period=period)
-        print(f"✅ Market data fetched: {len(data['closes'])} candles")
+        data = fetch_ohlc(symbol, range=period, interval=interval)
+        say(f"✅ Market data fetched: {len(data)} candles")
 
         # 2️⃣ Sentiment analysis (transformer > NEWSAPI > keyword)
-        sent_score = transformer_sentiment(symbol)
+        sent_score = transformer_sentiment(symbol) if use_transformer else None
         if sent_score is None:
             sent = analyze_sentiment(symbol)
             sent_score = sent['score']
         else:
             sent = {'score': sent_score, 'summary': 'Transformer-based sentiment', 'sources': []}
-        print(f"🧠 Sentiment score: {sent_score:.3f}")
+        say(f"🧠 Sentiment score: {sent_score:.3f}")
 
         # 3️⃣ Compute metrics
-        metrics = compute_strategy_metrics("logs/trade_history.csv")
-        print(f"📊 Metrics computed: {metrics.keys()}")
+        metrics = cached_strategy_metrics(metrics_path)
+        say(f"📊 Metrics computed: {metrics.keys()}")
 
         # 4️⃣ AI strategy selection
         choice = select_strategy(metrics, sentiment_score=sent_score)
-        print(f"🤖 AI selected strategy: {choice['strategy']} | {choice['reason']}")
+        say(f"🤖 AI selected strategy: {choice['strategy']} | {choice['reason']}")
 
         # 5️⃣ Generate signal
-        signal = generate_signal(data=data)
-        print(f"📈 Signal generated: {signal['action']}")
+        candidates = generate_signals({symbol: data})
+        signal = candidates[0] if candidates else {'symbol': symbol, 'signal': 'HOLD'}
+        say(f"📈 Signal generated: {signal['signal']}")
 
         # 6️⃣ Risk validation
-        risk = validate_risk(capital=capital, signal=signal)
-        print(f"🧮 Risk check: {risk['status']} | Position Size: {risk.get('position_size', 0)}")
+        orders = validate_trades(candidates, account_equity=capital, params=choice.get('params'))
+        risk = orders[0] if orders else None
+        say(f"🧮 Risk check: {'OK' if risk else 'no order'} | Position Size: {risk['qty'] if risk else 0}")
 
         # 7️⃣ Execute trade
-        trade = execute_trade(symbol=symbol, side=signal['action'], qty=risk['position_size'])
-        print(f"💹 Trade executed: {trade['status']}")
+        results = execute_trades(orders, router=router) if orders else []
+        trade = results[0] if results else None
+        say(f"💹 Trade executed: {trade['status'] if trade else 'none'}")
 
         # 8️⃣ Log trade
-        log = log_trade(symbol=symbol, signal=signal, trade=trade, capital=capital)
-        print(f"📝 Trade logged: {log['file_path']}")
+        log = log_trades(results, log_path) if results else None
+        say(f"📝 Trade logged: {log}")
 
         return {'symbol': symbol, 'sentiment': sent, 'strategy_choice': choice, 'signal': signal, 'risk': risk, 'trade': trade, 'log': log}
 
@@ -0,0 +1,311 @@
+"""trading_daemon.py
+
+Resident trading process. It keeps a TradingScheduler warm between cycles: imported modules, the FinBERT
+model, the sentiment and candle caches, the pooled HTTP session (open keep-alive connections) and, if
+given, the recovered Ledger. It serves cycle requests over a local socket.
+Classes:
+- TradingDaemon(address=DEFAULT_ADDRESS, scheduler=None, warm=True, **scheduler_kwargs)
+
+Functions:
+- request(payload, address=DEFAULT_ADDRESS, timeout=300) -> result of one command sent to a running daemon
+- is_running(address=DEFAULT_ADDRESS) -> bool
+- run_cycle(symbols, address=DEFAULT_ADDRESS, fallback=True, **scheduler_kwargs) -> cycle result from the
+  daemon, or from a one-shot in-process scheduler when no daemon is listening
+
+Protocol: newline-delimited JSON over a Unix socket (or TCP on localhost when the address is 'host:port'),
+one response line per request line:
+  {"cmd": "cycle", "symbols": [...], "capital": 100000}  -> {"ok": true, "result": {...run_cycle output...}}
+  {"cmd": "ping"} | {"cmd": "stats"} | {"cmd": "warm"} | {"cmd": "shutdown"}
+  failures -> {"ok": false, "error": "<Type>: <message>"}
+Cycles run one at a time; ping and stats are answered while a cycle is running.
+Environment: TRADER_DAEMON_ADDR (default state/trader.sock).
+
+CLI:
+  python -m scripts.trading_daemon serve [--transformer] [--ledger state/ledger] [--batch-size 50] ...
+  python -m scripts.trading_daemon cycle RELIANCE.NS TCS.NS [--no-fallback] [--import-stats]
+  python -m scripts.trading_daemon ping | stats | stop
+"""
+from typing import Any, Dict, List, Tuple, Union
+import argparse, json, os, socket, socketserver, sys, threading, time
+from scripts.runtime import import_stats
+
+DEFAULT_ADDRESS = os.getenv('TRADER_DAEMON_ADDR', os.path.join('state', 'trader.sock'))
+
+Address = Union[str, Tuple[str, int]]
+
+def _parse_address(address: Address) -> Address:
+    """'host:port' -> TCP (host, port); anything else is a Unix socket path."""
+    if isinstance(address, tuple):
+        return address
+    host, sep, port = address.rpartition(':')
+    if sep and port.isdigit() and os.sep not in host:
+        return (host or '127.0.0.1', int(port))
+    return address
+
+def _jsonable(o: Any) -> Any:
+    if hasattr(o, 'item'):
+        return o.item()  # numpy scalars
+    if hasattr(o, 'tolist'):
+        return o.tolist()
+    return str(o)
+
+def _encode(obj: Any) -> bytes:
+    return (json.dumps(obj, default=_jsonable) + '\n').encode()
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            try:
+                resp = {'ok': True, 'result': self.server.owner.handle(json.loads(line))}
+            except Exception as e:
+                resp = {'ok': False, 'error': f'{type(e).__name__}: {e}'}
+            self.wfile.write(_encode(resp))
+            self.wfile.flush()
+
+class _TCPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+if hasattr(socketserver, 'ThreadingUnixStreamServer'):
+    class _UnixServer(socketserver.ThreadingUnixStreamServer):
+        daemon_threads = True
+else:
+    _UnixServer = None  # no AF_UNIX on this platform: use a 'host:port' address
+
+class TradingDaemon:
+    def __init__(self, address: Address = DEFAULT_ADDRESS, scheduler=None, warm: bool = True, **scheduler_kwargs):
+        self.address = _parse_address(address)
+        self.scheduler_kwargs = scheduler_kwargs
+        self.warm_on_start = warm
+        self.started = None
+        self.cycles = 0
+        self.last_cycle = None
+        self.warm_seconds = None
+        self._scheduler = scheduler
+        self._server = None
+        self._thread = None
+        self._cycle_lock = threading.Lock()
+
+    @property
+    def scheduler(self):
+        if self._scheduler is None:
+            from scripts.trading_scheduler import TradingScheduler
+            self._scheduler = TradingScheduler(**self.scheduler_kwargs)
+        return self._scheduler
+
+    def warm(self) -> Dict[str, Any]:
+        """Pay the one-time costs up front: stage imports, the HTTP pool, the sentiment model (when the
+        scheduler uses it) and the metrics store."""
+        t0 = time.perf_counter()
+        sched = self.scheduler
+        from scripts import market_data_fetcher
+        market_data_fetcher._get_session()
+        if sched.use_transformer:
+            from scripts.sentiment_engine import get_engine
+            get_engine()._load()
+        sched.metrics_fn()
+        self.warm_seconds = time.perf_counter() - t0
+        return {'seconds': self.warm_seconds}
+
+    def stats(self) -> Dict[str, Any]:
+        from scripts import instrumentation
+        from scripts.ai_strategy_agent import ARTICLE_CACHE, AGGREGATE_CACHE
+        return {'pid': os.getpid(), 'uptime_seconds': time.time() - self.started if self.started else 0.0,
+                'cycles': self.cycles, 'last_cycle': self.last_cycle, 'warm_seconds': self.warm_seconds,
+                'caches': {'articles': len(ARTICLE_CACHE), 'aggregates': len(AGGREGATE_CACHE)},
+                'imports': import_stats(), 'stage_stats': self.scheduler.stats.summary(),
+                'tools': instrumentation.snapshot()}
+
+    def handle(self, req: Dict[str, Any]) -> Any:
+        cmd = req.get('cmd')
+        if cmd == 'ping':
+            return {'pid': os.getpid(), 'cycles': self.cycles}
+        if cmd == 'cycle':
+            symbols = req.get('symbols') or []
+            with self._cycle_lock:
+                sched = self.scheduler
+                if req.get('capital') is not None:
+                    sched.capital = float(req['capital'])
+                t0 = time.perf_counter()
+                result = sched.run_cycle(symbols)
+                self.cycles += 1
+                self.last_cycle = {'symbols': len(symbols), 'seconds': time.perf_counter() - t0, 'at': time.time()}
+            return result
+        if cmd == 'stats':
+            return self.stats()
+        if cmd == 'warm':
+            with self._cycle_lock:
+                return self.warm()
+        if cmd == 'shutdown':
+            threading.Thread(target=self.shutdown, daemon=True).start()
+            return {'stopping': True}
+        raise ValueError(f'unknown command: {cmd!r}')
+
+    # --- lifecycle ---
+    def bind(self) -> 'TradingDaemon':
+        if isinstance(self.address, tuple):
+            self._server = _TCPServer(self.address, _Handler)
+            self.address = self._server.server_address[:2]  # resolves port 0
+        else:
+            if _UnixServer is None:
+                raise RuntimeError("Unix sockets are not available here; use a 'host:port' address")
+            if os.path.exists(self.address):
+                if is_running(self.address):
+                    raise RuntimeError(f'a daemon is already listening on {self.address}')
+                os.unlink(self.address)  # stale socket from a crashed daemon
+            if os.path.dirname(self.address):
+                os.makedirs(os.path.dirname(self.address), exist_ok=True)
+            self._server = _UnixServer(self.address, _Handler)
+            os.chmod(self.address, 0o600)
+        self._server.owner = self
+        self.started = time.time()
+        return self
+
+    def serve_forever(self):
+        """Bind (if needed), warm up, then serve until a shutdown command or KeyboardInterrupt."""
+        if self._server is None:
+            self.bind()
+        if self.warm_on_start:
+            self.warm()
+        try:
+            self._server.serve_forever()
+        finally:
+            self._close()
+
+    def start(self) -> 'TradingDaemon':
+        """serve_forever on a background thread (returns once the socket accepts connections)."""
+        if self._server is None:
+            self.bind()
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def shutdown(self):
+        if self._server is not None:
+            self._server.shutdown()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+
+    def _close(self):
+        server, self._server = self._server, None
+        if server is None:
+            return
+        server.server_close()
+        if isinstance(self.address, str) and os.path.exists(self.address):
+            os.unlink(self.address)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.shutdown()
+        return False
+
+def request(payload: Dict[str, Any], address: Address = DEFAULT_ADDRESS, timeout: float = 300.0) -> Any:
+    address = _parse_address(address)
+    family = socket.AF_INET if isinstance(address, tuple) else socket.AF_UNIX
+    with socket.socket(family, socket.SOCK_STREAM) as s:
+        s.settimeout(timeout)
+        s.connect(address)
+        s.sendall(_encode(payload))
+        with s.makefile('rb') as f:
+            line = f.readline()
+    if not line:
+        raise ConnectionError('daemon closed the connection without a response')
+    resp = json.loads(line)
+    if not resp.get('ok'):
+        raise RuntimeError(resp.get('error'))
+    return resp['result']
+
+def is_running(address: Address = DEFAULT_ADDRESS, timeout: float = 2.0) -> bool:
+    try:
+        request({'cmd': 'ping'}, address, timeout)
+        return True
+    except (OSError, ValueError, RuntimeError):
+        return False
+
+def run_cycle(symbols: List[str], address: Address = DEFAULT_ADDRESS, fallback: bool = True,
+              capital: float = None, **scheduler_kwargs) -> Dict[str, Any]:
+    """Run one cycle on the daemon. Falls back to an in-process scheduler only when no daemon answers a ping,
+    so a slow cycle on a live daemon is never run twice."""
+    if is_running(address):
+        return request({'cmd': 'cycle', 'symbols': list(symbols), 'capital': capital}, address)
+    if not fallback:
+        raise ConnectionError(f'no trading daemon listening on {address}')
+    from scripts.trading_scheduler import TradingScheduler
+    if capital is not None:
+        scheduler_kwargs['capital'] = capital
+    return TradingScheduler(**scheduler_kwargs).run_cycle(symbols)
+
+def _scheduler_kwargs(args) -> Dict[str, Any]:
+    kwargs = {'period': args.period, 'interval': args.interval, 'batch_size': args.batch_size,
+              'max_workers': args.max_workers, 'use_transformer': args.transformer}
+    if args.capital is not None:
+        kwargs['capital'] = args.capital
+    if getattr(args, 'ledger', None):
+        from scripts.ledger import Ledger
+        kwargs['ledger'] = Ledger(args.ledger, starting_cash=args.capital)
+    return kwargs
+
+def main(argv: List[str] = None) -> int:
+    ap = argparse.ArgumentParser(description='Resident trading daemon and its client.')
+    ap.add_argument('--address', default=DEFAULT_ADDRESS, help="Unix socket path or 'host:port'")
+    sub = ap.add_subparsers(dest='cmd', required=True)
+    for name in ('serve', 'cycle'):
+        p = sub.add_parser(name)
+        p.add_argument('--capital', type=float, default=100000.0 if name == 'serve' else None)
+        p.add_argument('--period', default='1mo')
+        p.add_argument('--interval', default='1d')
+        p.add_argument('--batch-size', type=int, default=50)
+        p.add_argument('--max-workers', type=int, default=8)
+        p.add_argument('--transformer', action='store_true', help='rescore headlines with FinBERT')
+        if name == 'serve':
+            p.add_argument('--ledger', default=None, help='ledger state directory')
+            p.add_argument('--no-warm', action='store_true')
+        else:
+            p.add_argument('symbols', nargs='+')
+            p.add_argument('--no-fallback', action='store_true', help='fail instead of running in-process')
+            p.add_argument('--import-stats', action='store_true', help='print deferred-import timings')
+    for name in ('ping', 'stats', 'stop'):
+        sub.add_parser(name)
+    args = ap.parse_args(argv)
+
+    if args.cmd == 'serve':
+        daemon = TradingDaemon(args.address, warm=not args.no_warm, **_scheduler_kwargs(args))
+        daemon.bind()
+        print(f'trading daemon listening on {daemon.address} (pid {os.getpid()})', flush=True)
+        try:
+            daemon.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        return 0
+    if args.cmd == 'cycle':
+        t0 = time.perf_counter()
+        served_by = 'daemon' if is_running(args.address) else 'in-process'
+        if served_by == 'daemon':
+            res = request({'cmd': 'cycle', 'symbols': args.symbols, 'capital': args.capital}, args.address)
+        elif args.no_fallback:
+            print(f'no trading daemon listening on {args.address}', file=sys.stderr)
+            return 1
+        else:
+            kwargs = _scheduler_kwargs(args)
+            from scripts.trading_scheduler import TradingScheduler
+            res = TradingScheduler(**kwargs).run_cycle(args.symbols)
+        out = {'served_by': served_by, 'seconds': time.perf_counter() - t0, 'errors': res['errors'],
+               'orders': len(res['orders']), 'executions': len(res['executions']), 'stage_stats': res['stage_stats']}
+        if args.import_stats:
+            out['imports'] = import_stats()
+        print(json.dumps(out, indent=2, default=_jsonable))
+        return 0
+    try:
+        result = request({'cmd': 'shutdown' if args.cmd == 'stop' else args.cmd}, args.address, timeout=10)
+    except OSError as e:
+        print(f'no trading daemon listening on {args.address}: {e}', file=sys.stderr)
+        return 1
+    print(json.dumps(result, indent=2, default=_jsonable))
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,224 @@
+
+"""trading_scheduler.py
+
+Runs a whole symbol universe through the TraderManager stages as a pipeline instead of N serial passes.
+Classes:
+- StageStats() -> per-stage latency samples with count/mean/p50/p95/max summaries
+- TradingScheduler(capital=100000.0, period='1mo', interval='1d', batch_size=50, max_workers=8, deterministic=False, ...)
+
+Functions on TradingScheduler:
+- run_cycle(symbols) -> {symbols: {symbol: summary}, orders, executions, errors, stage_stats}
+
+Per cycle:
+- shared work once: strategy metrics (cached_strategy_metrics)
+- I/O stages concurrently per batch of symbols: OHLC fetch (fetch_ohlc_many) overlapped with news sentiment
+- CPU stages batched: signals for the whole batch on one panel (generate_signals_panel), optional FinBERT
+  rescoring of all the batch's headlines in shared forward passes
+- strategy selection + risk per symbol (risk calls grouped by sizing params, or one portfolio-level check
+  per batch when a PortfolioRiskEngine is passed as `risk_engine`; fills are fed back into it)
+- order submission for a batch runs in the background while the next batch is processed; logging at the end
+- with a Ledger (`ledger=`), orders and fills are journaled, positions are marked at each batch's latest bars
+  and the cycle's sizing equity is the ledger's equity (also pushed to the risk engine)
+- with a SymbolMaster (`instruments=`), quantities are rounded to lots and stops to ticks
+
+`deterministic=True` runs every stage inline in input order with no thread pools (for tests);
+stage callables can be swapped via the constructor to run against fakes.
+"""
+from typing import List, Dict, Any, Callable, Optional
+from concurrent.futures import ThreadPoolExecutor
+import time, threading
+from scripts.market_data_fetcher import fetch_ohlc_many
+from scripts.ai_strategy_agent import analyze_sentiment, select_strategies
+from scripts.metrics_calculator import cached_strategy_metrics
+from scripts.signal_generator import generate_signals_panel
+from scripts.risk_manager import validate_trades_by_strategy
+from scripts.trade_executor import execute_trades
+from scripts.trade_logger import log_trades
+
+class StageStats:
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, stage: str, seconds: float):
+        with self._lock:
+            self.samples.setdefault(stage, []).append(seconds)
+
+    def timer(self, stage: str):
+        stats = self
+
+        class _Timer:
+            def __enter__(self):
+                self.t0 = time.perf_counter()
+                return self
+
+            def __exit__(self, *exc):
+                stats.record(stage, time.perf_counter() - self.t0)
+                return False
+        return _Timer()
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        out = {}
+        with self._lock:
+            for stage, xs in self.samples.items():
+                s = sorted(xs)
+                pick = lambda q: s[min(len(s) - 1, int(q * len(s)))]
+                out[stage] = {'count': len(s), 'mean_ms': 1000 * sum(s) / len(s), 'p50_ms': 1000 * pick(0.5),
+                              'p95_ms': 1000 * pick(0.95), 'max_ms': 1000 * s[-1]}
+        return out
+
+class TradingScheduler:
+    def __init__(self, capital: float = 100000.0, period: str = '1mo', interval: str = '1d', batch_size: int = 50,
+                 max_workers: int = 8, deterministic: bool = False, signal_params: Dict[str, Any] = None,
+                 use_transformer: bool = False, log_path: str = 'logs/trades.csv',
+                 metrics_path: str = 'logs/trade_history.csv', store=None,
+                 fetch_fn: Callable = None, sentiment_fn: Callable = None, execute_fn: Callable = None,
+                 log_fn: Callable = None, metrics_fn: Callable = None, risk_engine=None, ledger=None,
+                 instruments=None):
+        self.capital = capital
+        self.period = period
+        self.interval = interval
+        self.batch_size = batch_size
+        self.max_workers = 1 if deterministic else max_workers
+        self.deterministic = deterministic
+        self.signal_params = signal_params or {}
+        self.use_transformer = use_transformer
+        self.log_path = log_path
+        self.metrics_path = metrics_path
+        self.store = store
+        self.fetch_fn = fetch_fn or (lambda syms: fetch_ohlc_many(syms, range=self.period, interval=self.interval,
+                                                                  max_workers=self.max_workers, store=self.store,
+                                                                  columnar=True))
+        self.sentiment_fn = sentiment_fn or analyze_sentiment
+        self.execute_fn = execute_fn or (lambda orders: execute_trades(orders, mock=True, max_concurrency=self.max_workers))
+        self.log_fn = log_fn or (lambda results: log_trades(results, self.log_path))
+        self.metrics_fn = metrics_fn or (lambda: cached_strategy_metrics(self.metrics_path))
+        self.risk_engine = risk_engine
+        self.ledger = ledger
+        self.instruments = instruments
+        self.stats = StageStats()
+        self.cycles = 0
+
+    # --- stages ---
+    def _sentiment_batch(self, symbols: List[str], pool: Optional[ThreadPoolExecutor]) -> Dict[str, Dict[str, Any]]:
+        with self.stats.timer('sentiment'):
+            if pool is None:
+                sents = {s: self.sentiment_fn(s) for s in symbols}
+            else:
+                futs = {s: pool.submit(self.sentiment_fn, s) for s in symbols}
+                sents = {s: f.result() for s, f in futs.items()}
+        if self.use_transformer:
+            with self.stats.timer('finbert'):
+                from scripts.sentiment_engine import get_engine
+                headlines = {s: [src['title'] for src in sents[s].get('sources', []) if src.get('title')] for s in symbols}
+                try:
+                    scores = get_engine().score_symbols(headlines)
+                except Exception:
+                    scores = {}
+                for s, v in scores.items():
+                    if v is not None:
+                        sents[s] = {'score': v, 'summary': 'Transformer-based sentiment', 'sources': sents[s].get('sources', [])}
+        return sents
+
+    def _inputs(self, symbols: List[str], pool: Optional[ThreadPoolExecutor]):
+        """Fetch data and news for one batch; the two I/O stages overlap when a pool is available."""
+        def fetch():
+            with self.stats.timer('fetch'):
+                return self.fetch_fn(symbols)
+        if pool is None:
+            return fetch(), self._sentiment_batch(symbols, None)
+        data_f = pool.submit(fetch)
+        sents = self._sentiment_batch(symbols, pool)
+        return data_f.result(), sents
+
+    def _decide(self, symbols, data, sents, metrics, out):
+        """Strategy selection, batched signals and grouped risk checks for one batch. Returns validated orders."""
+        with self.stats.timer('select'):
+            choices = select_strategies(metrics, {s: sents[s] for s in symbols})
+        with self.stats.timer('signal'):
+            present = {s: data[s] for s in symbols if s in data}
+            candidates = generate_signals_panel(present, self.signal_params)
+        with self.stats.timer('risk'):
+            if self.risk_engine is not None:
+                orders = self.risk_engine.validate_trades(candidates, params=[choices[c['symbol']]['params'] for c in candidates])
+            else:
+                orders = validate_trades_by_strategy(candidates, choices, account_equity=self.capital,
+                                                     instruments=self.instruments)
+        by_sym = {c['symbol']: c for c in candidates}
+        ordered = {o['symbol']: o for o in orders}
+        for s in symbols:
+            out[s] = {'symbol': s, 'sentiment': sents[s], 'strategy_choice': choices[s],
+                      'signal': by_sym.get(s, {'symbol': s, 'signal': 'HOLD'}), 'risk': ordered.get(s),
+                      'candles': len(data[s]) if s in data else 0}
+        return orders
+
+    def _execute(self, orders):
+        with self.stats.timer('execute'):
+            return self.execute_fn(orders) if orders else []
+
+    def run_cycle(self, symbols: List[str]) -> Dict[str, Any]:
+        t0 = time.perf_counter()
+        self.cycles += 1
+        symbols = list(dict.fromkeys(symbols))
+        batches = [symbols[i:i + self.batch_size] for i in range(0, len(symbols), self.batch_size)]
+        summaries: Dict[str, Dict[str, Any]] = {}
+        errors: Dict[str, str] = {}
+        all_orders, executions = [], []
+        if self.ledger is not None:
+            self.capital = self.ledger.equity()
+            if self.risk_engine is not None:
+                self.risk_engine.account_equity = self.capital
+        with self.stats.timer('metrics'):
+            metrics = self.metrics_fn()
+        # io_pool runs leaf I/O calls only; prefetch and execution get their own single workers so a
+        # stage waiting on its leaf calls can never starve them of threads
+        io_pool = None if self.deterministic else ThreadPoolExecutor(max_workers=self.max_workers)
+        prefetch_pool = None if self.deterministic else ThreadPoolExecutor(max_workers=1)
+        exec_pool = None if self.deterministic else ThreadPoolExecutor(max_workers=1)
+        pending = []
+        try:
+            # prefetch the next batch's inputs while the current batch is decided and executed
+            next_inputs = prefetch_pool.submit(self._inputs, batches[0], io_pool) if (prefetch_pool and batches) else None
+            for i, batch in enumerate(batches):
+                if prefetch_pool is None:
+                    data, sents = self._inputs(batch, None)
+                else:
+                    data, sents = next_inputs.result()
+                    if i + 1 < len(batches):
+                        next_inputs = prefetch_pool.submit(self._inputs, batches[i + 1], io_pool)
+                for s, err in getattr(data, 'errors', {}).items():
+                    errors[s] = err
+                orders = self._decide(batch, data, sents, metrics, summaries)
+                all_orders.extend(orders)
+                if self.ledger is not None:
+                    self.ledger.mark_candles(data)
+                    self.ledger.record_orders(orders)
+                if exec_pool is None:
+                    executions.extend(self._execute(orders))
+                else:
+                    pending.append(exec_pool.submit(self._execute, orders))
+            for f in pending:
+                executions.extend(f.result())
+        finally:
+            for p in (prefetch_pool, exec_pool, io_pool):
+                if p is not None:
+                    p.shutdown(wait=True)
+        if self.risk_engine is not None:
+            # fills are folded in on this thread; until then the engine holds the orders as reservations
+            self.risk_engine.apply_fills(executions)
+        if self.ledger is not None:
+            self.ledger.apply_executions(executions)
+        by_coid = {r.get('client_order_id'): r for r in executions}
+        for o in all_orders:
+            summaries[o['symbol']]['trade'] = by_coid.get(o['client_order_id'])
+        with self.stats.timer('log'):
+            log = self.log_fn(executions) if executions else None
+        self.stats.record('cycle', time.perf_counter() - t0)
+        return {'cycle': self.cycles, 'symbols': summaries, 'orders': all_orders, 'executions': executions,
+                'errors': errors, 'log': log, 'stage_stats': self.stats.summary()}
+
+if __name__ == '__main__':
+    import json
+    sched = TradingScheduler(batch_size=2)
+    res = sched.run_cycle(['RELIANCE.NS', 'TCS.NS', 'INFY.NS'])
+    print(json.dumps({'errors': res['errors'], 'orders': len(res['orders']), 'stage_stats': res['stage_stats']}, indent=2))
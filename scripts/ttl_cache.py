@@ -0,0 +1,55 @@
+
+"""ttl_cache.py
+
+Small thread-safe LRU cache with per-entry time-to-live, shared by the sentiment and data layers.
+Classes:
+- TTLCache(max_entries=1024, ttl=300.0, clock=time.monotonic)
+
+Expired entries are dropped lazily on access; when full, the least recently used entry is evicted.
+"""
+from typing import Any, Hashable, Optional, Callable
+from collections import OrderedDict
+import threading, time
+
+_MISSING = object()
+
+class TTLCache:
+    def __init__(self, max_entries: int = 1024, ttl: Optional[float] = 300.0, clock: Callable[[], float] = time.monotonic):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self._data: 'OrderedDict[Hashable, tuple]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            item = self._data.get(key, _MISSING)
+            if item is not _MISSING:
+                expires, value = item
+                if expires is None or expires > self.clock():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return default
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = _MISSING):
+        ttl = self.ttl if ttl is _MISSING else ttl
+        with self._lock:
+            self._data[key] = (None if ttl is None else self.clock() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
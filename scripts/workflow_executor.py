@@ -0,0 +1,348 @@
+"""workflow_executor.py
+
+Local executor for workflow graphs (workflows/*.json): the offline stand-in for the AgentX orchestrator.
+Classes:
+- Workflow.from_dict(data) / Workflow.from_file(path) -> parsed, validated graph (topological `order`)
+- WorkflowExecutor(workflow, max_workers=8, tools=None, deterministic=False)
+
+Functions on WorkflowExecutor:
+- run(inputs=None) -> new cycle: every node runs (identical nodes run once)
+- rerun(inputs=None, invalidate=()) -> partial re-execution: only nodes whose inputs changed run again
+- invalidate(*node_ids) -> force nodes (and everything downstream of them) to run on the next rerun
+
+Workflow format:
+  {"name": "...", "inputs": {"symbols": [...], ...},
+   "nodes": [{"id": "fetch", "tool": "fetch_ohlc_many", "inputs": {"symbols": "$inputs.symbols"}},
+             {"id": "sentiment", "tool": "analyze_sentiment", "map": "symbol", "inputs": {"symbol": "$inputs.symbols"}},
+             {"id": "signal", "tool": "generate_signals_panel", "inputs": {"data": "$fetch"}, "depends_on": []}, ...],
+   "outputs": {"orders": "$risk", ...}}
+- "$inputs.<name>" is a workflow input, "$<node>" a node's output and "$<node>.<key>" one key of it
+  ("$$" escapes a literal leading "$"); references may sit anywhere inside lists and dicts
+- "tool" is a name from TOOLS or a "module:function" path; tools are imported on first use
+- "map": "<input>" calls the tool once per element of that input; the output is {element: result}
+- "depends_on" adds ordering edges that carry no data
+
+Every node gets a key: a hash of its tool, literal inputs and workflow-input values, with the keys of its
+upstream nodes standing in for their outputs. Keys are known before anything runs, so a node whose key
+has an output in the cache is reused and its dependents only run if their own keys changed. Mapped nodes
+are also cached per element, so adding one symbol fetches news for that symbol only. The cache keeps
+the outputs of the last cycle. It is cleared by run() and reused by rerun().
+Independent nodes (and the elements of mapped nodes) run concurrently on one thread pool; a failed node
+marks its dependents as skipped and the rest of the graph still completes.
+"""
+from typing import Any, Callable, Dict, Iterable, List, Optional
+from concurrent.futures import Future, ThreadPoolExecutor, FIRST_COMPLETED, wait
+import hashlib, importlib, json, time
+
+TOOLS = {
+    'fetch_ohlc': 'scripts.market_data_fetcher:fetch_ohlc',
+    'fetch_ohlc_many': 'scripts.market_data_fetcher:fetch_ohlc_many',
+    'analyze_sentiment': 'scripts.ai_strategy_agent:analyze_sentiment',
+    'score_headlines': 'scripts.ai_strategy_agent:score_headlines',
+    'select_strategies': 'scripts.ai_strategy_agent:select_strategies',
+    'cached_strategy_metrics': 'scripts.metrics_calculator:cached_strategy_metrics',
+    'generate_signals': 'scripts.signal_generator:generate_signals',
+    'generate_signals_panel': 'scripts.signal_generator:generate_signals_panel',
+    'validate_trades': 'scripts.risk_manager:validate_trades',
+    'validate_trades_by_strategy': 'scripts.risk_manager:validate_trades_by_strategy',
+    'execute_trades': 'scripts.trade_executor:execute_trades',
+    'log_trades': 'scripts.trade_logger:log_trades',
+}
+
+def _ref(v: Any) -> Optional[tuple]:
+    """'$root.key' -> (root, key or None); None for anything that is not a reference."""
+    if isinstance(v, str) and v.startswith('$') and not v.startswith('$$'):
+        root, _, key = v[1:].partition('.')
+        return root, key or None
+    return None
+
+def _refs(v: Any) -> Iterable[tuple]:
+    r = _ref(v)
+    if r is not None:
+        yield r
+    elif isinstance(v, dict):
+        for x in v.values():
+            yield from _refs(x)
+    elif isinstance(v, list):
+        for x in v:
+            yield from _refs(x)
+
+def _canon_default(o: Any) -> Any:
+    if hasattr(o, 'tolist'):
+        return o.tolist()
+    return repr(o)
+
+def _hash(obj: Any) -> str:
+    return hashlib.sha1(json.dumps(obj, sort_keys=True, default=_canon_default).encode()).hexdigest()
+
+class Node:
+    __slots__ = ('id', 'tool', 'inputs', 'map', 'deps')
+
+    def __init__(self, id: str, tool: str, inputs: Dict[str, Any] = None, map: str = None, depends_on: List[str] = None):
+        self.id = id
+        self.tool = tool
+        self.inputs = inputs or {}
+        self.map = map
+        refs = [root for root, _ in _refs(self.inputs) if root != 'inputs']
+        self.deps = list(dict.fromkeys(refs + list(depends_on or [])))
+
+class Workflow:
+    def __init__(self, name: str, nodes: List[Node], inputs: Dict[str, Any] = None, outputs: Dict[str, Any] = None,
+                 description: str = None):
+        self.name = name
+        self.description = description
+        self.inputs = dict(inputs or {})
+        self.outputs = dict(outputs or {})
+        self.nodes: Dict[str, Node] = {}
+        for n in nodes:
+            if n.id in self.nodes or n.id == 'inputs':
+                raise ValueError(f'duplicate or reserved node id: {n.id!r}')
+            self.nodes[n.id] = n
+        self.children: Dict[str, List[str]] = {nid: [] for nid in self.nodes}
+        for n in nodes:
+            if not n.tool:
+                raise ValueError(f'node {n.id!r} has no tool')
+            if n.map is not None and n.map not in n.inputs:
+                raise ValueError(f'node {n.id!r} maps over {n.map!r}, which is not one of its inputs')
+            for d in n.deps:
+                if d not in self.nodes:
+                    raise ValueError(f'node {n.id!r} references unknown node {d!r}')
+                self.children[d].append(n.id)
+        for root, _ in _refs(self.outputs):
+            if root != 'inputs' and root not in self.nodes:
+                raise ValueError(f'output references unknown node {root!r}')
+        self.order = self._toposort()
+
+    def _toposort(self) -> List[str]:
+        indeg = {nid: len(n.deps) for nid, n in self.nodes.items()}
+        ready = [nid for nid in self.nodes if indeg[nid] == 0]
+        order = []
+        while ready:
+            nid = ready.pop(0)
+            order.append(nid)
+            for c in self.children[nid]:
+                indeg[c] -= 1
+                if indeg[c] == 0:
+                    ready.append(c)
+        if len(order) != len(self.nodes):
+            raise ValueError(f'workflow {self.name!r} has a cycle through {sorted(set(self.nodes) - set(order))}')
+        return order
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'Workflow':
+        nodes = [Node(n['id'], n.get('tool'), n.get('inputs'), n.get('map'), n.get('depends_on')) for n in data.get('nodes', [])]
+        return cls(data.get('name', 'workflow'), nodes, data.get('inputs'), data.get('outputs'), data.get('description'))
+
+    @classmethod
+    def from_file(cls, path: str) -> 'Workflow':
+        with open(path) as f:
+            return cls.from_dict(json.load(f))
+
+class WorkflowExecutor:
+    def __init__(self, workflow, max_workers: int = 8, tools: Dict[str, Callable] = None, deterministic: bool = False):
+        self.workflow = workflow if isinstance(workflow, Workflow) else Workflow.from_dict(workflow)
+        self.max_workers = max_workers
+        self.deterministic = deterministic
+        self.tools = dict(tools or {})  # name -> callable; overrides TOOLS (fakes, extra tools)
+        self.cycles = 0
+        self.last_inputs: Dict[str, Any] = None
+        self.last_result: Dict[str, Any] = None
+        self._cache: Dict[str, Any] = {}
+        self._elements: Dict[str, List[str]] = {}  # mapped node key -> its per-element keys
+        self._nonce: Dict[str, int] = {}
+
+    # --- public API ---
+    def run(self, inputs: Dict[str, Any] = None) -> Dict[str, Any]:
+        self._cache.clear()
+        self._elements.clear()
+        self.cycles += 1
+        return self._run({**self.workflow.inputs, **(inputs or {})})
+
+    def rerun(self, inputs: Dict[str, Any] = None, invalidate: Iterable[str] = ()) -> Dict[str, Any]:
+        self.invalidate(*invalidate)
+        base = self.last_inputs if self.last_inputs is not None else self.workflow.inputs
+        return self._run({**base, **(inputs or {})})
+
+    def invalidate(self, *node_ids: str):
+        for nid in node_ids:
+            if nid not in self.workflow.nodes:
+                raise KeyError(nid)
+            self._nonce[nid] = self._nonce.get(nid, 0) + 1
+
+    # --- keys and references ---
+    def _tool(self, name: str) -> Callable:
+        fn = self.tools.get(name)
+        if fn is None:
+            path = TOOLS.get(name, name)
+            module, sep, attr = path.partition(':')
+            if not sep:
+                raise ValueError(f'unknown tool {name!r} (not in TOOLS and not a module:function path)')
+            fn = self.tools[name] = getattr(importlib.import_module(module), attr)
+        return fn
+
+    def _key_spec(self, v: Any, inputs: Dict[str, Any], keys: Dict[str, str]) -> Any:
+        r = _ref(v)
+        if r is not None:
+            root, key = r
+            if root == 'inputs':
+                return ['$in', key, inputs.get(key)]
+            return ['$node', keys[root], key]
+        if isinstance(v, dict):
+            return {k: self._key_spec(x, inputs, keys) for k, x in v.items()}
+        if isinstance(v, list):
+            return [self._key_spec(x, inputs, keys) for x in v]
+        return v
+
+    def _node_keys(self, node: Node, inputs: Dict[str, Any], keys: Dict[str, str]):
+        """(node key, base key for per-element keys of a mapped node or None)."""
+        spec = {k: self._key_spec(v, inputs, keys) for k, v in node.inputs.items()}
+        head = [node.tool, node.map, self._nonce.get(node.id, 0), [keys[d] for d in node.deps]]
+        key = _hash(head + [spec])
+        if node.map is None:
+            return key, None
+        return key, _hash(head + [{k: v for k, v in spec.items() if k != node.map}])
+
+    def _resolve(self, v: Any, inputs: Dict[str, Any], outputs: Dict[str, Any]) -> Any:
+        r = _ref(v)
+        if r is not None:
+            root, key = r
+            val = inputs if root == 'inputs' else outputs[root]
+            if root == 'inputs' or key is not None:
+                return val[key]
+            return val
+        if isinstance(v, str) and v.startswith('$$'):
+            return v[1:]
+        if isinstance(v, dict):
+            return {k: self._resolve(x, inputs, outputs) for k, x in v.items()}
+        if isinstance(v, list):
+            return [self._resolve(x, inputs, outputs) for x in v]
+        return v
+
+    # --- execution ---
+    def _submit(self, pool: Optional[ThreadPoolExecutor], fn: Callable, kwargs: Dict[str, Any]) -> Future:
+        if pool is not None:
+            return pool.submit(fn, **kwargs)
+        f = Future()
+        try:
+            f.set_result(fn(**kwargs))
+        except Exception as e:
+            f.set_exception(e)
+        return f
+
+    def _run(self, inputs: Dict[str, Any]) -> Dict[str, Any]:
+        t0 = time.perf_counter()
+        wf = self.workflow
+        keys: Dict[str, str] = {}
+        base_keys: Dict[str, str] = {}
+        for nid in wf.order:
+            keys[nid], base_keys[nid] = self._node_keys(wf.nodes[nid], inputs, keys)
+        used = set(keys.values())
+        outputs: Dict[str, Any] = {}
+        nodes: Dict[str, Dict[str, Any]] = {}
+        started: Dict[str, float] = {}
+        remaining = {nid: len(wf.nodes[nid].deps) for nid in wf.order}
+        ready = [nid for nid in wf.order if remaining[nid] == 0]
+        running: Dict[Future, tuple] = {}
+        mapped: Dict[str, Dict[str, Any]] = {}
+
+        def finish(nid: str, status: str, value: Any = None, error: str = None, **extra):
+            if nid in nodes:
+                return
+            nodes[nid] = {'status': status, 'seconds': time.perf_counter() - started.get(nid, time.perf_counter()),
+                          'key': keys[nid][:12], **extra}
+            if error:
+                nodes[nid]['error'] = error
+            if status in ('ran', 'cached'):
+                outputs[nid] = value
+                self._cache[keys[nid]] = value
+            for c in wf.children[nid]:
+                if status in ('ran', 'cached'):
+                    remaining[c] -= 1
+                    if remaining[c] == 0:
+                        ready.append(c)
+                else:
+                    finish(c, 'skipped', error=f'upstream {nid!r} {status}')
+
+        def finish_mapped(nid: str):
+            m = mapped.pop(nid)
+            if m['errors']:
+                finish(nid, 'failed', error='; '.join(m['errors'][:3]), items=len(m['items']))
+            else:
+                status = 'cached' if m['cached'] == len(m['items']) else 'ran'
+                finish(nid, status, {item: m['out'][i] for i, item in enumerate(m['items'])},
+                       items=len(m['items']), items_cached=m['cached'])
+
+        def launch(nid: str, pool):
+            node = wf.nodes[nid]
+            started[nid] = time.perf_counter()
+            if keys[nid] in self._cache:
+                used.update(self._elements.get(keys[nid], ()))
+                return finish(nid, 'cached', self._cache[keys[nid]])
+            try:
+                fn = self._tool(node.tool)
+                kwargs = self._resolve(node.inputs, inputs, outputs)
+            except Exception as e:
+                return finish(nid, 'failed', error=f'{type(e).__name__}: {e}')
+            if node.map is None:
+                running[self._submit(pool, fn, kwargs)] = (nid, None)
+                return
+            items = list(kwargs.pop(node.map) or [])
+            m = mapped[nid] = {'items': items, 'out': [None] * len(items), 'left': len(items), 'cached': 0, 'errors': [],
+                               'keys': [_hash([base_keys[nid], item]) for item in items]}
+            used.update(m['keys'])
+            self._elements[keys[nid]] = m['keys']
+            for i, (item, ek) in enumerate(zip(items, m['keys'])):
+                if ek in self._cache:
+                    m['out'][i] = self._cache[ek]
+                    m['cached'] += 1
+                    m['left'] -= 1
+                else:
+                    running[self._submit(pool, fn, {**kwargs, node.map: item})] = (nid, i)
+            if m['left'] == 0:
+                finish_mapped(nid)
+
+        pool = None if self.deterministic else ThreadPoolExecutor(max_workers=self.max_workers)
+        try:
+            while ready or running:
+                while ready:
+                    launch(ready.pop(0), pool)
+                if not running:
+                    continue
+                done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                for f in [f for f in running if f in done]:  # submission order, so deterministic runs replay exactly
+                    nid, i = running.pop(f)
+                    err = f.exception()
+                    if i is None:
+                        if err is None:
+                            finish(nid, 'ran', f.result())
+                        else:
+                            finish(nid, 'failed', error=f'{type(err).__name__}: {err}')
+                        continue
+                    m = mapped[nid]
+                    if err is None:
+                        m['out'][i] = self._cache[m['keys'][i]] = f.result()
+                    else:
+                        m['errors'].append(f'{m["items"][i]!r}: {type(err).__name__}: {err}')
+                    m['left'] -= 1
+                    if m['left'] == 0:
+                        finish_mapped(nid)
+        finally:
+            if pool is not None:
+                pool.shutdown(wait=True)
+
+        self._cache = {k: v for k, v in self._cache.items() if k in used}
+        self._elements = {k: v for k, v in self._elements.items() if k in used}
+        result_outputs = {}
+        for name, spec in wf.outputs.items():
+            try:
+                result_outputs[name] = self._resolve(spec, inputs, outputs)
+            except KeyError:
+                result_outputs[name] = None  # produced by a failed or skipped node
+        ok = all(n['status'] in ('ran', 'cached') for n in nodes.values())
+        self.last_inputs = inputs
+        self.last_result = {'workflow': wf.name, 'cycle': self.cycles, 'status': 'success' if ok else 'failed',
+                            'outputs': result_outputs, 'nodes': {nid: nodes[nid] for nid in wf.order},
+                            'ran': [nid for nid in wf.order if nodes[nid]['status'] == 'ran'],
+                            'reused': [nid for nid in wf.order if nodes[nid]['status'] == 'cached'],
+                            'elapsed_seconds': time.perf_counter() - t0}
+        return self.last_result
@@ -0,0 +1,90 @@
+"""analyze_sentiment caching against a local stub NewsAPI endpoint (NEWSAPI_URL)."""
+import json, threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+import pytest
+from scripts import ai_strategy_agent as asa
+
+class StubNews:
+    """Serves NewsAPI `everything` payloads; `articles[query]` is the list currently returned for a query."""
+    def __init__(self):
+        self.articles = {}
+        self.requests = []
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                q = parse_qs(urlparse(self.path).query).get('q', [''])[0]
+                stub.requests.append(q)
+                arts = stub.articles.get(q, [])
+                body = json.dumps({'status': 'ok', 'totalResults': len(arts), 'articles': arts}).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/v2/everything"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+def article(i, title):
+    return {'source': {'name': 'Stub Wire'}, 'title': title, 'url': f'https://example.invalid/{i}', 'description': None}
+
+@pytest.fixture
+def news(monkeypatch):
+    pytest.importorskip('requests')
+    stub = StubNews()
+    monkeypatch.setattr(asa, 'NEWSAPI_URL', stub.url)
+    monkeypatch.setenv('NEWSAPI_KEY', 'test')
+    asa.ARTICLE_CACHE.clear()
+    asa.AGGREGATE_CACHE.clear()
+    scored = []
+    score_many = asa.KEYWORD_SCORER.score_many
+    monkeypatch.setattr(asa.KEYWORD_SCORER, 'score_many', lambda texts: scored.extend(texts) or score_many(texts))
+    stub.scored = scored
+    yield stub
+    stub.close()
+    asa.ARTICLE_CACHE.clear()
+    asa.AGGREGATE_CACHE.clear()
+
+def test_hot_symbol_makes_no_network_call(news):
+    news.articles['RELIANCE'] = [article(1, 'Reliance shares surge on strong growth')]
+    first = asa.analyze_sentiment('RELIANCE.NS')
+    second = asa.analyze_sentiment('RELIANCE.NS')
+    assert news.requests == ['RELIANCE']
+    assert first == second and first['score'] > 0
+
+def test_only_new_articles_are_rescored(news):
+    news.articles['TCS'] = [article(1, 'TCS beats estimates'), article(2, 'TCS downgrade')]
+    news.articles['INFY'] = [article(2, 'TCS downgrade'), article(3, 'Infosys record high')]  # shared article
+    asa.analyze_sentiment('TCS')
+    asa.analyze_sentiment('INFY')
+    assert news.scored == ['TCS beats estimates', 'TCS downgrade', 'Infosys record high']
+    asa.AGGREGATE_CACHE.clear()  # the aggregate expired: fetch again, new article only
+    news.articles['TCS'].append(article(4, 'TCS weak demand'))
+    asa.analyze_sentiment('TCS')
+    assert news.requests == ['TCS', 'INFY', 'TCS']
+    assert news.scored[3:] == ['TCS weak demand']
+
+def test_cached_result_is_not_shared_with_callers(news):
+    news.articles['SBIN'] = [article(1, 'SBIN upgrade')]
+    res = asa.analyze_sentiment('SBIN')
+    res['score'] = -1.0
+    res['sources'].clear()
+    again = asa.analyze_sentiment('SBIN')
+    assert again['score'] > 0 and len(again['sources']) == 1
+    again['sources'][0]['title'] = 'changed'
+    assert asa.analyze_sentiment('SBIN')['sources'][0]['title'] == 'SBIN upgrade'
+
+def test_use_cache_false_leaves_the_caches_alone(news):
+    news.articles['ITC'] = [article(1, 'ITC profit warning')]
+    asa.analyze_sentiment('ITC', use_cache=False)
+    assert len(asa.ARTICLE_CACHE) == 0 and len(asa.AGGREGATE_CACHE) == 0
@@ -0,0 +1,44 @@
+"""@tool metrics and the Prometheus export."""
+import re
+import pytest
+from scripts import instrumentation
+from scripts.instrumentation import snapshot, to_prometheus, tool
+
+@pytest.fixture(autouse=True)
+def clean_metrics():
+    instrumentation.reset()
+    yield
+    instrumentation.reset()
+
+def test_calls_errors_and_payload_are_recorded():
+    @tool(name='Doubler')
+    def double(xs):
+        return [x * 2 for x in xs]
+
+    @tool(name='Boom')
+    def boom(x):
+        raise KeyError(x)
+
+    double([1, 2, 3])
+    with pytest.raises(KeyError):
+        boom(1)
+    snap = snapshot()
+    assert (snap['Doubler']['calls'], snap['Doubler']['items_in'], snap['Doubler']['items_out']) == (1, 3, 3)
+    assert snap['Boom']['errors'] == 1 and snap['Boom']['error_types'] == {'KeyError': 1}
+
+def test_every_prometheus_series_has_help_and_type():
+    @tool(name='Boom')
+    def boom(x):
+        raise ValueError(x)
+
+    with pytest.raises(ValueError):
+        boom(1)
+    text = to_prometheus()
+    typed = set(re.findall(r'^# TYPE (\S+) ', text, re.M))
+    helped = set(re.findall(r'^# HELP (\S+) ', text, re.M))
+    assert typed == helped
+    for line in text.splitlines():
+        if line and not line.startswith('#'):
+            name = re.match(r'[a-z_]+', line).group(0)
+            assert name in typed or re.sub(r'_(bucket|sum|count)$', '', name) in typed, line
+    assert 'tool_errors_by_type_total{tool="Boom",type="ValueError"} 1' in text
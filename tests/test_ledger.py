@@ -0,0 +1,54 @@
+"""Ledger restart and idempotent execution booking."""
+from scripts.ledger import Ledger
+
+def order(coid, side='BUY', qty=10, price=100.0):
+    return {'client_order_id': coid, 'symbol': 'A.NS', 'side': side, 'qty': qty, 'price': price}
+
+def result(o, filled=None, avg=100.0, status='FILLED'):
+    return {**o, 'filled_qty': o['qty'] if filled is None else filled, 'avg_price': avg, 'status': status,
+            'order_id': 'X-' + o['client_order_id']}
+
+def test_starting_cash_survives_restart_before_any_snapshot(tmp_path):
+    state = str(tmp_path / 'ledger')
+    led = Ledger(state, starting_cash=50000.0)
+    led.apply_executions([result(order('a'))])
+    led.close()
+    again = Ledger(state, starting_cash=999999.0)  # e.g. `serve --capital` with a different value
+    assert again.cash == 50000.0 - 1000.0
+    assert again.equity() == 50000.0
+    again.close()
+
+def test_partial_then_full_fill_books_only_the_increment(tmp_path):
+    led = Ledger(str(tmp_path / 'ledger'), starting_cash=100000.0)
+    o = order('a')
+    led.record_orders([o])
+    led.apply_executions([result(o, filled=4, status='PARTIAL')])
+    led.apply_executions([result(o, filled=10)])
+    led.apply_executions([result(o, filled=10)])
+    assert led.position('A.NS')['qty'] == 10
+    assert led.orders['a']['status'] == 'FILLED'
+    led.close()
+
+def test_unknown_order_result_is_booked_once(tmp_path):
+    state = str(tmp_path / 'ledger')
+    led = Ledger(state, starting_cash=100000.0)
+    r = result(order('never-recorded'))
+    led.apply_executions([r])
+    led.apply_executions([r])
+    assert led.position('A.NS')['qty'] == 10
+    led.close()
+    again = Ledger(state)
+    again.apply_executions([r])  # replayed after a restart
+    assert again.position('A.NS')['qty'] == 10
+    again.close()
+
+def test_trimmed_order_result_is_not_booked_again(tmp_path):
+    led = Ledger(str(tmp_path / 'ledger'), starting_cash=100000.0, keep_closed_orders=2)
+    orders = [order(f'o{i}') for i in range(4)]
+    led.record_orders(orders)
+    led.apply_executions([result(o) for o in orders])
+    led.snapshot()
+    assert 'o0' not in led.orders
+    led.apply_executions([result(orders[0])])
+    assert led.position('A.NS')['qty'] == 40
+    led.close()
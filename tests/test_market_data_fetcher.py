@@ -0,0 +1,116 @@
+"""fetch_ohlc_many / _get_with_retry against a local stub chart server (YAHOO_CHART_URL)."""
+import json, threading, time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from scripts import market_data_fetcher as mdf
+from scripts.candle_store import CandleStore
+
+def chart_payload(n=3, base=100.0):
+    now = int(time.time()) // 60 * 60
+    ts = [now - 86400 * (n - 1 - i) for i in range(n)]
+    closes = [base + i for i in range(n)]
+    return {'chart': {'result': [{'timestamp': ts, 'indicators': {'quote': [
+        {'open': closes, 'high': closes, 'low': closes, 'close': closes, 'volume': [1000] * n}]}}]}}
+
+class StubChart:
+    """Serves /<symbol>; `script[symbol]` is a list of (status, headers) played before a 200."""
+    def __init__(self):
+        self.script = {}
+        self.hits = []  # (symbol, monotonic time)
+        self.queries = []  # query strings, in arrival order
+        self.lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                path, _, query = self.path.partition('?')
+                symbol = path.rsplit('/', 1)[-1]
+                with stub.lock:
+                    stub.hits.append((symbol, time.monotonic()))
+                    stub.queries.append(query)
+                    queued = stub.script.get(symbol)
+                    step = queued.pop(0) if queued else None
+                if step is None:
+                    body = json.dumps(chart_payload(base=float(len(symbol)))).encode()
+                    self.send_response(200)
+                    self.send_header('Content-Type', 'application/json')
+                else:
+                    status, headers = step
+                    body = b'{}'
+                    self.send_response(status)
+                    for k, v in headers.items():
+                        self.send_header(k, v)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/v7/finance/chart"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def count(self, symbol):
+        return sum(1 for s, _ in self.hits if s == symbol)
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+@pytest.fixture
+def stub(monkeypatch):
+    s = StubChart()
+    monkeypatch.setattr(mdf, 'YAHOO_CHART_URL', s.url)
+    monkeypatch.setattr(mdf, 'BACKOFF_BASE', 0.01)
+    monkeypatch.setattr(mdf, '_rate_limiter', mdf._HostRateLimiter(0))
+    yield s
+    s.close()
+
+def test_fetch_many_returns_candles_per_symbol(stub):
+    batch = mdf.fetch_ohlc_many(['RELIANCE', 'TCS.NS', 'INFY'], max_workers=3)
+    assert list(batch) == ['RELIANCE', 'TCS.NS', 'INFY']
+    assert batch.errors == {}
+    for sym, candles in batch.items():
+        assert [c['close'] for c in candles] == [len(mdf._normalize_symbol(sym)) + i for i in range(3)]
+        assert set(candles[0]) == {'timestamp', 'open', 'high', 'low', 'close', 'volume'}
+
+def test_retries_429_and_5xx_honouring_retry_after(stub):
+    stub.script['RELIANCE.NS'] = [(429, {'Retry-After': '1'}), (503, {})]
+    t0 = time.monotonic()
+    candles = mdf.fetch_ohlc('RELIANCE')
+    assert len(candles) == 3
+    assert stub.count('RELIANCE.NS') == 3
+    assert time.monotonic() - t0 >= 1.0  # slept the Retry-After before the second attempt
+
+def test_gives_up_after_max_retries(stub, monkeypatch):
+    monkeypatch.setattr(mdf, 'MAX_RETRIES', 2)
+    stub.script['TCS.NS'] = [(500, {})] * 5
+    with pytest.raises(Exception, match='500'):
+        mdf.fetch_ohlc('TCS')
+    assert stub.count('TCS.NS') == 3
+
+def test_requests_are_throttled_per_host(stub, monkeypatch):
+    monkeypatch.setattr(mdf, '_rate_limiter', mdf._HostRateLimiter(20))  # 50 ms between requests
+    symbols = [f'S{i}' for i in range(6)]
+    batch = mdf.fetch_ohlc_many(symbols, max_workers=6)
+    assert len(batch) == 6
+    times = sorted(t for _, t in stub.hits)
+    gaps = [b - a for a, b in zip(times, times[1:])]
+    assert min(gaps) >= 0.04
+    assert times[-1] - times[0] >= 0.2
+
+def test_failing_symbol_is_reported_and_others_return(stub):
+    stub.script['BAD.NS'] = [(404, {})]
+    batch = mdf.fetch_ohlc_many(['RELIANCE', 'BAD', 'INFY'], max_workers=3)
+    assert set(batch) == {'RELIANCE', 'INFY'}
+    assert list(batch.errors) == ['BAD']
+    assert '404' in batch.errors['BAD']
+
+def test_cached_intraday_window_longer_than_ttl_only_tops_up(stub):
+    store = CandleStore(':memory:', intraday_ttl=10 * 86400)
+    mdf.fetch_ohlc_cached('RELIANCE', range='1y', interval='5m', store=store)
+    store.mark_fetched('RELIANCE.NS', '5m', fetched_at=0)  # force a refresh on the next call
+    mdf.fetch_ohlc_cached('RELIANCE', range='1y', interval='5m', store=store)
+    assert 'range=1y' in stub.queries[0]
+    assert 'period1=' in stub.queries[1]  # tail top-up, not the whole year again
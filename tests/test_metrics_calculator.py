@@ -0,0 +1,108 @@
+"""Strategy metrics: blank exit prices must not poison the aggregates (pandas skipna semantics)."""
+import math
+import numpy as np
+import pandas as pd
+import pytest
+from scripts.metrics_calculator import RunningStats, StrategyMetricsStore, compute_strategy_metrics, trade_returns
+
+HISTORY = """timestamp,symbol,strategy,side,qty,price,exit_price,pnl
+1,A,mom,BUY,10,100,105,50
+2,A,mom,BUY,5,100,,
+3,B,mom,BUY,2,50,45,-10
+4,B,mr,BUY,1,50,,
+5,B,mr,BUY,3,50,55,15
+6,C,mom,BUY,4,20,21,4
+"""
+
+def pandas_reference(path):
+    """The original pandas implementation of compute_strategy_metrics."""
+    out = {}
+    for strat, g in pd.read_csv(path).groupby('strategy'):
+        pnl_pct = ((g['exit_price'] - g['price']) / g['price']) * g['qty']
+        avg = pnl_pct.mean()
+        out[strat] = {'sharpe': (avg / (pnl_pct.std() + 1e-6)) * math.sqrt(len(pnl_pct)),
+                      'win_rate': (pnl_pct > 0).sum() / max(1, len(pnl_pct)), 'avg_return': avg}
+    return out
+
+def assert_same(got, want):
+    assert set(got) == set(want)
+    for strat, m in want.items():
+        for k, v in m.items():
+            assert got[strat][k] == pytest.approx(v, nan_ok=True), (strat, k)
+
+@pytest.fixture
+def history(tmp_path):
+    path = tmp_path / 'trade_history.csv'
+    path.write_text(HISTORY)
+    return str(path)
+
+def test_blank_exit_price_matches_pandas(history):
+    want = pandas_reference(history)
+    assert not math.isnan(want['mom']['sharpe'])
+    assert_same(compute_strategy_metrics(history), want)
+
+def test_metrics_store_matches_pandas(history, tmp_path):
+    store = StrategyMetricsStore(history, state_path=str(tmp_path / 'state.json'))
+    assert store.sync() == 6
+    assert_same(store.metrics(), pandas_reference(history))
+
+def test_running_stats_skips_nan_returns():
+    rets = trade_returns([100, 100, 50, 20], [105, np.nan, 45, 21], [10, 5, 2, 4])
+    chunked, single = RunningStats(), RunningStats()
+    chunked.add_many(rets[:2])
+    chunked.add_many(rets[2:])
+    for x in rets:
+        single.add(float(x))
+    for st in (chunked, single):
+        assert (st.n, st.skipped, st.count) == (3, 1, 4)
+        assert st.metrics()['avg_return'] == pytest.approx(np.nanmean(rets))
+        assert not math.isnan(st.metrics()['sharpe'])
+
+def trade(strategy, price, exit_price, qty=1):
+    return {'timestamp': '2024-01-01T00:00:00', 'symbol': 'A.NS', 'strategy': strategy, 'side': 'BUY', 'qty': qty,
+            'price': price, 'exit_price': exit_price, 'pnl': (exit_price - price) * qty}
+
+def test_store_rebuilds_when_file_is_replaced_by_a_larger_one(tmp_path):
+    from scripts.backtester import write_trade_history
+    path = str(tmp_path / 'trade_history.csv')
+    write_trade_history([trade('mom', 100, 110)], path)
+    store = StrategyMetricsStore(path, state_path=str(tmp_path / 'state.json'))
+    store.sync()
+    write_trade_history([trade('mr', 100, 90), trade('mr', 100, 95), trade('mom', 100, 120)], path, append=False)
+    store.sync()
+    assert_same(store.metrics(), pandas_reference(path))
+    assert store.stats['mom'].count == 1
+
+def test_store_resumes_from_persisted_offset(tmp_path, history):
+    state = str(tmp_path / 'state.json')
+    StrategyMetricsStore(history, state_path=state).sync()
+    with open(history, 'a') as f:
+        f.write('7,C,mom,BUY,1,20,25,5\n')
+    store = StrategyMetricsStore(history, state_path=state)
+    assert store.sync() == 1
+    assert_same(store.metrics(), pandas_reference(history))
+
+def test_concurrent_syncs_read_each_row_once(history, tmp_path):
+    import threading
+    store = StrategyMetricsStore(history, state_path=str(tmp_path / 'state.json'))
+    threads = [threading.Thread(target=store.sync) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert sum(st.count for st in store.stats.values()) == 6
+
+def test_backtester_writes_update_open_stores(tmp_path, monkeypatch):
+    from scripts import metrics_calculator as mc
+    from scripts.backtester import write_trade_history
+    monkeypatch.setattr(mc, '_stores', {})
+    path = str(tmp_path / 'trade_history.csv')
+    write_trade_history([trade('mom', 100, 110)], path)
+    mc.cached_strategy_metrics(path)
+    store = next(iter(mc._stores.values()))
+    reads = []
+    monkeypatch.setattr(store, 'sync', lambda: reads.append(1))
+    write_trade_history([trade('mom', 100, 90), trade('mr', 50, 55, 2)], path, append=True)
+    assert reads == []  # folded in from the writer, not re-read
+    assert store.offset == (tmp_path / 'trade_history.csv').stat().st_size
+    assert_same(store.metrics(), pandas_reference(path))
@@ -0,0 +1,58 @@
+"""OrderRouter against the in-process MockBroker."""
+from scripts.order_router import MockBroker, OrderRouter
+from scripts.trade_executor import execute_trades
+
+def orders(n, prefix='id'):
+    return [{'client_order_id': f'{prefix}{i}', 'symbol': f'SYM{i}.NS', 'side': 'BUY', 'qty': i + 1, 'price': 100.0 + i}
+            for i in range(n)]
+
+def router(broker, **kw):
+    return OrderRouter(broker, max_concurrency=8, rate_limit=0, backoff_base=0.001, **kw)
+
+def test_results_keep_input_order():
+    batch = orders(20)
+    results = router(MockBroker(latency=0.001, seed=0)).submit_batch(batch)
+    assert [r['client_order_id'] for r in results] == [o['client_order_id'] for o in batch]
+    assert [r['filled_qty'] for r in results] == [o['qty'] for o in batch]
+    assert all(r['status'] == 'FILLED' and r['attempts'] == 1 for r in results)
+
+def test_lost_ack_is_not_placed_twice():
+    broker = MockBroker(latency=0, lost_ack_rate=1.0, seed=0)  # every order lands but its ack is lost
+    results = router(broker).submit_batch(orders(10))
+    assert all(r['status'] == 'FILLED' for r in results)
+    assert broker.calls == 10  # the lookup found each order, so none was re-sent
+    assert len(broker.orders) == 10
+
+def test_transient_failures_are_retried():
+    broker = MockBroker(latency=0, fail_rate=0.5, seed=1)
+    results = router(broker, max_retries=20).submit_batch(orders(20))
+    assert all(r['status'] == 'FILLED' for r in results)
+    assert sum(r['attempts'] for r in results) == broker.calls > 20
+    assert len(broker.orders) == 20
+
+def test_duplicate_client_order_ids_are_deduplicated():
+    broker = MockBroker(latency=0.01, seed=0)
+    r = router(broker)
+    first = r.submit_batch(orders(5) + orders(5))  # duplicates in flight in the same batch
+    again = r.submit_batch(orders(5))  # and re-submitted in a later batch
+    assert broker.calls == 5
+    assert first[:5] == first[5:] == again
+
+def test_orders_without_client_order_id_get_their_own():
+    broker = MockBroker(latency=0, seed=0)
+    batch = [{k: v for k, v in o.items() if k != 'client_order_id'} for o in orders(4)]
+    results = router(broker).submit_batch(batch)
+    assert len({r['client_order_id'] for r in results}) == 4
+    assert all(r['status'] == 'FILLED' for r in results)
+    assert broker.calls == 4
+
+def test_execute_trades_deduplicates_across_calls():
+    batch = orders(3, prefix='exec-dedupe-')
+    first = execute_trades(batch)
+    second = execute_trades(batch)
+    assert [r['order_id'] for r in first] == [r['order_id'] for r in second]
+
+def test_execute_trades_accepts_a_router():
+    broker = MockBroker(latency=0, seed=0)
+    results = execute_trades(orders(3), router=router(broker))
+    assert broker.calls == 3 and len(results) == 3
@@ -0,0 +1,46 @@
+"""SentimentEngine with a stub pipeline in place of FinBERT."""
+import pytest
+from scripts import sentiment_engine
+from scripts.sentiment_engine import SentimentEngine, get_engine
+
+class StubPipeline:
+    """Scores 'up' headlines positive and 'down' headlines negative; records every forward pass."""
+    def __init__(self):
+        self.batches = []
+
+    def __call__(self, texts, batch_size=None, truncation=False):
+        self.batches.append(list(texts))
+        return [{'label': 'positive' if 'up' in t else 'negative' if 'down' in t else 'neutral', 'score': 0.5}
+                for t in texts]
+
+def stub_engine(batch_size):
+    nlp = StubPipeline()
+    loads = []
+    engine = SentimentEngine('stub', batch_size=batch_size, pipeline_factory=lambda name: loads.append(name) or nlp)
+    return engine, nlp, loads
+
+def test_headlines_of_all_symbols_share_batches():
+    engine, nlp, loads = stub_engine(batch_size=4)
+    scores = engine.score_symbols({'A': ['A up', 'A up', 'A down'], 'B': ['B down', 'B down'], 'C': ['C up', 'C flat'],
+                                   'D': []})
+    assert [len(b) for b in nlp.batches] == [4, 3]  # 7 headlines from 3 symbols in two passes
+    assert nlp.batches[0] == ['A up', 'A up', 'A down', 'B down']
+    assert scores == {'A': pytest.approx(0.5 / 3), 'B': -0.5, 'C': 0.25, 'D': None}
+    assert loads == ['stub'] and engine.scored == 7
+
+def test_model_is_loaded_once_and_lazily():
+    engine, nlp, loads = stub_engine(batch_size=2)
+    assert not engine.loaded and loads == []
+    engine.score_texts(['x up'])
+    engine.score_texts(['y down', 'z', 'w'])
+    assert loads == ['stub']
+    assert [len(b) for b in nlp.batches] == [1, 2, 1]
+
+def test_get_engine_rejects_conflicting_config(monkeypatch):
+    monkeypatch.setattr(sentiment_engine, '_engine', None)
+    factory = lambda name: StubPipeline()
+    engine = get_engine(model_name='stub', batch_size=8, pipeline_factory=factory)
+    assert get_engine() is engine
+    assert get_engine(batch_size=8) is engine
+    with pytest.raises(ValueError, match='batch_size'):
+        get_engine(batch_size=16)
@@ -0,0 +1,55 @@
+"""SymbolMaster refresh and lookups racing a compacting reload."""
+import threading
+from benchmarks.fixtures import instrument_records
+import scripts.symbol_master as sm
+from scripts.symbol_master import SymbolMaster
+
+def test_lookups_stay_consistent_while_reload_compacts():
+    base = [f'S{i}.NS' for i in range(2000)]
+    full = instrument_records(base)
+    half = full[1000:]  # dropping half the rows forces a compaction that renumbers every row
+    m = SymbolMaster(lambda: full)
+    want = {r['tradingsymbol'] + '.NS': r['tick_size'] for r in half}
+    probe = list(want)[::50]
+    stop, bad = threading.Event(), []
+
+    def reader():
+        while not stop.is_set():
+            ticks, _ = m.tick_lot(probe)
+            for s, t in zip(probe, ticks):
+                inst = m.lookup(s)
+                if t != want[s] or inst is None or inst.yahoo != s:
+                    bad.append(s)
+
+    threads = [threading.Thread(target=reader) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for i in range(10):
+        m.load(half if i % 2 == 0 else full)
+    stop.set()
+    for t in threads:
+        t.join()
+    assert not bad
+
+def test_concurrent_get_master_reloads_once(monkeypatch):
+    calls = []
+
+    def source():
+        calls.append(1)
+        return instrument_records(['A.NS', 'B.NS'])
+
+    monkeypatch.setattr(sm, '_master', SymbolMaster(source))
+    sm._master.loaded_at = 0.0  # pretend the dump was republished since
+    start = threading.Barrier(8)
+
+    def caller():
+        start.wait()
+        sm.get_master()
+
+    threads = [threading.Thread(target=caller) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(calls) == 2  # initial load + one refresh
+    assert sm.get_master().token('A.NS') == 256265
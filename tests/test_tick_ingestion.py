@@ -0,0 +1,66 @@
+"""ReplayTickSource -> TickIngestor -> BarQueue -> run_signal_consumer."""
+import queue, threading
+import pytest
+from scripts.tick_ingestion import BarAggregator, BarQueue, ReplayTickSource, TickIngestor, run_signal_consumer
+
+T0 = 1_700_000_040 // 60 * 60
+MINUTES = 40
+SYMBOLS = {'RELIANCE.NS': 2600.0, 'TCS.NS': 3900.0}
+
+def replay_ticks():
+    ticks = []
+    for m in range(MINUTES):
+        for s in range(0, 60, 10):
+            for sym, base in SYMBOLS.items():
+                ticks.append({'symbol': sym, 'timestamp': T0 + 60 * m + s, 'price': base + m + s / 100, 'qty': 2})
+    return ticks
+
+def expected_bars(sym):
+    base = SYMBOLS[sym]
+    return [{'symbol': sym, 'timestamp': T0 + 60 * m, 'open': base + m, 'high': base + m + 0.5, 'low': base + m,
+             'close': base + m + 0.5, 'volume': 12} for m in range(MINUTES)]
+
+def test_replayed_ticks_reach_the_signal_stage_without_gaps():
+    bar_queue = BarQueue(maxsize=2)  # much smaller than the bar count: the producer has to wait for the consumer
+    ing = TickIngestor(ReplayTickSource(replay_ticks()), BarAggregator(60), bar_queue, clock_interval=None)
+    stop = threading.Event()
+    consumed = []
+    out = {}
+
+    def consume():
+        out['states'] = run_signal_consumer(bar_queue, {'sma_short': 5, 'sma_long': 20}, on_candidate=consumed.append,
+                                            stop_event=stop, idle_timeout=0.01)
+
+    consumer = threading.Thread(target=consume)
+    consumer.start()
+    ing.start()
+    ing.source.done.wait(10)
+    ing.stop()
+    stop.set()
+    consumer.join(10)
+
+    assert bar_queue.dropped == 0
+    assert ing.ticks == len(replay_ticks())
+    states = out['states']
+    for sym in SYMBOLS:
+        bars = expected_bars(sym)
+        assert ing.aggregator.bars(sym) == bars
+        assert states[sym].bars == MINUTES
+        assert states[sym].last_ts == bars[-1]['timestamp']
+        assert states[sym].short.value == pytest.approx(sum(b['close'] for b in bars[-5:]) / 5)
+        assert states[sym].long.value == pytest.approx(sum(b['close'] for b in bars[-20:]) / 20)
+    assert all(c['symbol'] in SYMBOLS for c in consumed)
+
+def test_bounded_block_raises_to_the_producer():
+    q = BarQueue(maxsize=1, put_timeout=0.01)
+    q.put({'symbol': 'A', 'timestamp': 0})
+    with pytest.raises(queue.Full):
+        q.put({'symbol': 'A', 'timestamp': 60})
+    assert q.qsize() == 1 and q.dropped == 0
+
+def test_drop_oldest_is_opt_in_and_counted():
+    q = BarQueue(maxsize=1, policy='drop_oldest')
+    q.put({'timestamp': 0})
+    q.put({'timestamp': 60})
+    assert q.dropped == 1
+    assert q.get(timeout=0)['timestamp'] == 60
@@ -0,0 +1,24 @@
+"""log_trades is write-through by default; flush=False buffers."""
+import csv
+from scripts.trade_logger import TRADE_LOG_COLUMNS, get_writer, log_trades
+
+RESULT = {'client_order_id': 'id1', 'order_id': 'MOCK-1', 'symbol': 'RELIANCE.NS', 'side': 'BUY', 'filled_qty': 1,
+          'avg_price': 2600, 'notional': 2600, 'status': 'FILLED'}
+
+def read(path):
+    with open(path, newline='') as f:
+        return list(csv.reader(f))
+
+def test_rows_are_on_disk_when_log_trades_returns(tmp_path):
+    path = str(tmp_path / 'trades.csv')
+    log_trades([RESULT, {**RESULT, 'client_order_id': 'id2'}], path)
+    rows = read(path)
+    assert rows[0] == TRADE_LOG_COLUMNS
+    assert [r[2] for r in rows[1:]] == ['id1', 'id2']
+
+def test_buffered_rows_appear_after_flush(tmp_path):
+    path = str(tmp_path / 'trades.csv')
+    log_trades([RESULT], path, flush=False)
+    assert not (tmp_path / 'trades.csv').exists()
+    get_writer(path).flush()
+    assert len(read(path)) == 2
@@ -0,0 +1,22 @@
+"""trader_manager end to end against the local fake market server and a fake broker."""
+import pytest
+from scripts.order_router import MockBroker, OrderRouter
+
+def test_trader_manager_runs_every_stage(tmp_path):
+    pytest.importorskip('requests')
+    from benchmarks.fixtures import FakeMarketServer
+    from scripts.trader_manager_agent import trader_manager
+    broker = MockBroker(latency=0, seed=0)
+    with FakeMarketServer(n_bars=120) as srv, srv.patched():
+        results = [trader_manager(f'FAKE{i}.NS', metrics_path=str(tmp_path / 'trade_history.csv'),
+                                  log_path=str(tmp_path / 'trades.csv'), use_transformer=False,
+                                  router=OrderRouter(broker, rate_limit=0), verbose=False) for i in range(20)]
+    for res in results:
+        assert 'error' not in res, res
+        assert res['signal']['signal'] in ('BUY', 'SELL', 'HOLD')
+        assert -1.0 <= res['sentiment']['score'] <= 1.0
+        assert (res['trade'] is None) == (res['risk'] is None)
+    traded = [r for r in results if r['trade']]
+    assert len(broker.orders) == len(traded)
+    if traded:
+        assert (tmp_path / 'trades.csv').exists()
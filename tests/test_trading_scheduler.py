@@ -0,0 +1,99 @@
+"""TradingScheduler.run_cycle in deterministic mode with fake stage callables."""
+import numpy as np
+from scripts.candles import Candles
+from scripts.trading_scheduler import TradingScheduler
+
+PARAMS = {'sma_short': 2, 'sma_long': 4, 'rsi_lower': 0, 'rsi_upper': 100}
+CLOSES = {'UP.NS': [10, 9, 8, 7, 6, 5, 4, 12],      # bullish crossover on the last bar -> BUY
+          'DOWN.NS': [4, 5, 6, 7, 8, 9, 10, 2],     # bearish crossover -> SELL
+          'FLAT.NS': [5] * 8}                       # no crossover -> HOLD
+
+def candles(closes):
+    close = np.asarray(closes, dtype=float) * 100
+    ts = 1_700_000_000 + 86400 * np.arange(len(close))
+    return Candles(ts, close, close, close, close)
+
+class Fakes:
+    def __init__(self):
+        self.calls = []
+        self.executed = []
+        self.logged = []
+
+    def fetch(self, symbols):
+        self.calls.append(('fetch', tuple(symbols)))
+        return {s: candles(CLOSES[s]) for s in symbols}
+
+    def sentiment(self, symbol):
+        self.calls.append(('sentiment', symbol))
+        return {'score': 0.0, 'summary': 'stub', 'sources': []}
+
+    def metrics(self):
+        self.calls.append(('metrics',))
+        return {'momentum': {'sharpe': 1.0, 'win_rate': 0.6, 'avg_return': 0.01}}
+
+    def execute(self, orders):
+        self.calls.append(('execute', tuple(o['symbol'] for o in orders)))
+        self.executed.extend(orders)
+        return [{'client_order_id': o['client_order_id'], 'order_id': f'FAKE-{i}', 'symbol': o['symbol'],
+                 'side': o['side'], 'filled_qty': o['qty'], 'avg_price': o['price'], 'status': 'FILLED'}
+                for i, o in enumerate(orders)]
+
+    def log(self, results):
+        self.calls.append(('log', len(results)))
+        self.logged.extend(results)
+        return 'fake.csv'
+
+def scheduler(fakes, **kw):
+    return TradingScheduler(capital=100000.0, batch_size=2, deterministic=True, signal_params=PARAMS,
+                            fetch_fn=fakes.fetch, sentiment_fn=fakes.sentiment, execute_fn=fakes.execute,
+                            log_fn=fakes.log, metrics_fn=fakes.metrics, **kw)
+
+def test_cycle_orders_stage_order_and_stats():
+    fakes = Fakes()
+    res = scheduler(fakes).run_cycle(['UP.NS', 'DOWN.NS', 'FLAT.NS'])
+    assert [(o['symbol'], o['side'], o['qty']) for o in res['orders']] == [('UP.NS', 'BUY', 4), ('DOWN.NS', 'SELL', 25)]
+    assert fakes.calls == [
+        ('metrics',),
+        ('fetch', ('UP.NS', 'DOWN.NS')), ('sentiment', 'UP.NS'), ('sentiment', 'DOWN.NS'),
+        ('execute', ('UP.NS', 'DOWN.NS')),
+        ('fetch', ('FLAT.NS',)), ('sentiment', 'FLAT.NS'),  # no orders in the second batch: nothing executed
+        ('log', 2),
+    ]
+    assert res['symbols']['FLAT.NS']['signal']['signal'] == 'HOLD'
+    assert res['symbols']['UP.NS']['trade']['order_id'] == 'FAKE-0'
+    assert res['errors'] == {} and res['log'] == 'fake.csv'
+    stats = res['stage_stats']
+    assert {k: v['count'] for k, v in stats.items()} == {
+        'metrics': 1, 'fetch': 2, 'sentiment': 2, 'select': 2, 'signal': 2, 'risk': 2, 'execute': 2, 'log': 1,
+        'cycle': 1}
+    assert all(v['max_ms'] >= v['p50_ms'] >= 0 for v in stats.values())
+
+def test_fetch_errors_are_reported_per_symbol():
+    fakes = Fakes()
+
+    class Batch(dict):
+        errors = {'FLAT.NS': 'boom'}
+
+    sched = scheduler(fakes)
+    sched.fetch_fn = lambda symbols: Batch((s, candles(CLOSES[s])) for s in symbols if s != 'FLAT.NS')
+    res = sched.run_cycle(['UP.NS', 'FLAT.NS'])
+    assert res['errors'] == {'FLAT.NS': 'boom'}
+    assert res['symbols']['FLAT.NS']['candles'] == 0
+    assert [o['symbol'] for o in res['orders']] == ['UP.NS']
+
+def test_ledger_equity_reaches_the_risk_engine(tmp_path):
+    from scripts.ledger import Ledger
+    from scripts.portfolio_risk import PortfolioRiskEngine
+    fakes = Fakes()
+    engine = PortfolioRiskEngine(account_equity=1e9)
+    ledger = Ledger(str(tmp_path / 'ledger'), starting_cash=100000.0)
+    res = scheduler(fakes, risk_engine=engine, ledger=ledger).run_cycle(['UP.NS'])
+    assert engine.account_equity == 100000.0
+    assert [o['qty'] for o in res['orders']] == [4]  # sized against the ledger's equity, not the constructor's
+    ledger.close()
+
+def test_risk_engine_skips_fills_without_symbol():
+    from scripts.portfolio_risk import PortfolioRiskEngine
+    engine = PortfolioRiskEngine(account_equity=100000.0)
+    engine.apply_fills([{'client_order_id': 'unknown', 'status': 'ERROR', 'order_id': None}])
+    assert engine.exposure()['positions'] == {} and None not in engine._index